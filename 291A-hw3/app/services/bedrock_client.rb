@@ -19,9 +19,14 @@ class BedrockClient
   #
   #   puts response[:output_text]
   #
-  def initialize(model_id:, region: ENV["AWS_REGION"] || "us-west-2")
+  # Set BEDROCK_ENDPOINT to send the calls to a stand-in such as
+  # locust/mock_llm_server.py instead of Amazon Bedrock.
+  #
+  def initialize(model_id:, region: ENV["AWS_REGION"] || "us-west-2", endpoint: ENV["BEDROCK_ENDPOINT"])
     @model_id = model_id
-    @client   = Aws::BedrockRuntime::Client.new(region: region)
+    options = { region: region }
+    options[:endpoint] = endpoint if endpoint.present?
+    @client   = Aws::BedrockRuntime::Client.new(**options)
   end
 
   # Calls the LLM with the given system and user prompts.
@@ -0,0 +1,115 @@
+"""
+Open-loop task starts for the personas (--arrival-rate): each simulated user's schedule of
+intended task starts, and the latencies measured from those starts.
+
+A closed-loop user starts its next task a think time after the previous one finished, so a
+slow backend slows the offered load and its own latencies hide the wait (coordinated
+omission). An ArrivalSchedule keeps starting tasks at its rate regardless, and ArrivalStats
+adds each task's lateness to its requests' latencies.
+"""
+
+import logging
+import random
+import threading
+import time
+
+from latency_histogram import LatencyHistogram, aggregate
+
+
+class ArrivalSchedule:
+    """
+    Open-loop task start times for one simulated user (--arrival-rate).
+    The schedule is anchored at start, the user's on_start, which is the intended start of
+    its first task. Each later start is one fixed or exponential (Poisson) interval after
+    the previous intended start, not after the previous task finished, so neither a slow
+    backend nor a slow first task shifts the offered load. An overdue start runs at once and
+    remembers how late it was; ArrivalStats counts those late arrivals, since the user's own
+    previous task held them back.
+    """
+    def __init__(self, rate, distribution, stats, start):
+        self.rate = rate
+        self.distribution = distribution
+        self.stats = stats  # ArrivalStats every arrival is counted in
+        self.intended_start = start  # time.monotonic() of the latest intended start
+        self.lateness = 0.0
+
+    def wait_time(self):
+        """Used as the user's wait_time: seconds until the next intended start, 0 if it is overdue."""
+        now = time.monotonic()
+        if self.distribution == "poisson":
+            self.intended_start += random.expovariate(self.rate)
+        else:
+            self.intended_start += 1.0 / self.rate
+        self.lateness = max(0.0, now - self.intended_start)
+        self.stats.record_arrival(self.lateness)
+        return max(0.0, self.intended_start - now)
+
+    def context(self):
+        """Used as the user's request context, so the request listener can add the lateness."""
+        return {"intended_lateness_ms": self.lateness * 1000}
+
+
+class ArrivalStats:
+    """
+    Open-loop (--arrival-rate) accounting: HDR latency histograms measured from the intended
+    task start, per request, and every arrival with its lateness. An arrival is late when the
+    user's previous task was still running at its intended start, so each late arrival is
+    load the schedule meant to offer but the user count could not.
+    """
+    LATE_WARNING_SHARE = 0.01  # Late arrival share above which the run is flagged as no longer open loop
+
+    def __init__(self):
+        self.histograms = {}  # "METHOD name" -> LatencyHistogram of latency from the intended start
+        self.arrivals = 0
+        self.lateness = LatencyHistogram()  # Lateness of the late arrivals only
+        self.lock = threading.Lock()
+
+    def record(self, name, latency_ms):
+        with self.lock:
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = self.histograms[name] = LatencyHistogram()
+            histogram.record(latency_ms * 1000)
+
+    def record_arrival(self, lateness_seconds):
+        with self.lock:
+            self.arrivals += 1
+            if lateness_seconds > 0:
+                self.lateness.record(lateness_seconds * 1e6)
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                "histograms": {name: histogram.encode() for name, histogram in self.histograms.items()},
+                "arrivals": self.arrivals,
+                "lateness": self.lateness.encode(),
+            }
+
+    @classmethod
+    def log_summary(cls, snapshots):
+        """Log percentiles from the intended start, and warn when arrivals ran late."""
+        histograms = {}
+        lateness = LatencyHistogram()
+        arrivals = 0
+        for snapshot in snapshots:
+            for name, encoded in snapshot["histograms"].items():
+                histograms.setdefault(name, LatencyHistogram()).merge(LatencyHistogram.decode(encoded))
+            lateness.merge(LatencyHistogram.decode(snapshot["lateness"]))
+            arrivals += snapshot["arrivals"]
+        if not arrivals:
+            return
+        logging.info("Latency from intended start (open-loop --arrival-rate, ms):")
+        for name, histogram in sorted(histograms.items()) + [("Aggregated", aggregate(histograms))]:
+            p50, p95, p99 = (histogram.value_at_percentile(p) / 1000 for p in (50, 95, 99))
+            logging.info(f"  {name}: {histogram.total} requests, p50 {p50:.1f}, p95 {p95:.1f}, p99 {p99:.1f}")
+        late_share = lateness.total / arrivals
+        logging.info(
+            f"Arrivals: {arrivals}, {lateness.total} ({late_share:.1%}) late, lateness "
+            f"p50 {lateness.value_at_percentile(50) / 1000:.0f} ms, max {lateness.value_at_percentile(100) / 1000:.0f} ms"
+        )
+        if late_share > cls.LATE_WARNING_SHARE:
+            logging.warning(
+                f"{late_share:.1%} of arrivals started late because their user was still running the previous task: "
+                f"the offered load fell below --arrival-rate and the run was partly closed loop. "
+                f"Raise -u and lower --arrival-rate so one user's rate fits its task latency."
+            )
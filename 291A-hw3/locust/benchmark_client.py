@@ -0,0 +1,142 @@
+"""
+Side-by-side benchmark of the locust HTTP client modes (requests vs fast).
+
+For each mode and each user count, runs a single headless locust process against
+the target host and measures how much of one CPU core the generator burned.
+From that it reports requests per CPU-second and the number of simulated users
+one core can drive before saturating.
+
+Usage:
+    python benchmark_client.py --standin
+    python benchmark_client.py --host http://localhost:3000 --users 100 500 1000 --run-time 60
+
+Point it at a backend that is not itself the bottleneck, otherwise the numbers
+measure the server rather than the generator. --standin starts standin_server.py
+on a free local port and benchmarks against it, which needs no Rails stack.
+"""
+
+import argparse
+import csv
+import os
+import resource
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+LOCUST_DIR = os.path.dirname(os.path.abspath(__file__))
+LOCUSTFILE = os.path.join(LOCUST_DIR, "locustfile.py")
+STANDIN_SERVER = os.path.join(LOCUST_DIR, "standin_server.py")
+MODES = ["requests", "fast"]
+CPU_SATURATION = 0.9  # Fraction of one core treated as "generator saturated"
+
+
+def read_aggregated_stats(csv_prefix):
+    """Return (request_count, requests_per_second) from the Aggregated row of a locust stats CSV."""
+    with open(f"{csv_prefix}_stats.csv", newline="") as f:
+        for row in csv.DictReader(f):
+            if row["Name"] == "Aggregated":
+                return int(row["Request Count"]), float(row["Requests/s"])
+    return 0, 0.0
+
+
+def start_standin_server(extra_args=()):
+    """Start standin_server.py on a free port, with extra_args passed through; returns (process, host)."""
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    process = subprocess.Popen(
+        [sys.executable, STANDIN_SERVER, "--port", str(port), *extra_args], stdout=subprocess.PIPE, stderr=subprocess.DEVNULL
+    )
+    process.stdout.readline()  # Wait for the "listening" line
+    return process, f"http://127.0.0.1:{port}"
+
+
+def run_locust(mode, users, run_time, host, workdir):
+    """Run one headless single-process locust and return its measurements."""
+    csv_prefix = os.path.join(workdir, f"{mode}_{users}")
+    cmd = [
+        sys.executable, "-m", "locust",
+        "-f", LOCUSTFILE,
+        "--headless",
+        "--http-client", mode,
+        "--host", host,
+        "--users", str(users),
+        "--spawn-rate", str(users),
+        "--run-time", f"{run_time}s",
+        "--csv", csv_prefix,
+        "--only-summary",
+        "--load-shape", "none",
+        "--exit-code-on-error", "0",
+    ]
+    before = resource.getrusage(resource.RUSAGE_CHILDREN)
+    started = time.monotonic()
+    subprocess.run(cmd, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    wall = time.monotonic() - started
+    after = resource.getrusage(resource.RUSAGE_CHILDREN)
+
+    cpu_seconds = (after.ru_utime - before.ru_utime) + (after.ru_stime - before.ru_stime)
+    cpu_util = cpu_seconds / wall if wall > 0 else 0.0
+    requests, rps = read_aggregated_stats(csv_prefix)
+    return {
+        "mode": mode,
+        "users": users,
+        "requests": requests,
+        "rps": rps,
+        "cpu_util": cpu_util,
+        "rps_per_core": rps / cpu_util if cpu_util > 0 else 0.0,
+        "users_per_core": users / cpu_util if cpu_util > 0 else 0.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument("--host", help="Base URL of the backend under test")
+    target.add_argument("--standin", action="store_true", help="Benchmark against a local standin_server.py")
+    parser.add_argument("--users", type=int, nargs="+", default=[100, 250, 500, 1000], help="User counts to try")
+    parser.add_argument("--run-time", type=int, default=30, help="Seconds per run")
+    parser.add_argument("--modes", nargs="+", choices=MODES, default=MODES)
+    args = parser.parse_args()
+
+    standin, host = start_standin_server() if args.standin else (None, args.host)
+    results = {mode: [] for mode in args.modes}
+    try:
+        with tempfile.TemporaryDirectory() as workdir:
+            for users in args.users:
+                for mode in args.modes:
+                    print(f"Running {mode:8s} with {users} users for {args.run_time}s...", flush=True)
+                    results[mode].append(run_locust(mode, users, args.run_time, host, workdir))
+    finally:
+        if standin:
+            standin.terminate()
+
+    print("\n" + "=" * 80)
+    print(f"{'Users':>7s}" + "".join(f" | {mode + ' RPS':>13s} {'CPU':>5s} {'RPS/core':>9s}" for mode in args.modes))
+    print("-" * 80)
+    for i, users in enumerate(args.users):
+        line = f"{users:7d}"
+        for mode in args.modes:
+            r = results[mode][i]
+            line += f" | {r['rps']:13.1f} {r['cpu_util']:5.0%} {r['rps_per_core']:9.1f}"
+        print(line)
+    print("=" * 80)
+
+    # Users one core can drive: the largest run below saturation, or the extrapolation from the first saturated run
+    for mode in args.modes:
+        unsaturated = [r for r in results[mode] if r["cpu_util"] < CPU_SATURATION]
+        saturated = [r for r in results[mode] if r["cpu_util"] >= CPU_SATURATION]
+        if saturated:
+            estimate = saturated[0]["users_per_core"]
+            note = f"saturated at {saturated[0]['users']} users"
+        elif unsaturated:
+            estimate = max(r["users_per_core"] for r in unsaturated) * CPU_SATURATION
+            note = "extrapolated, never saturated"
+        else:
+            estimate, note = 0, "no runs"
+        print(f"  {mode:8s}: ~{estimate:,.0f} simulated users per core ({note})")
+
+
+if __name__ == "__main__":
+    main()
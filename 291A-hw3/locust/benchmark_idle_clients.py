@@ -0,0 +1,148 @@
+"""
+Memory per simulated idle client: one IdleUser each (--idle-mode users) vs the IdleSwarm
+that multiplexes clients as rows of array columns (--idle-mode multiplexed).
+
+For each mode and each client count, runs a single headless locust process with only
+idle polling clients and samples the resident set size of that process. The bytes per
+client are the slope of peak RSS over client count, so the interpreter, locust and the
+locustfile's own footprint cancel out.
+
+Usage:
+    python benchmark_idle_clients.py --standin
+    python benchmark_idle_clients.py --standin --clients 10000 50000 100000 --modes multiplexed
+    python benchmark_idle_clients.py --host http://localhost:3000 --user-fixture users.fixture
+
+Each run lasts --run-time seconds, which must cover spawning the largest count at
+--spawn-rate. The multiplexed clients are spread over the users of --user-fixture, which
+--standin seeds itself (--identities users) when none is given. Both modes load the same
+fixture, so its memory is the same in every run and cancels out of the slope. A backend
+that cannot keep up with the polls does not change the memory per client, but it does
+show up in the RPS column.
+A multiplexed client's own state is a few dozen bytes (the locustfile logs the exact
+figure), which stays below the noise of RSS sampling until 100k+ clients.
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import psutil
+
+from benchmark_client import LOCUST_DIR, LOCUSTFILE, read_aggregated_stats, start_standin_server
+
+SEED_USERS = os.path.join(LOCUST_DIR, "seed_users.py")
+MODES = ["users", "multiplexed"]
+SAMPLE_INTERVAL = 0.5  # Seconds between RSS samples of the locust process
+
+
+def run_locust(mode, clients, spawn_rate, run_time, host, workdir, extra_args):
+    """Run one headless single-process locust with only idle clients; returns its peak RSS and throughput."""
+    csv_prefix = os.path.join(workdir, f"{mode}_{clients}")
+    cmd = [
+        sys.executable, "-m", "locust",
+        "-f", LOCUSTFILE,
+        "--headless",
+        "--host", host,
+        "--run-time", f"{run_time}s",
+        "--csv", csv_prefix,
+        "--only-summary",
+        "--load-shape", "none",
+        "--exit-code-on-error", "0",
+        "--idle-mode", mode,
+        *extra_args,
+    ]
+    if mode == "users":
+        cmd += ["--users", str(clients), "--spawn-rate", str(spawn_rate), "IdleUser"]
+    else:
+        cmd += ["--users", "0", "--idle-clients", str(clients), "--idle-spawn-rate", str(spawn_rate)]
+
+    process = psutil.Popen(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    peak_rss = 0
+    while process.poll() is None:
+        try:
+            peak_rss = max(peak_rss, process.memory_info().rss)
+        except psutil.NoSuchProcess:
+            break
+        time.sleep(SAMPLE_INTERVAL)
+    requests, rps = read_aggregated_stats(csv_prefix)
+    return {"mode": mode, "clients": clients, "peak_rss": peak_rss, "requests": requests, "rps": rps}
+
+
+def bytes_per_client(results):
+    """Least-squares slope of peak RSS over client count, or None with fewer than two counts."""
+    if len(results) < 2:
+        return None
+    slope, _ = statistics.linear_regression([r["clients"] for r in results], [r["peak_rss"] for r in results])
+    return slope
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument("--host", help="Base URL of the backend under test")
+    target.add_argument("--standin", action="store_true", help="Benchmark against a local standin_server.py")
+    parser.add_argument("--clients", type=int, nargs="+", default=[1000, 2000, 4000],
+                        help="Idle client counts to try (at least two for a bytes per client estimate)")
+    parser.add_argument("--spawn-rate", type=float, default=1000, help="Idle clients started per second")
+    parser.add_argument("--run-time", type=int, default=30, help="Seconds per run")
+    parser.add_argument("--modes", nargs="+", choices=MODES, default=MODES)
+    parser.add_argument("--polling", choices=["clock", "cursor"], default="clock", help="Passed to locust --polling")
+    parser.add_argument("--user-fixture", help="Passed to locust --user-fixture (required with --host)")
+    parser.add_argument("--identities", type=int, default=1000,
+                        help="Users --standin seeds into a fixture when --user-fixture is not given")
+    args = parser.parse_args()
+    if args.host and not args.user_fixture:
+        parser.error("--host needs --user-fixture (seed_users.py), since multiplexed clients need seeded users")
+
+    longest_spawn = max(args.clients) / args.spawn_rate
+    if longest_spawn >= args.run_time:
+        print(f"WARNING: spawning {max(args.clients)} clients takes {longest_spawn:.0f}s, longer than --run-time")
+    extra_args = ["--polling", args.polling]
+
+    standin, host = start_standin_server() if args.standin else (None, args.host)
+    results = {mode: [] for mode in args.modes}
+    try:
+        with tempfile.TemporaryDirectory() as workdir:
+            user_fixture = args.user_fixture
+            if not user_fixture:
+                user_fixture = os.path.join(workdir, "users.fixture")
+                subprocess.run(
+                    [sys.executable, SEED_USERS, "--host", host, "--count", str(args.identities), "--output", user_fixture],
+                    check=True, stdout=subprocess.DEVNULL,
+                )
+            extra_args += ["--user-fixture", user_fixture]
+            for clients in sorted(args.clients):
+                for mode in args.modes:
+                    print(f"Running {mode:11s} with {clients} idle clients for {args.run_time}s...", flush=True)
+                    results[mode].append(
+                        run_locust(mode, clients, args.spawn_rate, args.run_time, host, workdir, extra_args)
+                    )
+    finally:
+        if standin:
+            standin.terminate()
+
+    print("\n" + "=" * 80)
+    print(f"{'Clients':>8s}" + "".join(f" | {mode + ' RSS MB':>18s} {'RPS':>8s}" for mode in args.modes))
+    print("-" * 80)
+    for i, clients in enumerate(sorted(args.clients)):
+        line = f"{clients:8d}"
+        for mode in args.modes:
+            r = results[mode][i]
+            line += f" | {r['peak_rss'] / 2**20:18.1f} {r['rps']:8.1f}"
+        print(line)
+    print("=" * 80)
+
+    for mode in args.modes:
+        slope = bytes_per_client(results[mode])
+        if slope is None:
+            print(f"  {mode:11s}: pass at least two --clients counts for bytes per client")
+        else:
+            print(f"  {mode:11s}: ~{slope:,.0f} bytes per idle client")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+Micro-benchmark of UserStore against the previous dict + list implementation.
+
+Measures, at each store size:
+- store:       registering N users
+- sample:      get_random_user() calls, as every IdleUser/ActiveUser/ExpertUser does at spawn
+- add_conv:    add_conversation() with repeated ids, as get_conversations() re-syncs them
+- sample_conv: get_random_conversation() calls
+
+Usage:
+    python benchmark_user_store.py
+    python benchmark_user_store.py --sizes 10000 100000 --samples 20000
+"""
+
+import argparse
+import random
+import threading
+import timeit
+
+from locustfile import UserStore
+
+
+class LegacyUserStore:
+    """The UserStore this harness used before slot arrays: O(N) sampling, O(K) dedup."""
+    def __init__(self):
+        self.used_usernames = {}
+        self.username_lock = threading.Lock()
+        self.user_conversations = {}
+        self.conversations_lock = threading.Lock()
+
+    def get_random_user(self):
+        with self.username_lock:
+            if not self.used_usernames:
+                return None
+            random_username = random.choice(list(self.used_usernames.keys()))
+            return self.used_usernames[random_username]
+
+    def store_user(self, username, auth_token, user_id):
+        with self.username_lock:
+            self.used_usernames[username] = {
+                "username": username,
+                "auth_token": auth_token,
+                "user_id": user_id
+            }
+        with self.conversations_lock:
+            if user_id not in self.user_conversations:
+                self.user_conversations[user_id] = []
+        return self.used_usernames[username]
+
+    def add_conversation(self, user_id, conversation_id):
+        with self.conversations_lock:
+            if user_id not in self.user_conversations:
+                self.user_conversations[user_id] = []
+            if conversation_id not in self.user_conversations[user_id]:
+                self.user_conversations[user_id].append(conversation_id)
+
+    def get_random_conversation(self, user_id):
+        with self.conversations_lock:
+            if user_id not in self.user_conversations or not self.user_conversations[user_id]:
+                return None
+            return random.choice(self.user_conversations[user_id])
+
+
+def benchmark(store_class, size, samples, conversations_per_user):
+    """Return seconds spent in each operation for one store class at one size."""
+    store = store_class()
+    timings = {}
+    timings["store"] = timeit.timeit(
+        lambda: [store.store_user(f"user_{i}", f"token_{i}", i) for i in range(size)], number=1
+    )
+    timings["sample"] = timeit.timeit(store.get_random_user, number=samples)
+
+    # A handful of busy users accumulate many conversations, which are re-synced on every browse
+    busy_users = range(min(size, 100))
+    conversation_ids = [str(c) for c in range(conversations_per_user)]
+    timings["add_conv"] = timeit.timeit(
+        lambda: [store.add_conversation(u, c) for u in busy_users for c in conversation_ids], number=2
+    )
+    timings["sample_conv"] = timeit.timeit(lambda: store.get_random_conversation(random.choice(busy_users)), number=samples)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000], help="Number of stored users")
+    parser.add_argument("--samples", type=int, default=10000, help="Random samples per measurement")
+    parser.add_argument("--conversations", type=int, default=500, help="Conversations per busy user")
+    args = parser.parse_args()
+
+    operations = ["store", "sample", "add_conv", "sample_conv"]
+    print(f"{'Users':>8s} {'Store':>16s}" + "".join(f" {op + ' (s)':>14s}" for op in operations))
+    print("-" * 90)
+    for size in args.sizes:
+        for store_class in (LegacyUserStore, UserStore):
+            timings = benchmark(store_class, size, args.samples, args.conversations)
+            print(f"{size:8d} {store_class.__name__:>16s}" + "".join(f" {timings[op]:14.4f}" for op in operations))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,306 @@
+"""
+Fit a traffic profile (persona_profile.py) from a recorded request log.
+
+    python calibrate_profile.py production.log --name exam-week --output profiles/exam-week.json
+    python calibrate_profile.py trace.jsonl --task-gap 0.5 > profiles/idle-night.json
+
+The log is streamed with trace_replay.py (a JSONL trace or a Rails log). Each user's
+requests are cut into tasks: a request less than --task-gap seconds after the user's
+previous one continues the same task, as the chained requests of one locustfile task
+do. A task is named after its first request (TASK_STARTS), so e.g. a GET /expert/queue
+followed by message reads is respond_to_conversations and one without is
+claim_waiting_conversation. Every user is then classified as a persona:
+
+    ExpertUser  used any /expert/ endpoint
+    NewUser     registered during the log
+    IdleUser    only polled the update feeds
+    ActiveUser  everyone else
+
+Persona weights are the users per persona and task weights the tasks per persona, both
+in percent. Think times are the gaps from the last request of one task to the first
+of the next, below --session-gap; per persona the constant, uniform, exponential and
+lognormal fits are compared by Kolmogorov-Smirnov distance and the closest is kept.
+Think times shorter than --task-gap cannot be told apart from chained requests, so
+they merge two tasks into one and are missing from the fit.
+The question mix counts new conversations whose title is one of the locustfile's questions
+(questions.py), so it is only fitted from traces of earlier load tests.
+
+Rails logs have one second timestamps and do not attribute POST /auth/register to the
+new user, so calibrate from JSONL traces where possible.
+"""
+
+import argparse
+import json
+import math
+import os
+import random
+import re
+import sys
+from collections import Counter
+
+from persona_profile import Profile, ThinkTime
+from questions import QUESTION_CATEGORY_BY_TITLE
+from trace_replay import TRACE_FORMATS, read_trace
+
+# Endpoint of a task's first request (plus ", messages" for a queue fetch followed by message reads) -> task
+TASK_STARTS = {
+    "NewUser": {
+        "POST /conversations": "create_first_conversation",
+        "GET /conversations": "browse_conversations",
+    },
+    "IdleUser": {
+        "GET /api/conversations/updates": "poll_for_updates",
+        "GET /api/messages/updates": "poll_for_updates",
+        "GET /api/expert-queue/updates": "poll_for_updates",
+    },
+    "ActiveUser": {
+        "GET /conversations": "browse_conversations",
+        "POST /conversations": "create_new_conversation",
+        "POST /messages": "post_message_to_conversation",
+        "GET /conversations/[id]/messages": "read_messages",
+        "GET /api/conversations/updates": "poll_updates",
+        "GET /api/messages/updates": "poll_updates",
+    },
+    "ExpertUser": {
+        "GET /expert/queue": "claim_waiting_conversation",
+        "GET /expert/queue, messages": "respond_to_conversations",
+        "GET /expert/profile": "view_expert_profile",
+        "PUT /expert/profile": "update_profile_occasionally",
+        "GET /api/conversations/updates": "poll_for_updates",
+        "GET /api/messages/updates": "poll_for_updates",
+        "GET /api/expert-queue/updates": "poll_for_updates",
+    },
+}
+POLL_ENDPOINTS = set(TASK_STARTS["IdleUser"])
+# Share of a task's runs that send the request it is recognized by (update_profile_occasionally updates 10% of the time)
+TASK_REQUEST_SHARE = {("ExpertUser", "update_profile_occasionally"): 0.1}
+MIN_THINK_TIMES = 20
+# p1 to p99 spread, relative to the median, below which think times count as constant
+CONSTANT_SPREAD = 0.05
+MAX_THINK_TIMES = 100000  # Per persona, sampled down to keep the fit fast
+GAPS_PER_USER = 1000
+
+
+def endpoint(request):
+    """'METHOD /path' of a request with numeric ids as [id], as the locustfile names requests."""
+    path = re.sub(r"/\d+", "/[id]", request.path.split("?", 1)[0])
+    return f"{request.method} {path}"
+
+
+class UserLog:
+    """One user's tasks and think times, built one request at a time."""
+    __slots__ = ("tasks", "gaps", "seen_gaps", "expert", "registered", "task", "last_time")
+
+    def __init__(self):
+        self.tasks = Counter()
+        self.gaps = []  # Reservoir of up to GAPS_PER_USER think times
+        self.seen_gaps = 0
+        self.expert = False
+        self.registered = False
+        self.task = None
+        self.last_time = None
+
+    def add(self, request, task_gap, session_gap, rng):
+        name = endpoint(request)
+        self.expert = self.expert or name.split(" ", 1)[1].startswith("/expert/")
+        self.registered = self.registered or name == "POST /auth/register"
+        gap = request.timestamp - self.last_time if self.last_time is not None else None
+        self.last_time = request.timestamp
+        if gap is not None and gap < task_gap:
+            if self.task == "GET /expert/queue" and name == "GET /conversations/[id]/messages":
+                self.task = "GET /expert/queue, messages"
+            return
+        self.finish()
+        self.task = name
+        if gap is not None and gap < session_gap:
+            self.seen_gaps += 1
+            if len(self.gaps) < GAPS_PER_USER:
+                self.gaps.append(gap)
+            else:
+                slot = rng.randrange(self.seen_gaps)
+                if slot < GAPS_PER_USER:
+                    self.gaps[slot] = gap
+
+    def finish(self):
+        if self.task is not None:
+            self.tasks[self.task] += 1
+            self.task = None
+
+    def persona(self):
+        """Persona this user behaved like, or None if none of its tasks is a persona task."""
+        if self.expert:
+            return "ExpertUser"
+        if self.registered:
+            return "NewUser"
+        known = [task for task in self.tasks if any(task in starts for starts in TASK_STARTS.values())]
+        if not known:
+            return None
+        return "IdleUser" if all(task in POLL_ENDPOINTS for task in known) else "ActiveUser"
+
+
+def percentages(counts):
+    """Integer weights in percent, at least 1 for anything that occurred."""
+    total = sum(counts.values())
+    return {key: max(1, round(100 * count / total)) for key, count in counts.items() if count > 0}
+
+
+def ks_distance(think_time, sorted_gaps):
+    """Kolmogorov-Smirnov distance between the gaps and a think-time distribution."""
+    n = len(sorted_gaps)
+    return max(
+        max(think_time.cdf(gap) - i / n, (i + 1) / n - think_time.cdf(gap))
+        for i, gap in enumerate(sorted_gaps)
+    )
+
+
+def candidate_fits(gaps):
+    """Fitted ThinkTime per distribution for a sorted list of gaps."""
+    n = len(gaps)
+    mean = sum(gaps) / n
+    cap = gaps[-1]
+    fits = {
+        "constant": ThinkTime("constant", value=gaps[n // 2]),
+        # p1 to p99, so a few outliers do not stretch the range
+        "uniform": ThinkTime("uniform", low=gaps[n // 100], high=gaps[min(n - 1, n * 99 // 100)]),
+        "exponential": ThinkTime("exponential", mean=mean, max=cap),
+    }
+    logs = [math.log(gap) for gap in gaps if gap > 0]
+    if len(logs) > 1:
+        log_mean = sum(logs) / len(logs)
+        sigma = math.sqrt(sum((x - log_mean) ** 2 for x in logs) / (len(logs) - 1))
+        fits["lognormal"] = ThinkTime("lognormal", median=math.exp(log_mean), sigma=sigma, max=cap)
+    return fits
+
+
+def fit_think_time(gaps):
+    """Closest ThinkTime by KS distance and the distance of every candidate; (None, {}) with too few gaps."""
+    if len(gaps) < MIN_THINK_TIMES:
+        return None, {}
+    gaps = sorted(gaps)
+    fits = candidate_fits(gaps)
+    distances = {name: ks_distance(fit, gaps) for name, fit in fits.items()}
+    uniform = fits["uniform"].params
+    if uniform["high"] - uniform["low"] <= CONSTANT_SPREAD * fits["constant"].params["value"]:
+        # A fixed interval with timing jitter, which KS against a step function judges badly
+        return fits["constant"], distances
+    best = min(distances, key=distances.get)
+    return fits[best], distances
+
+
+def calibrate(path, trace_format, name, task_gap, session_gap, seed):
+    """Read the log and return the fitted profile as a dict, with a calibration section describing the fit."""
+    rng = random.Random(seed)
+    users = {}
+    registrations_without_user = 0
+    categories = Counter()
+    new_conversations = 0
+    requests = 0
+    for request in read_trace(path, trace_format):
+        requests += 1
+        if request.method == "POST" and request.path.split("?", 1)[0] == "/conversations":
+            new_conversations += 1
+            title = (request.body or {}).get("title")
+            if title in QUESTION_CATEGORY_BY_TITLE:
+                categories[QUESTION_CATEGORY_BY_TITLE[title]] += 1
+        if request.user is None:
+            registrations_without_user += endpoint(request) == "POST /auth/register"
+            continue
+        user = users.get(request.user)
+        if user is None:
+            user = users[request.user] = UserLog()
+        user.add(request, task_gap, session_gap, rng)
+
+    persona_users = Counter()
+    persona_tasks = {persona: Counter() for persona in TASK_STARTS}
+    persona_gaps = {persona: [] for persona in TASK_STARTS}
+    for user in users.values():
+        user.finish()
+        persona = user.persona()
+        if persona is None:
+            continue
+        persona_users[persona] += 1
+        persona_gaps[persona].extend(user.gaps)
+        for task, count in user.tasks.items():
+            task_name = TASK_STARTS[persona].get(task)
+            if task_name:
+                persona_tasks[persona][task_name] += count / TASK_REQUEST_SHARE.get((persona, task_name), 1)
+    # Registrations the log could not attribute still started a NewUser each
+    persona_users["NewUser"] += registrations_without_user
+
+    if not persona_users:
+        raise ValueError(f"{path}: no requests of any persona found")
+    weights = percentages(persona_users)
+    personas = {}
+    think_time_fits = {}
+    for persona in TASK_STARTS:
+        if persona not in weights:
+            personas[persona] = {"weight": 0}
+            continue
+        spec = {"weight": weights[persona]}
+        if persona_tasks[persona]:
+            spec["tasks"] = percentages(persona_tasks[persona])
+        gaps = persona_gaps[persona]
+        if len(gaps) > MAX_THINK_TIMES:
+            gaps = rng.sample(gaps, MAX_THINK_TIMES)
+        think_time, distances = fit_think_time(gaps)
+        if think_time:
+            spec["think_time"] = think_time.to_dict()
+            think_time_fits[persona] = {
+                "think_times": len(persona_gaps[persona]),
+                "ks_distance": {dist: round(d, 4) for dist, d in sorted(distances.items(), key=lambda item: item[1])},
+            }
+        personas[persona] = spec
+
+    profile = {"name": name, "personas": personas}
+    if categories:
+        profile["question_categories"] = percentages(categories)
+    profile["calibration"] = {
+        "source": path,
+        "requests": requests,
+        "users": dict(persona_users),
+        "registrations_without_user": registrations_without_user,
+        "new_conversations": new_conversations,
+        "matched_question_titles": sum(categories.values()),
+        "task_gap_s": task_gap,
+        "session_gap_s": session_gap,
+        "think_time_fits": think_time_fits,
+    }
+    Profile.from_dict(profile)  # Fail here rather than in the load test
+    return profile
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("log", help="JSONL trace or Rails log")
+    parser.add_argument("--format", choices=TRACE_FORMATS, default="auto", help="Log format (default: by extension)")
+    parser.add_argument("--name", help="Profile name (default: the log's file name)")
+    parser.add_argument("--task-gap", type=float, default=1.0,
+                        help="Seconds under which a user's next request continues the same task")
+    parser.add_argument("--session-gap", type=float, default=1800,
+                        help="Gaps of at least this many seconds end a session and are not think times")
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the think time reservoir sampling")
+    parser.add_argument("--output", help="Write the profile here instead of stdout")
+    args = parser.parse_args()
+
+    name = args.name or os.path.splitext(os.path.basename(args.log))[0]
+    profile = calibrate(args.log, args.format, name, args.task_gap, args.session_gap, args.seed)
+    text = json.dumps(profile, indent=2) + "\n"
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text)
+    else:
+        sys.stdout.write(text)
+
+    calibration = profile["calibration"]
+    print(f"Profile {name} from {calibration['requests']} requests:", file=sys.stderr)
+    for persona, spec in profile["personas"].items():
+        users = calibration["users"].get(persona, 0)
+        think = spec.get("think_time")
+        think_text = ThinkTime.from_dict(think) if think else "locustfile default"
+        print(f"  {persona}: {users} users, weight {spec['weight']}, think time {think_text}", file=sys.stderr)
+    if not calibration["matched_question_titles"]:
+        print("  No new conversation title matched the locustfile's questions; the question mix is left as is", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+"""
+Outcomes of expert claims (POST /expert/conversations/:id/claim) and the bookkeeping of
+the claim contention scenario (--scenario claim-contention).
+
+The backend checks that a conversation is unassigned and then assigns it without a lock,
+so experts racing for the same conversation can both be told they won. ClaimStats tells
+won, lost race and error apart, counts wins per conversation to find double wins, and
+keeps the feeder's backlog and time-in-queue measurements.
+"""
+
+import logging
+import threading
+import time
+
+from latency_histogram import LatencyHistogram
+
+
+class ClaimStats:
+    """
+    Outcomes of POST /expert/conversations/:id/claim: won (200), lost race (422, another
+    expert was first) or error, each with its latency histogram. In the claim contention
+    scenario also the conversations won (to find double wins) and the feeder's queue timings.
+    """
+    OUTCOMES = ("won", "lost", "error")
+
+    def __init__(self):
+        self.outcomes = {outcome: LatencyHistogram() for outcome in self.OUTCOMES}
+        self.first_claim = None
+        self.last_win = None
+        self.track_wins = False  # Set by the claim contention scenario, whose conversation ids are bounded
+        self.wins = {}  # conversation_id -> times won
+        self.backlog = 0
+        self.backlog_ids = {}  # Feeder only: conversation_id -> backlog ready time
+        self.created = 0
+        self.backlog_ready = None
+        self.drained = None
+        self.queue_time = LatencyHistogram()  # creation until the feeder saw it leave the waiting queue
+        self.lock = threading.Lock()
+
+    def record(self, outcome, conversation_id, response_time_ms):
+        now = time.time()
+        with self.lock:
+            self.outcomes[outcome].record(response_time_ms * 1000)
+            self.first_claim = min(self.first_claim or now, now - response_time_ms / 1000)
+            if outcome == "won":
+                self.last_win = now
+                if self.track_wins:
+                    self.wins[conversation_id] = self.wins.get(conversation_id, 0) + 1
+
+    def record_dequeued(self, seconds):
+        with self.lock:
+            self.queue_time.record(seconds * 1e6)
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                "outcomes": {outcome: histogram.encode() for outcome, histogram in self.outcomes.items()},
+                "first_claim": self.first_claim,
+                "last_win": self.last_win,
+                "wins": dict(self.wins),
+                "backlog": self.backlog,
+                "created": self.created,
+                "backlog_ready": self.backlog_ready,
+                "drained": self.drained,
+                "queue_time": self.queue_time.encode(),
+            }
+
+    @classmethod
+    def report(cls, snapshots):
+        """Merge snapshots (one per worker) into outcome percentiles, throughput and the feeder's queue timings."""
+        outcomes = {outcome: LatencyHistogram() for outcome in cls.OUTCOMES}
+        queue_time = LatencyHistogram()
+        wins = {}
+        feeder = {}
+        first_claims, last_wins = [], []
+        for snapshot in snapshots:
+            for outcome, encoded in snapshot["outcomes"].items():
+                outcomes[outcome].merge(LatencyHistogram.decode(encoded))
+            queue_time.merge(LatencyHistogram.decode(snapshot["queue_time"]))
+            for conversation_id, count in snapshot["wins"].items():
+                wins[conversation_id] = wins.get(conversation_id, 0) + count
+            if snapshot["first_claim"]:
+                first_claims.append(snapshot["first_claim"])
+            if snapshot["last_win"]:
+                last_wins.append(snapshot["last_win"])
+            if snapshot["backlog_ready"]:
+                feeder = snapshot  # Only one process feeds the queue
+        claims = sum(histogram.total for histogram in outcomes.values())
+        span = max(last_wins) - min(first_claims) if first_claims and last_wins else 0
+        report = {
+            "claims": claims,
+            "outcomes": {
+                outcome: {
+                    "count": histogram.total,
+                    "share": round(histogram.total / claims, 4) if claims else 0,
+                    **{f"p{p}_ms": histogram.value_at_percentile(p) / 1000 for p in (50, 95, 99)},
+                }
+                for outcome, histogram in outcomes.items()
+            },
+            "won_per_second": round(outcomes["won"].total / span, 2) if span > 0 else None,
+            "double_wins": sorted(conversation_id for conversation_id, count in wins.items() if count > 1),
+        }
+        if feeder:
+            report["feeder"] = {
+                "backlog": feeder["backlog"],
+                "created": feeder["created"],
+                "drain_s": round(feeder["drained"] - feeder["backlog_ready"], 3) if feeder["drained"] else None,
+                "dequeued": queue_time.total,
+                **{f"queue_p{p}_ms": queue_time.value_at_percentile(p) / 1000 for p in (50, 95, 99)},
+            }
+        return report
+
+    @classmethod
+    def log_summary(cls, snapshots):
+        """Log claim outcomes, and the contention scenario's throughput, drain time and double wins."""
+        report = cls.report(snapshots)
+        if not report["claims"]:
+            return
+        logging.info(
+            f"Claims: {report['claims']} attempts"
+            + (f", {report['won_per_second']} won/s" if report["won_per_second"] else "")
+        )
+        for outcome, values in report["outcomes"].items():
+            logging.info(
+                f"  {outcome}: {values['count']} ({values['share']:.1%}), p50 {values['p50_ms']:.1f}ms, "
+                f"p95 {values['p95_ms']:.1f}ms, p99 {values['p99_ms']:.1f}ms"
+            )
+        if report["double_wins"]:
+            logging.warning(
+                f"  {len(report['double_wins'])} conversations were won by more than one expert, "
+                f"e.g. {', '.join(map(str, report['double_wins'][:5]))}"
+            )
+        feeder = report.get("feeder")
+        if feeder:
+            drain = f"drained in {feeder['drain_s']:.1f}s" if feeder["drain_s"] is not None else "not drained"
+            logging.info(
+                f"  Contention queue: backlog of {feeder['backlog']} {drain}, {feeder['created']} created in total; "
+                f"time in queue p50 {feeder['queue_p50_ms']:.0f}ms, p95 {feeder['queue_p95_ms']:.0f}ms, "
+                f"p99 {feeder['queue_p99_ms']:.0f}ms"
+            )
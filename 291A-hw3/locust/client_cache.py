@@ -0,0 +1,62 @@
+"""
+The browser-like response cache of --client-cache: each simulated user keeps an LRU of
+JSON GET responses, reuses an entry without a request while it is younger than the TTL
+and revalidates it with If-None-Match after that. ClientCacheStats counts the outcome of
+every lookup per endpoint.
+"""
+
+import logging
+import time
+from collections import OrderedDict
+
+from updates import TotalsStats
+
+
+class ClientCache:
+    """
+    One simulated user's cache of JSON GET responses, bounded by entry count (LRU) and
+    reused without a request for ttl seconds, then revalidated by ETag.
+    """
+    def __init__(self, max_entries, ttl):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.entries = OrderedDict()  # path -> (etag, data, payload_bytes, fetched_at)
+
+    def get(self, path):
+        entry = self.entries.get(path)
+        if entry is not None:
+            self.entries.move_to_end(path)
+        return entry
+
+    def is_fresh(self, entry):
+        return time.monotonic() - entry[3] < self.ttl
+
+    def put(self, path, etag, data, payload_bytes):
+        self.entries[path] = (etag, data, payload_bytes, time.monotonic())
+        self.entries.move_to_end(path)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def invalidate(self, *paths):
+        for path in paths:
+            self.entries.pop(path, None)
+
+
+class ClientCacheStats(TotalsStats):
+    """Per endpoint outcomes of client cache lookups: fresh hits, 304 revalidations and misses."""
+    def record(self, name, outcome, saved_bytes=0):
+        with self.lock:
+            totals = self.totals.setdefault(name, {"fresh": 0, "revalidated": 0, "miss": 0, "saved_bytes": 0})
+            totals[outcome] += 1
+            totals["saved_bytes"] += saved_bytes
+
+    @classmethod
+    def log_summary(cls, snapshots):
+        """Log hit rates and the response bytes the cache kept off the wire."""
+        for name, totals in sorted(cls.merge(snapshots).items()):
+            lookups = totals["fresh"] + totals["revalidated"] + totals["miss"]
+            logging.info(
+                f"Client cache {name}: {lookups} lookups, {totals['fresh'] / lookups:.1%} fresh hits, "
+                f"{totals['revalidated'] / lookups:.1%} revalidated (304), {totals['miss'] / lookups:.1%} misses, "
+                f"{totals['saved_bytes'] / 1024:.0f} KB not transferred"
+            )
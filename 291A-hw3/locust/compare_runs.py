@@ -0,0 +1,303 @@
+"""
+Compare a candidate load test run against a baseline and fail on a significant regression.
+
+Runs are given either as globs of HDR histogram logs (locustfile --histogram-log, every
+request recorded at microsecond resolution; separate the globs of repeated runs with
+commas) or, with --store, as CONFIG:VARIANT[:SHAPE] cells of a run_matrix.py result
+store, whose successful repetitions are all loaded (from --matrix, when the store holds
+several):
+
+    python compare_runs.py "base1/histograms*.jsonl,base2/histograms*.jsonl" "cand1/histograms*.jsonl,cand2/histograms*.jsonl"
+    python compare_runs.py --store results.db "Single instance:baseline" "Single instance:cache-expert-bios"
+
+Every further candidate is compared against the same baseline. For each endpoint and
+for all requests together, and for each --percentiles, the report gives:
+- the baseline and candidate percentile and the relative delta
+- a bootstrap confidence interval of the delta, which needs no assumption about the
+  latency distribution. Requests of one run are not independent (a slow minute slows all
+  of them), and neither are runs, so the bootstrap resamples repetitions and, within
+  each, the histogram log intervals; only runs with fewer than MIN_BLOCKS intervals fall
+  back to resampling single requests. With one repetition per run, the interval shows
+  the noise within that run only, not how much a rerun would differ
+- the bootstrap p-value of the delta being zero
+and per endpoint the p-value of a Mann-Whitney U test that the candidate's latencies
+are shifted against the baseline's, computed exactly from the histogram buckets.
+
+A percentile regresses when it grew by more than --max-increase percent and its
+confidence interval lies entirely above zero. With --store and at least two repetitions
+per cell, the mean max RPS is also compared with a permutation test (exact for few
+repetitions, a seeded Monte Carlo estimate for many), and a drop beyond
+--max-rps-decrease percent at p < --alpha regresses. Endpoints with fewer than
+--min-requests requests in either run are shown but not judged.
+
+The exit code is 0 when nothing regressed and 1 otherwise, so the command can gate a pipeline.
+"""
+
+import argparse
+import glob
+import itertools
+import math
+import sys
+
+import numpy as np
+
+from latency_histogram import LatencyHistogram, aggregate, read_histogram_log
+from run_matrix import SUCCESSFUL_RUN, open_store, store_matrix
+
+MIN_BLOCKS = 8  # Histogram log intervals a repetition needs before they are resampled instead of requests
+EXACT_PERMUTATIONS = 20000  # Relabellings up to which the max RPS permutation test is exact (10 vs 10 has 184756)
+PERMUTATION_RESAMPLES = 10000  # Random relabellings of the Monte Carlo permutation test beyond that
+
+
+def read_repetition(paths):
+    """
+    Interval blocks of one repetition: one {request name: LatencyHistogram} per histogram
+    log line, with the line's histograms together under "Aggregated".
+    """
+    blocks = {}
+    for path in paths:
+        for time_, source, name, histogram in read_histogram_log(path):
+            blocks.setdefault((path, time_, source), {})[name] = histogram
+    for block in blocks.values():
+        block["Aggregated"] = aggregate(block)
+    return list(blocks.values())
+
+
+def load_histogram_run(patterns):
+    """Repetitions of a run given as comma-separated histogram log globs, one glob per repetition."""
+    repetitions = []
+    for pattern in patterns.split(","):
+        paths = sorted(glob.glob(pattern))
+        if not paths:
+            raise SystemExit(f"No histogram logs match {pattern}")
+        repetitions.append(read_repetition(paths))
+    return repetitions, None
+
+
+def load_store_run(store, matrix_name, cell):
+    """Successful repetitions and their max RPS of a CONFIG:VARIANT[:SHAPE] cell of one matrix in the store."""
+    parts = cell.split(":")
+    if len(parts) not in (2, 3):
+        raise SystemExit(f"Expected CONFIG:VARIANT[:SHAPE], got {cell!r}")
+    where = f"matrix = ? AND config = ? AND variant = ? AND {SUCCESSFUL_RUN}"
+    query = f"SELECT prefix, max_rps FROM runs WHERE {where}" + (" AND shape = ?" if len(parts) == 3 else "")
+    rows = store.execute(query, [matrix_name, *parts]).fetchall()
+    if not rows:
+        raise SystemExit(f"No successful runs of {cell} in matrix {matrix_name!r}")
+    shapes = {row[0] for row in store.execute(f"SELECT shape FROM runs WHERE {where}", [matrix_name, *parts[:2]])}
+    if len(parts) == 2 and len(shapes) > 1:
+        raise SystemExit(f"{cell} ran with several shapes ({', '.join(sorted(shapes))}); add :SHAPE")
+    repetitions = [read_repetition(sorted(glob.glob(f"{row['prefix']}_histograms*.jsonl"))) for row in rows]
+    repetitions = [repetition for repetition in repetitions if repetition]
+    if not repetitions:
+        raise SystemExit(f"The runs of {cell} have no histogram logs")
+    return repetitions, [row["max_rps"] for row in rows]
+
+
+def merged(run, name):
+    """One histogram of every sample of a request name across a run's repetitions and intervals."""
+    histogram = LatencyHistogram()
+    for repetition in run:
+        for block in repetition:
+            if name in block:
+                histogram.merge(block[name])
+    return histogram
+
+
+def block_matrix(run, name):
+    """
+    Bucket values (ms) of a request name in a run, the (blocks, buckets) matrix of its
+    counts per interval block, and the repetition each block belongs to.
+    """
+    blocks = [(i, block[name]) for i, repetition in enumerate(run) for block in repetition if name in block]
+    indexes = sorted(set().union(*(histogram.counts for _, histogram in blocks)))
+    position = {index: column for column, index in enumerate(indexes)}
+    matrix = np.zeros((len(blocks), len(indexes)))
+    for row, (_, histogram) in enumerate(blocks):
+        for index, count in histogram.counts.items():
+            matrix[row, position[index]] = count
+    values = np.array([LatencyHistogram.value_for(index) for index in indexes], dtype=float) / 1000
+    return values, matrix, np.array([repetition for repetition, _ in blocks])
+
+
+def bootstrap_percentiles(run, name, percentiles, resamples, rng):
+    """
+    (resamples, len(percentiles)) array of the percentiles (ms) of a request name in
+    bootstrap resamples of a run: repetitions drawn with replacement (when there are
+    several), then each drawn repetition's interval blocks with replacement.
+    """
+    values, matrix, block_repetitions = block_matrix(run, name)
+    by_repetition = [np.flatnonzero(block_repetitions == r) for r in np.unique(block_repetitions)]
+    few_blocks = any(len(rows) < MIN_BLOCKS for rows in by_repetition)
+    weights = np.zeros((resamples, len(matrix)))
+    for b in range(resamples):
+        drawn = rng.integers(0, len(by_repetition), len(by_repetition)) if len(by_repetition) > 1 else [0]
+        for r in drawn:
+            rows = by_repetition[r]
+            np.add.at(weights[b], rows if few_blocks else rng.choice(rows, len(rows)), 1)
+    counts = weights @ matrix
+    totals = counts.sum(axis=1)
+    if few_blocks:
+        # Too few intervals to resample: resample the requests of the drawn repetitions instead
+        counts = rng.multinomial(totals.astype(np.int64), counts / totals[:, None]).astype(float)
+    cumulative = counts.cumsum(axis=1)
+    result = np.empty((resamples, len(percentiles)))
+    for j, percentile in enumerate(percentiles):
+        thresholds = np.maximum(1, percentile / 100.0 * totals)
+        # The first bucket at which the count reaches the threshold, as value_at_percentile does
+        first = (cumulative < thresholds[:, None]).sum(axis=1)
+        result[:, j] = values[np.minimum(first, len(values) - 1)]
+    return result
+
+
+def mann_whitney(baseline, candidate):
+    """
+    Two-sided p-value of a Mann-Whitney U test between the samples of two histograms,
+    using the normal approximation with tie correction (samples in one bucket are ties).
+    """
+    n1, n2 = baseline.total, candidate.total
+    n = n1 + n2
+    if not n1 or not n2 or n < 3:
+        return 1.0
+    u = 0.0
+    below = 0
+    ties = 0
+    for index in sorted(set(baseline.counts) | set(candidate.counts)):
+        base_count = baseline.counts.get(index, 0)
+        candidate_count = candidate.counts.get(index, 0)
+        u += candidate_count * (below + base_count / 2)
+        below += base_count
+        tied = base_count + candidate_count
+        ties += tied ** 3 - tied
+    variance = n1 * n2 / 12 * ((n + 1) - ties / (n * (n - 1)))
+    if variance <= 0:
+        return 1.0
+    z = (u - n1 * n2 / 2) / math.sqrt(variance)
+    return math.erfc(abs(z) / math.sqrt(2))
+
+
+def permutation_test(baseline, candidate, rng):
+    """
+    Two-sided p-value of the difference of means of two samples: exact over every relabelling
+    while there are at most EXACT_PERMUTATIONS of them, otherwise estimated from
+    PERMUTATION_RESAMPLES random relabellings drawn with rng.
+    """
+    pooled = np.array(baseline + candidate, dtype=float)
+    n, k = len(pooled), len(candidate)
+    observed = abs(np.mean(candidate) - np.mean(baseline))
+    if math.comb(n, k) <= EXACT_PERMUTATIONS:
+        picks = np.array(list(itertools.combinations(range(n), k)))
+        exact = True
+    else:
+        picks = np.argsort(rng.random((PERMUTATION_RESAMPLES, n)), axis=1)[:, :k]
+        exact = False
+    picked_sums = pooled[picks].sum(axis=1)
+    deltas = np.abs(picked_sums / k - (pooled.sum() - picked_sums) / (n - k))
+    extreme = int(np.sum(deltas >= observed - 1e-9))
+    # The observed labelling counts as one of the random ones, so an estimate is never 0
+    return extreme / len(picks) if exact else (extreme + 1) / (len(picks) + 1)
+
+
+def compare_latencies(baseline, candidate, args, rng):
+    """Print the percentile comparison of every endpoint; returns the number of regressions."""
+    baseline_names = {name for repetition in baseline for block in repetition for name in block}
+    candidate_names = {name for repetition in candidate for block in repetition for name in block}
+    names = sorted((baseline_names & candidate_names) - {"Aggregated"}) + ["Aggregated"]
+    if args.aggregate_only:
+        names = ["Aggregated"]
+    level = 100 * (1 - args.alpha)
+    regressions = 0
+
+    for label, run in (("Baseline", baseline), ("Candidate", candidate)):
+        blocks = sum(len(repetition) for repetition in run)
+        unit = "requests" if min(len(repetition) for repetition in run) < MIN_BLOCKS else "intervals"
+        resampled = f"repetitions and {unit}" if len(run) > 1 else unit
+        print(f"  {label}: {len(run)} repetition(s), {blocks} intervals; bootstrap resamples {resampled}")
+    if len(baseline) < 2 or len(candidate) < 2:
+        print("  (one repetition: the intervals show noise within the run, not how much a rerun would differ)")
+    print(f"  {'Endpoint / percentile':40s} {'Baseline':>9s} {'Candidate':>9s} {'Delta':>8s} {f'{level:.0f}% CI':>19s} {'p':>6s}")
+    for name in names:
+        base, cand = merged(baseline, name), merged(candidate, name)
+        judged = min(base.total, cand.total) >= args.min_requests
+        note = "" if judged else f", not judged (< {args.min_requests} requests)"
+        print(f"  {name}: {base.total} vs {cand.total} requests, shift p={mann_whitney(base, cand):.3g}{note}")
+        base_samples = bootstrap_percentiles(baseline, name, args.percentiles, args.resamples, rng)
+        cand_samples = bootstrap_percentiles(candidate, name, args.percentiles, args.resamples, rng)
+        for j, percentile in enumerate(args.percentiles):
+            base_value = base.value_at_percentile(percentile) / 1000
+            cand_value = cand.value_at_percentile(percentile) / 1000
+            deltas = (cand_samples[:, j] - base_samples[:, j]) / max(base_value, 1e-3) * 100
+            low, high = np.percentile(deltas, [args.alpha / 2 * 100, (1 - args.alpha / 2) * 100])
+            p = min(1.0, 2 * min((deltas <= 0).mean(), (deltas >= 0).mean()))
+            delta = (cand_value - base_value) / max(base_value, 1e-3) * 100
+            regressed = judged and delta > args.max_increase and low > 0
+            regressions += regressed
+            label = f"p{percentile:g}"
+            print(
+                f"    {label:38s} {base_value:9.1f} {cand_value:9.1f} {delta:+7.1f}% "
+                f"{f'[{low:+.1f}, {high:+.1f}]%':>19s} {p:6.3f}{'  REGRESSION' if regressed else ''}"
+            )
+    return regressions
+
+
+def compare_throughput(baseline_rps, candidate_rps, args, rng):
+    """Print the max RPS comparison of two store cells; returns 1 if it regressed, else 0."""
+    if not baseline_rps or not candidate_rps or min(len(baseline_rps), len(candidate_rps)) < 2:
+        return 0
+    base_mean = sum(baseline_rps) / len(baseline_rps)
+    cand_mean = sum(candidate_rps) / len(candidate_rps)
+    delta = (cand_mean - base_mean) / max(base_mean, 1e-9) * 100
+    p = permutation_test(baseline_rps, candidate_rps, rng)
+    regressed = -delta > args.max_rps_decrease and p < args.alpha
+    print(
+        f"  Max RPS: {base_mean:.1f} vs {cand_mean:.1f} ({delta:+.1f}%) over "
+        f"{len(baseline_rps)} and {len(candidate_rps)} repetitions, permutation p={p:.3f}"
+        f"{'  REGRESSION' if regressed else ''}"
+    )
+    if p >= args.alpha and min(len(baseline_rps), len(candidate_rps)) < 4:
+        print(f"    (with this few repetitions the smallest attainable p is {1 / math.comb(len(baseline_rps) + len(candidate_rps), len(candidate_rps)) * 2:.3f})")
+    return int(regressed)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("baseline", help="Histogram log glob, or with --store a CONFIG:VARIANT[:SHAPE] cell")
+    parser.add_argument("candidates", nargs="+", help="Runs to compare against the baseline, in the same form")
+    parser.add_argument("--store", help="run_matrix.py result store the runs are cells of")
+    parser.add_argument("--matrix", help="With --store, the matrix the cells belong to (needed if it holds several)")
+    parser.add_argument("--percentiles", type=float, nargs="+", default=[50, 95, 99], help="Percentiles to compare")
+    parser.add_argument("--max-increase", type=float, default=10, help="Percent a percentile may grow before it regresses")
+    parser.add_argument("--max-rps-decrease", type=float, default=10, help="Percent max RPS may drop before it regresses")
+    parser.add_argument("--alpha", type=float, default=0.05, help="Significance level (confidence intervals are 1 - alpha)")
+    parser.add_argument("--resamples", type=int, default=1000, help="Bootstrap resamples per run and endpoint")
+    parser.add_argument("--min-requests", type=int, default=100, help="Requests an endpoint needs in both runs to be judged")
+    parser.add_argument("--aggregate-only", action="store_true", help="Only compare all requests together")
+    parser.add_argument("--seed", type=int, default=0, help="Bootstrap and permutation seed, so a comparison is reproducible")
+    args = parser.parse_args()
+
+    if args.store:
+        store = open_store(args.store)
+        matrix_name = store_matrix(store, args.matrix)
+        load = lambda run: load_store_run(store, matrix_name, run)
+    else:
+        load = load_histogram_run
+    rng = np.random.default_rng(args.seed)
+    baseline_run, baseline_rps = load(args.baseline)
+
+    regressions = 0
+    for candidate in args.candidates:
+        candidate_run, candidate_rps = load(candidate)
+        print("=" * 100)
+        print(f"{candidate} vs {args.baseline}")
+        print("-" * 100)
+        regressions += compare_latencies(baseline_run, candidate_run, args, rng)
+        regressions += compare_throughput(baseline_rps, candidate_rps, args, rng)
+    print("=" * 100)
+    if regressions:
+        print(f"FAIL: {regressions} regression(s) beyond the thresholds")
+        sys.exit(1)
+    print("PASS: no significant regression beyond the thresholds")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+"""
+Self-monitoring of the load generator. A locust process whose CPU is saturated or whose
+gevent loop lags starts requests late and times them late, so its reported latencies
+include its own queuing. GeneratorStats keeps the loop lag, CPU and greenlet samples the
+locustfile takes every --monitor-interval seconds, times pure client code per persona,
+and decides per process whether the generator rather than the backend limited the run.
+"""
+
+import functools
+import logging
+import threading
+import time
+
+from latency_histogram import LatencyHistogram
+
+
+class GeneratorStats:
+    """
+    Self-monitoring samples of one locust process: gevent loop lag, CPU and greenlets,
+    plus time spent in pure client code per persona.
+    """
+    SATURATED_FRACTION = 0.1  # Share of saturated CPU samples that makes a process generator-bound
+
+    def __init__(self):
+        self.cpu_limit = 90.0
+        self.lag_limit_ms = 50.0
+        self.samples = 0
+        self.cpu_total = 0.0
+        self.cpu_max = 0.0
+        self.cpu_saturated = 0
+        self.lag = LatencyHistogram()
+        self.user_greenlets_max = 0
+        self.active_watchers_max = 0
+        self.client_code = {}  # "Persona.function" -> {"calls", "seconds", "max_ms"}
+        self.lock = threading.Lock()
+
+    def record_sample(self, lag_ms, cpu_percent, user_greenlets, active_watchers):
+        with self.lock:
+            self.samples += 1
+            self.cpu_total += cpu_percent
+            self.cpu_max = max(self.cpu_max, cpu_percent)
+            self.cpu_saturated += cpu_percent >= self.cpu_limit
+            self.lag.record(lag_ms * 1000)
+            self.user_greenlets_max = max(self.user_greenlets_max, user_greenlets)
+            self.active_watchers_max = max(self.active_watchers_max, active_watchers)
+
+    def record_client_code(self, section, seconds):
+        with self.lock:
+            totals = self.client_code.setdefault(section, {"calls": 0, "seconds": 0.0, "max_ms": 0.0})
+            totals["calls"] += 1
+            totals["seconds"] += seconds
+            totals["max_ms"] = max(totals["max_ms"], seconds * 1000)
+
+    def client_code_timer(self, method):
+        """Decorator timing a ChatBackend helper that only runs client code (no requests), per persona."""
+        @functools.wraps(method)
+        def timed(user, *args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return method(user, *args, **kwargs)
+            finally:
+                self.record_client_code(f"{type(user).__name__}.{method.__name__}", time.perf_counter() - started)
+        return timed
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                "cpu_limit": self.cpu_limit,
+                "lag_limit_ms": self.lag_limit_ms,
+                "samples": self.samples,
+                "cpu_total": self.cpu_total,
+                "cpu_max": self.cpu_max,
+                "cpu_saturated": self.cpu_saturated,
+                "lag": self.lag.encode(),
+                "user_greenlets_max": self.user_greenlets_max,
+                "active_watchers_max": self.active_watchers_max,
+                "client_code": {section: dict(totals) for section, totals in self.client_code.items()},
+            }
+
+    @classmethod
+    def verdict(cls, snapshot):
+        """Summary of one process's snapshot, with whether it was the bottleneck of the run."""
+        samples = snapshot["samples"] or 1
+        lag = LatencyHistogram.decode(snapshot["lag"])
+        lag_p95_ms = lag.value_at_percentile(95) / 1000
+        saturated_fraction = snapshot["cpu_saturated"] / samples
+        reasons = []
+        if saturated_fraction > cls.SATURATED_FRACTION:
+            reasons.append(f"CPU >= {snapshot['cpu_limit']:.0f}% in {saturated_fraction:.0%} of samples")
+        if lag_p95_ms > snapshot["lag_limit_ms"]:
+            reasons.append(f"loop lag p95 {lag_p95_ms:.0f}ms > {snapshot['lag_limit_ms']:.0f}ms")
+        return {
+            "samples": snapshot["samples"],
+            "cpu_mean": round(snapshot["cpu_total"] / samples, 1),
+            "cpu_max": snapshot["cpu_max"],
+            "cpu_saturated_fraction": round(saturated_fraction, 3),
+            "loop_lag_p95_ms": lag_p95_ms,
+            "loop_lag_max_ms": lag.value_at_percentile(100) / 1000,
+            "user_greenlets_max": snapshot["user_greenlets_max"],
+            "active_watchers_max": snapshot["active_watchers_max"],
+            "generator_bound": bool(reasons),
+            "reasons": reasons,
+        }
+
+    @classmethod
+    def report(cls, snapshots):
+        """Per-process verdicts, client code totals across processes, and whether any process was generator-bound."""
+        processes = [cls.verdict(snapshot) for snapshot in snapshots if snapshot["samples"]]
+        client_code = {}
+        for snapshot in snapshots:
+            for section, totals in snapshot["client_code"].items():
+                target = client_code.setdefault(section, {"calls": 0, "seconds": 0.0, "max_ms": 0.0})
+                target["calls"] += totals["calls"]
+                target["seconds"] += totals["seconds"]
+                target["max_ms"] = max(target["max_ms"], totals["max_ms"])
+        return {
+            "generator_bound": any(process["generator_bound"] for process in processes),
+            "processes": processes,
+            "client_code": client_code,
+        }
+
+    @classmethod
+    def log_summary(cls, snapshots):
+        """Log each process's load and warn when the generator, not the backend, limited the run."""
+        report = cls.report(snapshots)
+        for index, process in enumerate(report["processes"]):
+            logging.info(
+                f"Generator process {index}: CPU mean {process['cpu_mean']:.0f}% max {process['cpu_max']:.0f}%, "
+                f"loop lag p95 {process['loop_lag_p95_ms']:.1f}ms max {process['loop_lag_max_ms']:.1f}ms, "
+                f"{process['user_greenlets_max']} user greenlets, {process['active_watchers_max']} active watchers"
+            )
+            if process["generator_bound"]:
+                logging.warning(
+                    f"Generator process {index} was the bottleneck ({'; '.join(process['reasons'])}): "
+                    "its latencies include client-side queuing. Add workers or lower the user count."
+                )
+        for section, totals in sorted(report["client_code"].items(), key=lambda item: -item[1]["seconds"]):
+            logging.info(
+                f"Client code {section}: {totals['calls']} calls, {totals['seconds']:.2f}s total, "
+                f"{totals['seconds'] / totals['calls'] * 1e6:.0f}us mean, {totals['max_ms']:.1f}ms max"
+            )
@@ -0,0 +1,131 @@
+"""
+Scheduling and bookkeeping of --idle-mode multiplexed, where one IdleSwarm per process
+drives thousands of idle polling clients stored as rows of typed array columns.
+
+Rows due for a poll wait in a TimingWheel of tick-second buckets, which the swarm's
+scheduler drains oldest tick first as its poll pool has room. A client's cursors are
+kept as float epoch seconds, converted from and back to the server's ISO 8601 timestamps
+by parse_cursor and format_cursor. IdleSwarmStats reports the clients' state bytes and
+how late their polls start.
+"""
+
+import logging
+import threading
+import time
+from array import array
+from datetime import datetime, timezone
+
+from latency_histogram import LatencyHistogram
+
+
+class TimingWheel:
+    """
+    Rows bucketed by the tick (tick seconds long) their next poll is due in. take_due hands
+    out the rows of ticks whose time has come, oldest tick first and at most room at a time;
+    rows beyond room stay in their bucket with their original due time.
+    """
+    def __init__(self, tick):
+        self.tick = tick
+        self.buckets = {}  # tick number -> array of rows due in it
+        self.next_tick = int(time.monotonic() / tick)  # First tick whose time has not come yet
+        self.oldest_tick = self.next_tick  # First tick that may still hold rows not handed out
+
+    def schedule(self, row, due):
+        # Never into a tick that has already come, whose rows may have been handed out
+        tick = max(int(due / self.tick), self.next_tick)
+        bucket = self.buckets.get(tick)
+        if bucket is None:
+            bucket = self.buckets[tick] = array("l")
+        bucket.append(row)
+
+    def turn(self, now):
+        """Let every tick that has started by now come due."""
+        self.next_tick = int(now / self.tick) + 1
+
+    def next_tick_time(self):
+        """time.monotonic() at which the next tick comes due."""
+        return self.next_tick * self.tick
+
+    def take_due(self, room):
+        """Up to room rows of the oldest due tick and that tick's start time, or no rows when none is due."""
+        while self.oldest_tick < self.next_tick:
+            tick = self.oldest_tick
+            bucket = self.buckets.get(tick, ())
+            rows = bucket[:room]
+            if len(bucket) > room:
+                del bucket[:room]
+            else:
+                self.buckets.pop(tick, None)
+                self.oldest_tick += 1
+            if rows:
+                return rows, tick * self.tick
+        return (), None
+
+    def state_bytes(self):
+        return sum(bucket.itemsize * len(bucket) for bucket in self.buckets.values())
+
+
+def parse_cursor(timestamp):
+    """Epoch seconds of an ISO 8601 UTC server timestamp, for IdleSwarm's float cursor columns."""
+    return datetime.fromisoformat(timestamp.replace("Z", "+00:00")).timestamp()
+
+
+def format_cursor(seconds):
+    """The ISO 8601 UTC form of a cursor, with milliseconds only when it has any (as the backend sends them)."""
+    timespec = "milliseconds" if seconds % 1 else "seconds"
+    return datetime.fromtimestamp(seconds, timezone.utc).isoformat(timespec=timespec).replace("+00:00", "Z")
+
+
+class IdleSwarmStats:
+    """
+    Multiplexed idle clients of this process: their count, the bytes of their state and how
+    late their polls start. A p99 lag above the median think time means the clients poll
+    markedly less often than configured, so the summary warns about it.
+    """
+    def __init__(self):
+        self.clients = 0
+        self.state_bytes = 0
+        self.think_time = 0.0  # Median seconds between a client's polls
+        self.lag = LatencyHistogram()  # Poll start behind its scheduled time
+        self.lock = threading.Lock()
+
+    def update(self, clients, state_bytes, think_time):
+        with self.lock:
+            self.clients = clients
+            self.state_bytes = state_bytes
+            self.think_time = think_time
+
+    def record_lag(self, seconds):
+        with self.lock:
+            self.lag.record(max(seconds, 0) * 1e6)
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                "clients": self.clients, "state_bytes": self.state_bytes,
+                "think_time": self.think_time, "lag": self.lag.encode(),
+            }
+
+    @classmethod
+    def log_summary(cls, snapshots):
+        """Log clients and state bytes summed across workers, and the merged dispatch lag against the think time."""
+        clients = sum(snapshot["clients"] for snapshot in snapshots)
+        if not clients:
+            return
+        state_bytes = sum(snapshot["state_bytes"] for snapshot in snapshots)
+        lag = LatencyHistogram()
+        for snapshot in snapshots:
+            lag.merge(LatencyHistogram.decode(snapshot["lag"]))
+        logging.info(
+            f"IdleSwarm: {clients} multiplexed idle clients, {state_bytes / clients:.1f} bytes of state per client, "
+            f"poll dispatch lag p50 {lag.value_at_percentile(50) / 1000:.1f} ms, "
+            f"p99 {lag.value_at_percentile(99) / 1000:.1f} ms, max {lag.value_at_percentile(100) / 1000:.1f} ms"
+        )
+        think_time = max(snapshot["think_time"] for snapshot in snapshots)
+        lag_p99 = lag.value_at_percentile(99) / 1e6
+        if think_time and lag_p99 > think_time:
+            logging.warning(
+                f"IdleSwarm poll dispatch lag p99 {lag_p99:.1f}s exceeds the {think_time:g}s median think time, "
+                f"so idle clients polled less often than configured; raise --idle-concurrency, add workers "
+                f"or check the backend's capacity"
+            )
@@ -0,0 +1,128 @@
+"""
+Latencies of the background jobs behind a conversation's first message (--job-probe).
+
+POST /messages returns once AssignExpertJob, AutoRespondToQuestionJob and
+GenerateConversationSummaryJob are enqueued, so its own latency hides how long they
+take. The locustfile's probes poll the update feeds until the conversation shows an
+assigned expert and an expert reply, and JobPipelineStats keeps those two latencies per
+question category and per run minute.
+"""
+
+import logging
+import threading
+import time
+
+from latency_histogram import LatencyHistogram
+
+
+class JobPipelineStats:
+    """
+    Per question category latencies of the background jobs a first message enqueues, from
+    POST /messages until the polling feeds show the assigned expert and the first expert reply.
+    Also counted per minute of the run, where queue lag building up under load shows.
+    """
+    STAGES = ("assigned", "replied")
+
+    def __init__(self):
+        self.started = time.time()
+        self.categories = {}  # category -> {"probes": n, "cut_off": n, stage: LatencyHistogram of delivered ones}
+        self.windows = {}  # run minute -> {"probes": n, stage: delivered count, f"{stage}_max_ms": slowest}
+        self.lock = threading.Lock()
+
+    def record(self, category, posted_at, stage_ms, cut_off=False):
+        """
+        Record one finished probe; stage_ms maps each stage to its latency, or None if it never
+        showed up. cut_off marks a probe stopped by the end of the test before its timeout.
+        """
+        with self.lock:
+            totals = self.categories.setdefault(category, self.empty_totals())
+            window = self.windows.setdefault(str(int((posted_at - self.started) // 60)), self.empty_window())
+            totals["probes"] += 1
+            totals["cut_off"] += cut_off
+            window["probes"] += 1
+            for stage, latency_ms in stage_ms.items():
+                if latency_ms is not None:
+                    totals[stage].record(latency_ms * 1000)
+                    window[stage] += 1
+                    window[f"{stage}_max_ms"] = max(window[f"{stage}_max_ms"], latency_ms)
+
+    @classmethod
+    def empty_totals(cls):
+        return {"probes": 0, "cut_off": 0, **{s: LatencyHistogram() for s in cls.STAGES}}
+
+    @classmethod
+    def empty_window(cls):
+        return {"probes": 0, **{s: 0 for s in cls.STAGES}, **{f"{s}_max_ms": 0.0 for s in cls.STAGES}}
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                "categories": {
+                    category: {
+                        "probes": totals["probes"],
+                        "cut_off": totals["cut_off"],
+                        **{s: totals[s].encode() for s in self.STAGES},
+                    }
+                    for category, totals in self.categories.items()
+                },
+                "windows": {minute: dict(window) for minute, window in self.windows.items()},
+            }
+
+    @classmethod
+    def merge(cls, snapshots):
+        """Merge snapshots (one per worker in distributed runs); window maxima take the max."""
+        categories = {}
+        windows = {}
+        for snapshot in snapshots:
+            for category, totals in snapshot["categories"].items():
+                target = categories.setdefault(category, cls.empty_totals())
+                target["probes"] += totals["probes"]
+                target["cut_off"] += totals["cut_off"]
+                for stage in cls.STAGES:
+                    target[stage].merge(LatencyHistogram.decode(totals[stage]))
+            for minute, window in snapshot["windows"].items():
+                target = windows.setdefault(int(minute), cls.empty_window())
+                for key, value in window.items():
+                    target[key] = max(target[key], value) if key.endswith("_max_ms") else target[key] + value
+        return categories, windows
+
+    @classmethod
+    def report(cls, snapshots):
+        """
+        Per category: probes and how many the end of the test cut off; per stage how many were
+        delivered and percentiles of the delivered ones.
+        """
+        categories, windows = cls.merge(snapshots)
+        report = {"categories": {}, "minutes": {str(minute): windows[minute] for minute in sorted(windows)}}
+        for category, totals in sorted(categories.items()):
+            report["categories"][category] = {"probes": totals["probes"], "cut_off": totals["cut_off"]}
+            for stage in cls.STAGES:
+                histogram = totals[stage]
+                report["categories"][category][stage] = {
+                    "delivered": histogram.total,
+                    **{f"p{p}_ms": histogram.value_at_percentile(p) / 1000 for p in (50, 95, 99)},
+                    "max_ms": histogram.value_at_percentile(100) / 1000,
+                }
+        return report
+
+    @classmethod
+    def log_summary(cls, snapshots):
+        """Log job latencies per category and stage, then the probes of each run minute."""
+        report = cls.report(snapshots)
+        if not report["categories"]:
+            return
+        logging.info("Job pipeline latency from POST /messages (ms, --job-probe):")
+        for category, totals in report["categories"].items():
+            if totals["cut_off"]:
+                logging.info(f"  {category}: {totals['cut_off']}/{totals['probes']} probes cut off by the end of the test")
+            for stage in cls.STAGES:
+                values = totals[stage]
+                logging.info(
+                    f"  {category} {stage}: {values['delivered']}/{totals['probes']} delivered, p50 {values['p50_ms']:.0f}, "
+                    f"p95 {values['p95_ms']:.0f}, p99 {values['p99_ms']:.0f}, max {values['max_ms']:.0f}"
+                )
+        for minute, window in report["minutes"].items():
+            logging.info(
+                f"  minute {minute}: {window['probes']} probes, "
+                + ", ".join(f"{window[s]} {s} (max {window[f'{s}_max_ms']:.0f}ms)" for s in cls.STAGES)
+            )
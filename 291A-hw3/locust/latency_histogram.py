@@ -0,0 +1,187 @@
+"""
+High-dynamic-range latency histogram with microsecond resolution and bounded memory.
+
+Values are bucketed the way HdrHistogram does it: every power-of-two range is split
+into 1024 linear sub-buckets, which keeps three significant digits of precision from
+1 us up to an hour in at most ~23k counters. Unlike locust's rounded response time
+dict, two histograms merge exactly by adding their counters, so percentiles across
+workers and runs are the percentiles of the combined samples.
+
+Snapshots are zlib-compressed JSON of the non-empty counters, base64-encoded so they
+can travel in worker reports and sit on one line of a JSONL histogram log:
+
+    {"time": 1765521579.2, "source": "worker-3", "histograms": {"GET /expert/queue": "eJy..."}}
+
+The locustfile appends one such line per process every --histogram-interval seconds
+(each line holds only that interval's samples), and visualize_results.py merges them.
+LatencyStats keeps one histogram per request name for the locustfile and logs their
+merged percentiles at the end of a run.
+"""
+
+import base64
+import json
+import logging
+import threading
+import zlib
+
+SUB_BUCKET_BITS = 11  # 2048 sub-buckets per power of two: three significant digits
+SUB_BUCKET_COUNT = 1 << SUB_BUCKET_BITS
+SUB_BUCKET_HALF = SUB_BUCKET_COUNT // 2
+HIGHEST_TRACKABLE_US = 3600 * 1000 * 1000  # Longer latencies are clamped to one hour
+
+
+class LatencyHistogram:
+    """Counts of latencies in microseconds, keyed by HDR bucket index."""
+    def __init__(self, counts=None):
+        self.counts = counts or {}  # bucket index -> count
+        self.total = sum(self.counts.values())
+
+    @staticmethod
+    def index_for(value_us):
+        """Bucket index of a latency: linear below 2048 us, then 1024 sub-buckets per doubling."""
+        value_us = min(max(int(value_us), 0), HIGHEST_TRACKABLE_US)
+        bucket = max(0, value_us.bit_length() - SUB_BUCKET_BITS)
+        sub_bucket = value_us >> bucket
+        return (bucket + 1) * SUB_BUCKET_HALF + sub_bucket - SUB_BUCKET_HALF
+
+    @staticmethod
+    def value_for(index):
+        """Highest latency (us) that falls into a bucket index."""
+        bucket = (index >> (SUB_BUCKET_BITS - 1)) - 1
+        sub_bucket = (index & (SUB_BUCKET_HALF - 1)) + SUB_BUCKET_HALF
+        if bucket < 0:
+            sub_bucket -= SUB_BUCKET_HALF
+            bucket = 0
+        return ((sub_bucket + 1) << bucket) - 1
+
+    def record(self, value_us, count=1):
+        index = self.index_for(value_us)
+        self.counts[index] = self.counts.get(index, 0) + count
+        self.total += count
+
+    def merge(self, other):
+        """Add another histogram's samples to this one."""
+        for index, count in other.counts.items():
+            self.counts[index] = self.counts.get(index, 0) + count
+        self.total += other.total
+        return self
+
+    def subtract(self, other):
+        """Histogram of the samples recorded since other was copied from this one."""
+        counts = {}
+        for index, count in self.counts.items():
+            remaining = count - other.counts.get(index, 0)
+            if remaining:
+                counts[index] = remaining
+        return LatencyHistogram(counts)
+
+    def copy(self):
+        return LatencyHistogram(dict(self.counts))
+
+    def value_at_percentile(self, percentile):
+        """Latency (us) at or below which the given percentile (0-100) of samples fall."""
+        if not self.total:
+            return 0
+        threshold = max(1, percentile / 100.0 * self.total)
+        seen = 0
+        for index in sorted(self.counts):
+            seen += self.counts[index]
+            if seen >= threshold:
+                return self.value_for(index)
+        return self.value_for(max(self.counts))
+
+    def mean(self):
+        if not self.total:
+            return 0.0
+        return sum(self.value_for(index) * count for index, count in self.counts.items()) / self.total
+
+    def encode(self):
+        """Compressed, base64-encoded snapshot of the non-empty buckets."""
+        payload = json.dumps(sorted(self.counts.items()), separators=(",", ":")).encode()
+        return base64.b64encode(zlib.compress(payload)).decode("ascii")
+
+    @classmethod
+    def decode(cls, snapshot):
+        pairs = json.loads(zlib.decompress(base64.b64decode(snapshot)))
+        return cls({index: count for index, count in pairs})
+
+
+def read_histogram_log(path):
+    """Yield (time, source, name, LatencyHistogram) for every entry of a JSONL histogram log, one line at a time."""
+    with open(path) as f:
+        for line in f:
+            if not line.strip():
+                continue
+            entry = json.loads(line)
+            for name, snapshot in entry["histograms"].items():
+                yield entry["time"], entry["source"], name, LatencyHistogram.decode(snapshot)
+
+
+def merge_histogram_logs(paths):
+    """Merge every interval of every log into one histogram per request name."""
+    merged = {}
+    for path in paths:
+        for _, _, name, histogram in read_histogram_log(path):
+            merged.setdefault(name, LatencyHistogram()).merge(histogram)
+    return merged
+
+
+def aggregate(histograms):
+    """One histogram holding the samples of all request names."""
+    total = LatencyHistogram()
+    for histogram in histograms.values():
+        total.merge(histogram)
+    return total
+
+
+class LatencyStats:
+    """Per request HDR latency histograms of every request the personas make."""
+    def __init__(self):
+        self.histograms = {}  # "METHOD name" -> LatencyHistogram
+        self.logged = {}  # "METHOD name" -> copy of the histogram at the last histogram log snapshot
+        self.lock = threading.Lock()
+
+    def record(self, name, response_time_ms):
+        with self.lock:
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = self.histograms[name] = LatencyHistogram()
+            histogram.record(response_time_ms * 1000)
+
+    def snapshot(self):
+        with self.lock:
+            return {name: histogram.encode() for name, histogram in self.histograms.items()}
+
+    def interval_snapshot(self):
+        """Encoded histograms of only the samples recorded since the previous call."""
+        with self.lock:
+            snapshot = {}
+            for name, histogram in self.histograms.items():
+                interval = histogram.subtract(self.logged.get(name, LatencyHistogram()))
+                if interval.total:
+                    snapshot[name] = interval.encode()
+                self.logged[name] = histogram.copy()
+            return snapshot
+
+    @staticmethod
+    def merge(snapshots):
+        """Decode and add up snapshots (one per worker in distributed runs) name by name."""
+        merged = {}
+        for snapshot in snapshots:
+            for name, encoded in snapshot.items():
+                merged.setdefault(name, LatencyHistogram()).merge(LatencyHistogram.decode(encoded))
+        return merged
+
+    @classmethod
+    def log_summary(cls, snapshots):
+        """Log exact merged percentiles per request and for all requests together."""
+        merged = cls.merge(snapshots)
+        if not merged:
+            return
+        logging.info("HDR latency percentiles (ms):")
+        rows = sorted(merged.items()) + [("Aggregated", aggregate(merged))]
+        for name, histogram in rows:
+            p50, p95, p99, p999 = (histogram.value_at_percentile(p) / 1000 for p in (50, 95, 99, 99.9))
+            logging.info(
+                f"  {name}: {histogram.total} requests, p50 {p50:.1f}, p95 {p95:.1f}, p99 {p99:.1f}, p99.9 {p999:.1f}"
+            )
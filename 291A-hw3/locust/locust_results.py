@@ -0,0 +1,188 @@
+"""
+Readers for the files a locust run leaves behind with --csv, shared by
+visualize_results.py and run_matrix.py.
+
+Files are streamed row by row, so multi-hour histories with many endpoints never
+need to fit in memory.
+"""
+
+import csv
+import json
+import os
+
+
+def csv_prefix(path):
+    """Strip a locust CSV file suffix so either the --csv prefix or a file path can be passed."""
+    for suffix in ("_stats_history.csv", "_stats.csv"):
+        if path.endswith(suffix):
+            return path[:-len(suffix)]
+    return path
+
+
+def parse_number(value):
+    """Parse a locust CSV cell, returning None for empty or N/A cells."""
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def read_stats_history(path, p95_limit, failure_limit):
+    """
+    Stream a locust _stats_history.csv and return [max_rps, p50_ms, p95_ms, num_users].
+
+    Only the Aggregated rows are looked at, and only the current row, the peak row
+    and the breaking point row are kept while reading.
+    """
+    max_rps = 0.0
+    peak = None
+    breaking_point = None
+    with open(path, newline="") as f:
+        for row in csv.DictReader(f):
+            if row["Name"] != "Aggregated":
+                continue
+            rps = parse_number(row["Requests/s"]) or 0.0
+            p50 = parse_number(row["50%"])
+            p95 = parse_number(row["95%"])
+            if rps <= 0 or p50 is None or p95 is None:
+                continue  # Ramp-up rows before the first requests complete
+            sample = [rps, p50, p95, parse_number(row["User Count"]) or 0]
+            if rps > max_rps:
+                max_rps = rps
+                peak = sample
+            failure_ratio = (parse_number(row["Failures/s"]) or 0.0) / rps
+            if breaking_point is None and (p95 > p95_limit or failure_ratio > failure_limit):
+                breaking_point = sample
+    knee = breaking_point or peak
+    if knee is None:
+        return [0.0, 0, 0, 0]
+    return [max_rps, knee[1], knee[2], knee[3]]
+
+
+def read_stats(path):
+    """Stream a locust _stats.csv and return [rps, p50_ms, p95_ms, 0] from its Aggregated row."""
+    with open(path, newline="") as f:
+        for row in csv.DictReader(f):
+            if row["Name"] == "Aggregated":
+                return [
+                    parse_number(row["Requests/s"]) or 0.0,
+                    parse_number(row["50%"]) or 0,
+                    parse_number(row["95%"]) or 0,
+                    0,
+                ]
+    return [0.0, 0, 0, 0]
+
+
+def generator_bound(prefix):
+    """Reasons the locustfile's self-monitoring gave for the generator limiting this run; empty if it did not."""
+    path = f"{prefix}_generator.json"
+    if not os.path.exists(path):
+        return []
+    with open(path) as f:
+        report = json.load(f)
+    return [reason for process in report["processes"] for reason in process["reasons"]]
+
+
+def read_request_counts(path):
+    """Stream a locust _stats.csv and return (request_count, failure_count) from its Aggregated row."""
+    with open(path, newline="") as f:
+        for row in csv.DictReader(f):
+            if row["Name"] == "Aggregated":
+                return int(row["Request Count"]), int(row["Failure Count"])
+    return 0, 0
+
+
+def history_time_span(path):
+    """(first, last) Timestamp of a _stats_history.csv, reading only its first rows and its tail."""
+    first = None
+    with open(path, newline="") as f:
+        for row in csv.DictReader(f):
+            first = int(row["Timestamp"])
+            break
+    if first is None:
+        return None, None
+    with open(path, "rb") as f:
+        f.seek(0, os.SEEK_END)
+        f.seek(max(0, f.tell() - 64 * 1024))
+        lines = f.read().decode(errors="replace").splitlines()
+    for line in reversed(lines):
+        timestamp = line.split(",", 1)[0]
+        if timestamp.isdigit():
+            return first, int(timestamp)
+    return first, first
+
+
+def series_name(row):
+    """Name of a history row: "Aggregated", or "METHOD name" as the locustfile's HDR stats call endpoints."""
+    return row["Name"] if row["Name"] == "Aggregated" else f"{row['Type']} {row['Name']}"
+
+
+HISTORY_PERCENTILES = {"p50": "50%", "p95": "95%", "p99": "99%"}
+
+
+def read_history_series(path, names=None, max_points=600):
+    """
+    Stream a locust _stats_history.csv into downsampled time series.
+
+    Returns {series name: {"time": [...], "rps": [...], "failure_ratio": [...], "users": [...],
+    "p50": [...], "p95": [...], "p99": [...]}} for the Aggregated row and every endpoint
+    (endpoints need locust --csv-full-history), or only for names when given. Time is in
+    seconds from the first row. Rows are folded into at most max_points buckets per series:
+    RPS is averaged, failures are summed against requests, users and percentiles keep
+    the bucket maximum so short spikes stay visible. Only the open bucket of each series
+    is held while reading.
+    """
+    first, last = history_time_span(path)
+    if first is None:
+        return {}
+    bucket_seconds = max(1, (last - first) / max_points)
+    series = {}
+    open_buckets = {}  # name -> (bucket number, accumulator)
+
+    def flush(name, bucket, acc):
+        values = series.setdefault(name, {key: [] for key in ("time", "rps", "failure_ratio", "users", *HISTORY_PERCENTILES)})
+        values["time"].append(bucket * bucket_seconds)
+        values["rps"].append(acc["rps"] / acc["rows"])
+        values["failure_ratio"].append(acc["failures"] / acc["rps"] if acc["rps"] else 0.0)
+        values["users"].append(acc["users"])
+        for key in HISTORY_PERCENTILES:
+            values[key].append(acc[key])
+
+    with open(path, newline="") as f:
+        for row in csv.DictReader(f):
+            name = series_name(row)
+            if names is not None and name not in names:
+                continue
+            bucket = int((int(row["Timestamp"]) - first) / bucket_seconds)
+            current = open_buckets.get(name)
+            if current is None or current[0] != bucket:
+                if current is not None:
+                    flush(name, *current)
+                current = open_buckets[name] = (bucket, {"rows": 0, "rps": 0.0, "failures": 0.0, "users": 0})
+            acc = current[1]
+            acc["rows"] += 1
+            acc["rps"] += parse_number(row["Requests/s"]) or 0.0
+            acc["failures"] += parse_number(row["Failures/s"]) or 0.0
+            acc["users"] = max(acc["users"], parse_number(row["User Count"]) or 0)
+            for key, column in HISTORY_PERCENTILES.items():
+                value = parse_number(row[column])
+                if value is not None:
+                    acc[key] = max(acc.get(key) or 0, value)
+                else:
+                    acc.setdefault(key, None)
+    for name, current in open_buckets.items():
+        flush(name, *current)
+    return series
+
+
+def read_stage_log(prefix, start):
+    """
+    (seconds from start, label) of every load shape stage in {prefix}_stages.json and every
+    traffic profile switch in {prefix}_profiles.json, in time order; empty if there are none.
+    """
+    stages = []
+    for path in (f"{prefix}_stages.json", f"{prefix}_profiles.json"):
+        if os.path.exists(path):
+            with open(path) as f:
+                stages.extend(json.load(f)["stages"])
+    return sorted((stage["time"] - start, stage["label"]) for stage in stages)
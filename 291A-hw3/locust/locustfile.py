@@ -8,16 +8,72 @@ User personas:
     4. ExpertUser - Claims and responds to conversations (weight=2, ~20% of users)
 
 Load test uses dynamic arrival rate that doubles every 60 seconds to find breaking point.
+
+The options and the scripts around this file are described in README.md.
 """
 
+import json
+import logging
+import math
+import os
 import random
-import threading
-from datetime import datetime
-from locust import HttpUser, task, between, LoadTestShape
+import re
+import socket
+import ssl
+import sys
+import time
+import zlib
+from array import array
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+import gevent
+import psutil
+from gevent.pool import Group, Pool
+from gevent.queue import JoinableQueue
+from locust import __version__ as LOCUST_VERSION, HttpUser, task, between, constant, events, LoadTestShape
+from locust.clients import HttpSession
+from locust.contrib.fasthttp import FastHttpSession, FastHttpUser
+from locust.runners import MasterRunner, WorkerRunner
+import requests  # After locust: its gevent monkey-patching must come before urllib3 imports ssl
+from urllib3 import PoolManager
+from arrivals import ArrivalSchedule, ArrivalStats
+from claims import ClaimStats
+from client_cache import ClientCache, ClientCacheStats
+from generator_monitor import GeneratorStats
+from idle_swarm import IdleSwarmStats, TimingWheel, format_cursor, parse_cursor
+from job_pipeline import JobPipelineStats
+from latency_histogram import LatencyStats
+from payloads import PAYLOAD_DISTRIBUTIONS, PayloadGenerator
+from persona_profile import PersonaProfile, Profile, ThinkTime, read_profile
+from questions import QUESTION_CATEGORY_BY_TITLE, QUESTION_CATEGORY_WEIGHTS, QUESTION_POOL, QuestionMix
+from seed_conversations import ConversationSizeStats
+from trace_replay import TRACE_FORMATS, ReplayStats, read_trace
+from updates import NO_CURSOR, UPDATE_CURSOR_FIELDS, UPDATE_FEEDS, PollStats, PushStats, advance_cursor
+from user_store import UserNameGenerator, UserStore
+from workflow_trace import TraceStats, WorkflowTrace
+
+try:
+    from workload_plan import WorkloadPlan
+except ImportError:  # numpy is only needed for --workload-seed
+    WorkloadPlan = None
 
 
 # Configuration
-MAX_USERS = 10000
+MAX_USERS = int(os.environ.get("LOCUST_MAX_USERS", "10000"))
+HTTP_CLIENT_MODES = ["requests", "fast"]
+LOAD_SHAPES = ["step", "adaptive", "none"]
+POLLING_MODES = ["clock", "cursor"]
+IDLE_TRANSPORTS = ["poll", "sse", "long-poll"]
+IDLE_MODES = ["users", "multiplexed"]
+ARRIVAL_DISTRIBUTIONS = ["poisson", "fixed"]
+SCENARIOS = ["personas", "claim-contention"]
+MESSAGE_SIZES = ["sample"] + PAYLOAD_DISTRIBUTIONS
+HTTP_POOL_SIZE = int(os.environ.get("LOCUST_HTTP_POOL_SIZE", "500"))
+# Locust releases whose UsersDispatcher._user_gen rebuild_user_generator was tested against (requirements.txt pins it)
+LOCUST_DISPATCHER_VERSIONS = ("2.46.",)
 
 # Expert bio to knowledge base URL mapping
 EXPERT_BIOS = {
@@ -99,156 +155,6 @@ EXPERT_BIOS = {
     }
 }
 
-# Questions that can be auto-answered (FAQ exists) - 33%
-FAQ_ANSWERABLE_QUESTIONS = {
-    # Gaming
-    "What games do you recommend for competitive play?": "I mainly play League of Legends and Brawl Stars competitively, but I enjoy ranked ladders more for learning than pure competition. What aspect of competitive gaming interests you most?",
-    "How do you balance gaming with other activities?": "I use time-boxed sessions and prioritize fitness and sleep. Playing socially also helps keep the hobby balanced. What's your current struggle with balance?",
-    "What's your take on mobile gaming?": "I enjoy Brawl Stars and Clash Royale on mobile. They're great for quick sessions and have surprisingly deep gameplay. Are you looking for mobile game recommendations?",
-    
-    # Board Games
-    "What board game should I start with?": "For exploring modern board games, I'd recommend Irish Gauge (a train game) or Race for the Galaxy (space-age card game). Both are accessible yet strategic. What's your experience level?",
-    "Where can I buy board games affordably?": "I strongly recommend Facebook marketplace - you can get games for 20-80% off! Amazon works for new games, or find a local board game store. What games are you looking for?",
-    "What's a good 2-player board game?": "I love 7 Wonders Duel - it's a 20-minute card drafting game that's easy to learn but has great depth. I've even played it with my parents! What kind of games do you enjoy?",
-    "Can you recommend games for large groups?": "For larger groups with mixed skill levels, I'd suggest Liars Dice or Wizard - both are inclusive and fun! How many players are you planning for?",
-    
-    # Coffee
-    "What's the difference between Arabica and Robusta?": "Arabica beans have a sweeter, softer taste with fruit and berry tones. Robusta is stronger and harsher with grain-like overtones. Which flavor profile appeals to you?",
-    "How should I store coffee beans?": "Store them in an airtight container at room temperature, away from heat, light, and moisture. Never refrigerate! How long do your beans typically last?",
-    "What's the ideal water temperature for brewing?": "The ideal temperature is between 195°F and 205°F (90°C-96°C). Too hot burns the coffee, too cold under-extracts it. What brewing method do you use?",
-    "What's the difference between latte and cappuccino?": "A cappuccino has equal parts espresso, steamed milk, and foam. A latte has more steamed milk and just a light layer of foam. Which do you prefer?",
-    
-    # Ergonomic Keyboards
-    "Why should I use an ergonomic keyboard?": "They reduce strain and improve comfort, especially if you have typing issues. I switched because of bad spacebar habits. What discomfort are you experiencing?",
-    "What keyboard do you use daily?": "I use a ZSA Moonlander MK1 with split, tenting, and ortholinear design. It has thumb clusters which are game-changing. What features interest you most?",
-    "What's an ortholinear layout?": "Keys arranged in a grid pattern instead of staggered rows. It minimizes wrist movement and increases efficiency. The learning curve is steep but worth it. Ready to try something new?",
-    "What keyboard should I get as my endgame?": "I'm eyeing either a minimal Corne or a custom 3D printed Dactyl Manuform. Both offer different philosophies of ergonomics. What's your priority - portability or ultimate comfort?",
-    
-    # Cars
-    "What's your dream car?": "My realistic dream is the upcoming Toyota Supra MK6 - reliable, stylish, and not too expensive. Unrealistically, an RWB Porsche 911 widebody. What's yours?",
-    "Is the Supra MK5 a real Toyota?": "No, it's basically a BMW. That's why I'm waiting for the MK6 which should be more Toyota. Are you considering buying one?",
-    "Should I get hybrid or electric?": "Hybrids are better now - better reliability, efficiency, and range. I'd only consider electric when solid-state batteries are mainstream. What's your use case?",
-    "What car do you currently drive?": "I drive a Toyota RAV4 2017 - most comfortable and reliable car ever. It's practical and dependable. What are you looking for in a car?",
-    
-    # Japan Travel
-    "What's the best season to visit Japan?": "Spring! Cherry blossoms bloom late March to early April, and the temperature is perfect. Book early though, it's popular. When are you planning to go?",
-    "Can you recommend a hidden gem in Japan?": "Rokko mountain in Kobe, Hyogo - one hostel, gondola access only, remote but developed enough. It's magical for solo travelers. Are you planning a solo trip?",
-    "What's your favorite Japanese city?": "Kyoto! Perfect blend of traditional and modern. Pro tip: book an Airbnb near Fushimi Inari and visit at night to avoid crowds. Have you been before?",
-    "Where should I go to avoid tourists?": "Visit less popular prefectures for authentic experiences. The current tourism boom makes hidden areas even more special. What kind of experience are you looking for?",
-    
-    # Pop Mart
-    "What is Pop Mart?": "Pop Mart creates collectible art toys sold in blind boxes - you don't know which figure you get until opening! It's exciting and addictive. Ever collected anything?",
-    "Why is Labubu so popular?": "Labubu from the Monsters series by Kasing Lung has a unique design - mischievous monster with rabbit ears. The character just resonates with people! Have you seen one in person?",
-    "What's your favorite Pop Mart character?": "Dimoo! I love his big eyes, cloud-like hair, and dreamy adventures. Each series tells a story. Do you have a favorite character?",
-    "Should I buy single boxes or a case?": "Singles for the surprise thrill! A case (12 boxes) guarantees all standard figures if you want to complete a series. What's your collecting style?",
-    
-    # Vegetarian Weightlifting
-    "Can vegetarians build muscle effectively?": "Yes! Muscle growth depends on progressive training and sufficient protein (0.7-1g per pound body weight). With proper planning, vegetarians build muscle just as well. What's your current protein intake?",
-    "What are good vegetarian protein sources?": "Legumes, tofu, tempeh, seitan, quinoa, eggs, Greek yogurt, cottage cheese, and nutritional yeast. Variety is key! What proteins do you currently eat?",
-    "Should I use protein powder as a vegetarian?": "Not strictly necessary if you prioritize protein in meals, but it's convenient for busy days or post-workout. I use it occasionally. Do you have trouble hitting protein goals?",
-    "What about creatine for vegetarians?": "Yes! Most creatine is synthetic and vegetarian-friendly. It's especially helpful for vegetarians since we don't get it from diet naturally. It improves strength and cognitive function. Have you tried it?",
-    
-    # Mechanical Keyboards
-    "What mechanical keyboard should I get?": "Depends on your use case! For typing, tactile switches like Browns. For gaming, linear like Reds. Budget and size matter too. What's your main use?",
-    "What's the difference between keyboard switches?": "Linear (smooth), Tactile (bump feedback), Clicky (audible click). Each feels completely different. Sound and feel are personal preference. Want to try a switch tester?",
-    
-    # Neovim  
-    "How do I get started with Neovim?": "Start with a minimal config, add plugins gradually. Learn Lua basics and understand lazy loading. Don't copy entire configs blindly! What's your current editor?",
-    "Should I migrate from Vim to Neovim?": "If you want better plugin ecosystem, Lua configuration, and built-in LSP support - yes! Migration is gradual. What Vim features do you rely on most?"
-}
-
-# Questions that are expertise-related but not FAQ-answerable - 33%
-EXPERTISE_ONLY_QUESTIONS = {
-    # Gaming
-    "How do I improve at League of Legends?": "I need specific help climbing ranked. I main support and struggle with map awareness and deciding when to roam. Any tips for climbing in lower elos?",
-    "What makes a good game design?": "I'm working on my first indie game and want to understand what makes games compelling. What are the key elements of good game design that keep players engaged?",
-    
-    # Web Development
-    "How do I optimize React performance?": "My React app is getting slow with large lists. I've tried useMemo but still seeing lag. What are the best practices for handling large datasets in React?",
-    "What's the best way to structure a Node.js API?": "I'm building a REST API with Node.js and Express. What folder structure, middleware patterns, and error handling strategies do you recommend for scalability?",
-    
-    # Machine Learning
-    "How do I prevent overfitting in neural networks?": "My model performs great on training data but poorly on validation. I've tried dropout and regularization. What else should I consider to improve generalization?",
-    "What's the best approach for small datasets in ML?": "I have limited training data for an image classification task. Should I use transfer learning, data augmentation, or something else? What works best?",
-    
-    # Board Games
-    "What's your strategy for Dune Imperium?": "I keep losing at Dune Imperium and feel like I'm missing key strategies. How do you balance deck building with board control? Any tips for winning?",
-    "How do I convince friends to try modern board games?": "My friends only know Monopoly and Catan. How do I introduce them to better games without overwhelming them? What's a good gateway game?",
-    
-    # Photography
-    "What camera settings for night photography?": "I'm trying to photograph stars and cityscapes at night but my photos come out blurry or too dark. What ISO, aperture, and shutter speed should I use?",
-    "How do I get into film photography?": "I want to try film photography but it seems expensive and complicated. What camera should I start with and where do I get film developed?",
-    
-    # Triathlon
-    "How do I train for my first triathlon?": "I can swim, bike, and run separately but never combined them. How should I structure my training for a sprint triathlon in 3 months?",
-    "What's the best nutrition strategy for endurance?": "I bonk during long training sessions. What should I eat before, during, and after long workouts? How do I fuel for race day?",
-    
-    # Cars
-    "Should I buy a used Supra or new Civic Type R?": "I'm deciding between a used MK4 Supra or new Civic Type R. Similar price range. Which would you choose for a daily driver that's also fun?",
-    "How do I get into car modifications?": "I want to modify my car but don't know where to start. What mods give the best bang for buck? Should I do cosmetic or performance first?",
-    
-    # Japan
-    "How do I plan a month-long solo trip to Japan?": "I want to solo travel Japan for a month like you did. How do I plan an itinerary? What's a good budget? Any tips for traveling alone?",
-    "What should I know about Japanese etiquette?": "I'm visiting Japan for the first time and worried about making cultural mistakes. What are the most important etiquette rules I should know?",
-    
-    # Coffee
-    "What espresso machine should I buy?": "I want to make café-quality espresso at home. What's a good entry-level machine that won't break the bank but produces great results?",
-    "How do I dial in espresso properly?": "I got an espresso machine but my shots are either too bitter or sour. How do I dial in the grind size and extraction time correctly?",
-    
-    # Ergonomic Keyboards
-    "Should I learn Colemak or stick with QWERTY?": "I'm considering learning Colemak for my new ergonomic keyboard. Is the learning curve worth it? How long did it take you to become proficient?",
-    "How do I transition to a split keyboard?": "I just got a split keyboard and can barely type. How long does adaptation take? Any tips for speeding up the learning process?",
-    
-    # Neovim
-    "What's your Neovim plugin setup?": "I'm rebuilding my Neovim config from scratch. What plugins do you consider essential? How do you organize your config files?",
-    "How do I set up LSP in Neovim?": "I'm confused about LSP setup in Neovim. What's the difference between nvim-lspconfig, null-ls, and Mason? Which do I actually need?",
-    
-    # Mechanical Keyboards
-    "Should I build or buy my first custom keyboard?": "I'm interested in custom keyboards but overwhelmed by options. Should I buy a prebuilt first or dive into building my own?",
-    "What's the best switch for typing all day?": "I type 8+ hours daily and want to reduce fatigue. What switch type and actuation force would you recommend for all-day typing comfort?",
-    
-    # Vegetarian Weightlifting
-    "What's a good vegetarian bulking meal plan?": "I'm trying to bulk as a vegetarian but struggling to eat enough calories and protein. Can you suggest a daily meal plan that hits macros?",
-    "How do I prevent iron deficiency while lifting?": "I'm worried about iron deficiency affecting my training. What vegetarian iron sources are best and how do I maximize absorption?",
-    
-    # Pop Mart
-    "How do I start collecting Pop Mart figures?": "I'm new to Pop Mart and overwhelmed by all the series. Where should I start? How do I avoid overspending on this hobby?",
-    "Where can I trade Pop Mart figures?": "I have duplicate figures and want to trade. Where's the best place to find other collectors? How do I ensure safe trades?",
-    
-    # Fountain Pens
-    "What fountain pen should I buy first?": "I've never used a fountain pen but want to try. What's a good beginner pen that's not too expensive but writes well?",
-    "How do I maintain my fountain pens?": "My fountain pen is skipping and feels scratchy. How do I clean it properly? What maintenance should I do regularly?"
-}
-
-# Questions unrelated to anyone's expertise - 33%
-UNRELATED_QUESTIONS = {
-    "How do I fix my washing machine?": "My washing machine is making a loud banging noise during the spin cycle. I've checked for unbalanced loads but the problem persists. What could be wrong?",
-    "What's the best way to learn Spanish?": "I want to become fluent in Spanish for travel. Should I use apps like Duolingo, take classes, or find a language exchange partner? What worked for you?",
-    "How do I start investing in stocks?": "I'm 25 and want to start investing but know nothing about stocks. Should I use index funds, individual stocks, or a robo-advisor? What's a good starting strategy?",
-    "Can you recommend good hiking trails?": "I'm looking for day hikes within 2 hours of Los Angeles. I'm intermediate level and prefer scenic views. Any recommendations?",
-    "How do I prepare for a job interview?": "I have a job interview next week for a project manager position. What questions should I prepare for? How do I make a strong impression?",
-    "What's the best way to organize my closet?": "My closet is a mess and I can't find anything. What organization systems work best? Should I use Marie Kondo method or something else?",
-    "How do I train my dog to stop barking?": "My dog barks at everything - people, other dogs, delivery trucks. Training hasn't helped. What techniques work for excessive barking?",
-    "What's a good beginner guitar?": "I want to learn guitar but don't want to spend too much on my first instrument. What's a good beginner acoustic guitar under $300?",
-    "How do I deal with noisy neighbors?": "My upstairs neighbors are extremely loud late at night. I've talked to them but nothing changed. What are my options?",
-    "What's the best way to meal prep?": "I want to meal prep for the week to save time and eat healthier. What containers should I use? How do I keep food fresh?",
-    "How do I remove coffee stains from carpet?": "I spilled coffee on my white carpet and the stain won't come out. I've tried various cleaners with no luck. Any secret techniques?",
-    "What's a good beginner workout routine?": "I haven't exercised in years and want to start. What's a good beginner routine that won't overwhelm me? How many days per week?",
-    "How do I start a podcast?": "I want to start a podcast about local history. What equipment do I need? What platforms should I use for hosting and distribution?",
-    "What's the best city for digital nomads?": "I'm a remote worker considering relocating abroad for a year. What cities are best for digital nomads in terms of cost, internet, and community?",
-    "How do I write a resume for career change?": "I'm changing careers from teaching to tech. How do I write a resume that highlights transferable skills? What should I emphasize?",
-    "What's a good beginner sewing project?": "I just got a sewing machine and want to start with something simple. What's a good first project to learn basic techniques?",
-    "How do I start a vegetable garden?": "I want to start growing vegetables in my backyard but have no experience. What vegetables are easiest for beginners? When should I plant?",
-    "What's the best way to learn piano?": "I'm 30 and want to learn piano. Is it too late? Should I get a teacher or use online resources? What keyboard should I start with?",
-    "How do I reduce my carbon footprint?": "I want to live more sustainably but don't know where to start. What changes have the biggest impact? What's realistic for everyday life?",
-    "What's a good side hustle?": "I need extra income and have evenings/weekends free. What are realistic side hustles that don't require huge upfront investment?",
-    "How do I make sourdough bread?": "I want to start making sourdough bread at home. How do I create and maintain a starter? What's the basic process?",
-    "What's the best way to learn touch typing?": "I'm a slow typer and want to improve. What's the best method to learn touch typing? How long does it typically take?",
-    "How do I start freelance writing?": "I want to freelance write but don't know how to find clients or set rates. Where do I start? What platforms are best for beginners?",
-    "What's a good laptop for college?": "I'm starting college and need a laptop for general use - notes, essays, web browsing. What specs do I actually need? What's a good budget?",
-    "How do I negotiate salary?": "I got a job offer but the salary seems low. How do I negotiate without seeming ungrateful? What's a good strategy?"
-}
-
 # Sample messages for ongoing conversations
 SAMPLE_MESSAGES = [
     "Can you help me with this?",
@@ -263,75 +169,1079 @@ SAMPLE_MESSAGES = [
     "I have a follow-up question...",
 ]
 
+# Expertise areas, built once instead of list(dict.keys()) on every pick
+EXPERT_BIO_KEYS = tuple(EXPERT_BIOS)
+
 
 def auth_headers(token):
     """Generate authorization headers with JWT token."""
     return {"Authorization": f"Bearer {token}"}
 
 
-class UserNameGenerator:
-    """Generates unique usernames using prime number stepping to avoid collisions."""
-    PRIME_NUMBERS = [2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37, 41, 43, 47, 53, 59, 61, 67, 71, 73, 79, 83, 89, 97]
+def resolve_import_time_option(flag, env_var, default, choices, argv=None):
+    """
+    Resolve an option that must be known when this module is imported, before locust
+    has parsed the custom arguments (e.g. because it decides a base class or which
+    shape is active). The command line flag wins over the environment variable.
+    """
+    argv = sys.argv if argv is None else argv
+    value = os.environ.get(env_var, default)
+    for i, arg in enumerate(argv):
+        if arg == flag and i + 1 < len(argv):
+            value = argv[i + 1]
+        elif arg.startswith(flag + "="):
+            value = arg.split("=", 1)[1]
+    if choices is not None and value not in choices:
+        raise ValueError(f"Unknown value {value!r} for {flag}, expected one of {choices}")
+    return value
+
+
+HTTP_CLIENT_MODE = resolve_import_time_option("--http-client", "LOCUST_HTTP_CLIENT", "requests", HTTP_CLIENT_MODES)
+LOAD_SHAPE = resolve_import_time_option("--load-shape", "LOCUST_LOAD_SHAPE", "step", LOAD_SHAPES)
+IDLE_TRANSPORT = resolve_import_time_option("--idle-transport", "LOCUST_IDLE_TRANSPORT", "poll", IDLE_TRANSPORTS)
+IDLE_MODE = resolve_import_time_option("--idle-mode", "LOCUST_IDLE_MODE", "users", IDLE_MODES)
+REPLAY_TRACE = resolve_import_time_option("--replay-trace", "LOCUST_REPLAY_TRACE", "", None)
+SCENARIO = resolve_import_time_option("--scenario", "LOCUST_SCENARIO", "personas", SCENARIOS)
+# The regular personas step aside for trace replay and the dedicated scenarios
+PERSONAS_DISABLED = bool(REPLAY_TRACE) or SCENARIO != "personas"
+
+
+@events.init_command_line_parser.add_listener
+def add_custom_arguments(parser):
+    """Register the harness options so locust accepts them and shows them in --help."""
+    parser.add_argument(
+        "--http-client",
+        choices=HTTP_CLIENT_MODES,
+        default=HTTP_CLIENT_MODE,
+        env_var="LOCUST_HTTP_CLIENT",
+        help="HTTP client for all personas: 'requests' (HttpUser) or 'fast' (FastHttpUser with a shared keep-alive pool)",
+    )
+    parser.add_argument(
+        "--load-shape",
+        choices=LOAD_SHAPES,
+        default=LOAD_SHAPE,
+        env_var="LOCUST_LOAD_SHAPE",
+        help="Load shape to run: 'step' (StepLoadShape), 'adaptive' (AdaptiveLoadShape) or 'none' (plain --users/--spawn-rate)",
+    )
+    parser.add_argument(
+        "--idle-transport",
+        choices=IDLE_TRANSPORTS,
+        default=IDLE_TRANSPORT,
+        env_var="LOCUST_IDLE_TRANSPORT",
+        help="How idle users get updates: 'poll' (IdleUser) or 'sse'/'long-poll' (PushUser, needs a push endpoint)",
+    )
+    parser.add_argument(
+        "--idle-mode",
+        choices=IDLE_MODES,
+        default=IDLE_MODE,
+        env_var="LOCUST_IDLE_MODE",
+        help="Polling idle clients: 'users' (one IdleUser each) or 'multiplexed' (--idle-clients identities per IdleSwarm scheduler)",
+    )
+    parser.add_argument(
+        "--idle-clients",
+        type=int,
+        default=1000,
+        env_var="LOCUST_IDLE_CLIENTS",
+        help="Multiplexed idle mode: idle clients in the run, split across the worker processes",
+    )
+    parser.add_argument(
+        "--idle-spawn-rate",
+        type=float,
+        default=1000,
+        env_var="LOCUST_IDLE_SPAWN_RATE",
+        help="Multiplexed idle mode: idle clients added per second per process",
+    )
+    parser.add_argument(
+        "--idle-concurrency",
+        type=int,
+        default=200,
+        env_var="LOCUST_IDLE_CONCURRENCY",
+        help="Multiplexed idle mode: polls in flight at once per process, and the size of their shared connection pool",
+    )
+    parser.add_argument(
+        "--idle-tick",
+        type=float,
+        default=0.1,
+        env_var="LOCUST_IDLE_TICK",
+        help="Multiplexed idle mode: resolution in seconds of the scheduler's timing wheel",
+    )
+    parser.add_argument(
+        "--identity-seed",
+        type=int,
+        default=0,
+        help="Seed of the username sequence shared by all workers (default: picked by the master)",
+    )
+    parser.add_argument(
+        "--identity-prime",
+        type=int,
+        default=0,
+        help="Prime step of the username sequence, coprime with MAX_USERS (default: picked by the master)",
+    )
+    parser.add_argument(
+        "--identity-partitions",
+        type=int,
+        default=0,
+        help="Number of disjoint username slices; set above the worker count if workers join mid-run (default: worker count)",
+    )
+    parser.add_argument(
+        "--user-fixture",
+        default="",
+        env_var="LOCUST_USER_FIXTURE",
+        help="User fixture written by seed_users.py to pre-fill the user store, so personas skip /auth/register",
+    )
+    parser.add_argument(
+        "--polling",
+        choices=POLLING_MODES,
+        default="clock",
+        env_var="LOCUST_POLLING",
+        help="IdleUser polling: 'clock' (sequential, since = client clock) or 'cursor' (concurrent, since = newest server timestamp seen)",
+    )
+    parser.add_argument(
+        "--arrival-rate",
+        type=float,
+        default=0,
+        env_var="LOCUST_ARRIVAL_RATE",
+        help="Open-loop task starts per second per user, independent of response times (default: closed loop wait_time)",
+    )
+    parser.add_argument(
+        "--arrival-distribution",
+        choices=ARRIVAL_DISTRIBUTIONS,
+        default="poisson",
+        env_var="LOCUST_ARRIVAL_DISTRIBUTION",
+        help="Spacing of open-loop task starts: 'poisson' (exponential intervals) or 'fixed'",
+    )
+    parser.add_argument(
+        "--histogram-log",
+        default="",
+        env_var="LOCUST_HISTOGRAM_LOG",
+        help="JSONL file to append per-endpoint HDR latency histograms to; workers add their index to the name",
+    )
+    parser.add_argument(
+        "--histogram-interval",
+        type=float,
+        default=10,
+        env_var="LOCUST_HISTOGRAM_INTERVAL",
+        help="Seconds between histogram log snapshots",
+    )
+    parser.add_argument(
+        "--trace-file",
+        default="",
+        env_var="LOCUST_TRACE_FILE",
+        help="JSONL file to append ExpertUser workflow traces to; workers add their index to the name",
+    )
+    parser.add_argument(
+        "--client-cache",
+        action="store_true",
+        default=False,
+        env_var="LOCUST_CLIENT_CACHE",
+        help="Give each user a client-side cache of /conversations and /expert/queue with ETag revalidation",
+    )
+    parser.add_argument(
+        "--client-cache-ttl",
+        type=float,
+        default=5,
+        env_var="LOCUST_CLIENT_CACHE_TTL",
+        help="Seconds a cached response is reused without revalidating (0: always revalidate)",
+    )
+    parser.add_argument(
+        "--client-cache-size",
+        type=int,
+        default=16,
+        env_var="LOCUST_CLIENT_CACHE_SIZE",
+        help="Cached responses kept per user, least recently used first out",
+    )
+    parser.add_argument(
+        "--scenario",
+        choices=SCENARIOS,
+        default=SCENARIO,
+        env_var="LOCUST_SCENARIO",
+        help="'personas' (default) or 'claim-contention' (ClaimContentionUser experts racing for a controlled queue)",
+    )
+    parser.add_argument(
+        "--contention-backlog",
+        type=int,
+        default=200,
+        env_var="LOCUST_CONTENTION_BACKLOG",
+        help="Claim contention: waiting conversations created before the experts start",
+    )
+    parser.add_argument(
+        "--contention-rate",
+        type=float,
+        default=0,
+        env_var="LOCUST_CONTENTION_RATE",
+        help="Claim contention: waiting conversations created per second during the run (0: backlog only)",
+    )
+    parser.add_argument(
+        "--contention-poll",
+        type=float,
+        default=0.1,
+        env_var="LOCUST_CONTENTION_POLL",
+        help="Claim contention: seconds between queue polls of the feeder, and of experts finding the queue empty",
+    )
+    parser.add_argument(
+        "--traffic-profile",
+        default="",
+        env_var="LOCUST_TRAFFIC_PROFILE",
+        help="Traffic profile (persona_profile.py) setting persona weights, task weights, think times and question mix; re-applied when the file changes",
+    )
+    parser.add_argument(
+        "--traffic-profile-poll",
+        type=float,
+        default=5,
+        env_var="LOCUST_TRAFFIC_PROFILE_POLL",
+        help="Seconds between checks of the --traffic-profile file for changes",
+    )
+    parser.add_argument(
+        "--replay-trace",
+        default=REPLAY_TRACE,
+        env_var="LOCUST_REPLAY_TRACE",
+        help="Replay this recorded trace with ReplayUser instead of running the personas",
+    )
+    parser.add_argument(
+        "--replay-format",
+        choices=TRACE_FORMATS,
+        default="auto",
+        env_var="LOCUST_REPLAY_FORMAT",
+        help="Trace format: 'jsonl', 'rails' (log file) or 'auto' (by extension)",
+    )
+    parser.add_argument(
+        "--replay-speed",
+        type=float,
+        default=1.0,
+        env_var="LOCUST_REPLAY_SPEED",
+        help="Replay speed factor: 4 replays an hour of trace in 15 minutes",
+    )
+    parser.add_argument(
+        "--replay-queue",
+        type=int,
+        default=1000,
+        env_var="LOCUST_REPLAY_QUEUE",
+        help="Due requests waiting for a free ReplayUser before the dispatcher stops reading the trace",
+    )
+    parser.add_argument(
+        "--replay-lag-ms",
+        type=float,
+        default=1000,
+        env_var="LOCUST_REPLAY_LAG_MS",
+        help="Lag behind schedule above which a replayed request counts as late",
+    )
+    parser.add_argument(
+        "--monitor-interval",
+        type=float,
+        default=1.0,
+        env_var="LOCUST_MONITOR_INTERVAL",
+        help="Seconds between generator self-monitoring samples",
+    )
+    parser.add_argument(
+        "--monitor-cpu-limit",
+        type=float,
+        default=90,
+        env_var="LOCUST_MONITOR_CPU_LIMIT",
+        help="Process CPU percent above which a sample counts as generator-saturated",
+    )
+    parser.add_argument(
+        "--monitor-lag-limit-ms",
+        type=float,
+        default=50,
+        env_var="LOCUST_MONITOR_LAG_LIMIT_MS",
+        help="gevent loop lag p95 above which a process counts as generator-bound",
+    )
+    parser.add_argument(
+        "--monitor-log",
+        default="",
+        env_var="LOCUST_MONITOR_LOG",
+        help="JSONL file to append every monitor sample to; workers add their index to the name",
+    )
+    parser.add_argument(
+        "--workload-seed",
+        type=int,
+        default=None,
+        env_var="LOCUST_WORKLOAD_SEED",
+        help="Seed precomputed, reproducible workload plans for every persona (needs numpy; default: unseeded random)",
+    )
+    parser.add_argument(
+        "--message-size",
+        choices=MESSAGE_SIZES,
+        default="sample",
+        env_var="LOCUST_MESSAGE_SIZE",
+        help="Follow-up message lengths: 'sample' (the short SAMPLE_MESSAGES), 'lognormal' or 'uniform'",
+    )
+    parser.add_argument(
+        "--message-size-median",
+        type=int,
+        default=200,
+        env_var="LOCUST_MESSAGE_SIZE_MEDIAN",
+        help="Median follow-up message length in characters",
+    )
+    parser.add_argument(
+        "--message-size-sigma",
+        type=float,
+        default=1.0,
+        env_var="LOCUST_MESSAGE_SIZE_SIGMA",
+        help="Lognormal sigma of follow-up message lengths (1.0: one message in a hundred is over 10x the median)",
+    )
+    parser.add_argument(
+        "--message-size-max",
+        type=int,
+        default=16384,
+        env_var="LOCUST_MESSAGE_SIZE_MAX",
+        help="Longest follow-up message in characters",
+    )
+    parser.add_argument(
+        "--conversation-fixture",
+        default="",
+        env_var="LOCUST_CONVERSATION_FIXTURE",
+        help="Conversation fixture written by seed_conversations.py, whose long conversations are added to their owners",
+    )
+    parser.add_argument(
+        "--job-probe",
+        type=float,
+        default=0,
+        env_var="LOCUST_JOB_PROBE",
+        help="Fraction of new conversations whose expert assignment and auto-reply are watched for (default: none)",
+    )
+    parser.add_argument(
+        "--job-probe-interval",
+        type=float,
+        default=1.0,
+        env_var="LOCUST_JOB_PROBE_INTERVAL",
+        help="Seconds between a probe's polls of the update feeds; the resolution of the measured latencies",
+    )
+    parser.add_argument(
+        "--job-probe-timeout",
+        type=float,
+        default=120,
+        env_var="LOCUST_JOB_PROBE_TIMEOUT",
+        help="Seconds a probe waits for the assignment and the auto-reply before counting them as not delivered",
+    )
+    parser.add_argument(
+        "--knowledge-base-host",
+        default="",
+        env_var="LOCUST_KNOWLEDGE_BASE_HOST",
+        help="Serve the experts' knowledge base links from mock_llm_server.py at this URL instead of the real sites",
+    )
+    parser.add_argument(
+        "--adaptive-start-users",
+        type=int,
+        default=100,
+        env_var="LOCUST_ADAPTIVE_START_USERS",
+        help="AdaptiveLoadShape: users in the first step",
+    )
+    parser.add_argument(
+        "--adaptive-max-users",
+        type=int,
+        default=15000,
+        env_var="LOCUST_ADAPTIVE_MAX_USERS",
+        help="AdaptiveLoadShape: stop doubling here even if the backend never breaks",
+    )
+    parser.add_argument(
+        "--adaptive-step-seconds",
+        type=int,
+        default=60,
+        env_var="LOCUST_ADAPTIVE_STEP_SECONDS",
+        help="AdaptiveLoadShape: how long each user count is held before it is judged",
+    )
+    parser.add_argument(
+        "--adaptive-p95-ms",
+        type=float,
+        default=1000,
+        env_var="LOCUST_ADAPTIVE_P95_MS",
+        help="AdaptiveLoadShape: live p95 above which the backend counts as broken",
+    )
+    parser.add_argument(
+        "--adaptive-failure-ratio",
+        type=float,
+        default=0.05,
+        env_var="LOCUST_ADAPTIVE_FAILURE_RATIO",
+        help="AdaptiveLoadShape: live failure ratio above which the backend counts as broken",
+    )
+    parser.add_argument(
+        "--adaptive-plateau",
+        type=float,
+        default=0.5,
+        env_var="LOCUST_ADAPTIVE_PLATEAU",
+        help="AdaptiveLoadShape: fraction of the proportional RPS gain a step must reach, below which RPS has plateaued",
+    )
+    parser.add_argument(
+        "--adaptive-resolution",
+        type=float,
+        default=0.1,
+        env_var="LOCUST_ADAPTIVE_RESOLUTION",
+        help="AdaptiveLoadShape: stop bisecting once the knee is bracketed within this fraction of the user count",
+    )
+    parser.add_argument(
+        "--adaptive-result",
+        default="breaking_point.json",
+        env_var="LOCUST_ADAPTIVE_RESULT",
+        help="AdaptiveLoadShape: JSON file the measured saturation point is written to",
+    )
+
+
+if HTTP_CLIENT_MODE == "fast":
+    from geventhttpclient.client import HTTPClientPool
+
+    class ChatHttpUser(FastHttpUser):
+        """
+        FastHttpUser sharing one keep-alive connection pool across all personas in this process.
+        The backend only skips Bedrock calls for user agents containing "python-requests",
+        so the fast client keeps that marker.
+        """
+        abstract = True
+        client_pool = HTTPClientPool(concurrency=HTTP_POOL_SIZE)
+        default_headers = {"User-Agent": "python-requests (locust FastHttpUser)"}
+else:
+    ChatHttpUser = HttpUser
 
-    def __init__(self, max_users=MAX_USERS, seed=None, prime_number=None):
-        self.seed = seed or random.randint(0, max_users)
-        self.prime_number = prime_number or random.choice(self.PRIME_NUMBERS)
-        self.current_index = -1
-        self.max_users = max_users
-        self.lock = threading.Lock()
 
-    def generate_username(self):
-        with self.lock:
-            self.current_index += 1
-            return f"user_{(self.seed + self.current_index * self.prime_number) % self.max_users}"
+user_store = UserStore()
+user_name_generator = UserNameGenerator(max_users=MAX_USERS)
+question_mix = QuestionMix(QUESTION_CATEGORY_WEIGHTS)
+poll_stats = PollStats()
+push_stats = PushStats()
+idle_swarm_stats = IdleSwarmStats()
+arrival_stats = ArrivalStats()
+latency_stats = LatencyStats()
+conversation_size_stats = ConversationSizeStats()
+job_pipeline_stats = JobPipelineStats()
+trace_stats = TraceStats()
+client_cache_stats = ClientCacheStats()
+replay_stats = ReplayStats()
+claim_stats = ClaimStats()
+generator_stats = GeneratorStats()
+client_code = generator_stats.client_code_timer  # Decorator of the ChatBackend helpers timed per persona
+worker_identity_counts = {}  # master only: client_id -> identity counts last reported by that worker
+
+# Harness side-channel stats, reported by workers alongside locust's own stats and logged on quit
+harness_stats = {
+    "poll_stats": poll_stats,
+    "push_stats": push_stats,
+    "idle_swarm_stats": idle_swarm_stats,
+    "arrival_stats": arrival_stats,
+    "latency_stats": latency_stats,
+    "conversation_size_stats": conversation_size_stats,
+    "job_pipeline_stats": job_pipeline_stats,
+    "trace_stats": trace_stats,
+    "client_cache_stats": client_cache_stats,
+    "replay_stats": replay_stats,
+    "claim_stats": claim_stats,
+    "generator_stats": generator_stats,
+}
+worker_harness_stats = {}  # master only: client_id -> {name: snapshot} last reported by that worker
+histogram_log_writer = None  # Greenlet appending latency_stats interval snapshots to --histogram-log
+trace_file = None  # Open --trace-file of this process
+generator_monitor = None  # Greenlet sampling generator_stats
+planned_users = {}  # persona -> number of users given a workload plan in this process
+payload_generator = None  # PayloadGenerator of follow-up messages with --message-size lognormal/uniform
+job_probes = Group()  # Greenlets of the running --job-probe watchers
+contention_feeder = None  # Greenlet feeding and timing the claim contention queue
+idle_swarm = None  # IdleSwarm of this process with --idle-mode multiplexed
+replay_queue = None  # JoinableQueue of (scheduled time, trace offset, TraceRequest) due for a ReplayUser
+replay_identities = {}  # trace user -> identity it was mapped to when first seen
+active_profile = None  # Profile applied from --traffic-profile (or sent by the master)
+profile_log = []  # When each profile was applied, for {csv prefix}_profiles.json
+profile_watcher = None  # Greenlet re-applying --traffic-profile when the file changes
+
+
+@events.test_start.add_listener
+def load_user_fixture(environment, **kwargs):
+    """Fill the user store from --user-fixture before any persona spawns (not on the master, which runs no users)."""
+    path = environment.parsed_options.user_fixture if environment.parsed_options else None
+    if not path or isinstance(environment.runner, MasterRunner) or len(user_store):
+        return
+    user_store.load_fixture(path)
+
+
+@events.test_start.add_listener
+def load_conversation_fixture(environment, **kwargs):
+    """Add --conversation-fixture's long conversations to their owners (not on the master)."""
+    path = environment.parsed_options.conversation_fixture if environment.parsed_options else None
+    if not path or isinstance(environment.runner, MasterRunner) or user_store.conversation_sizes:
+        return
+    user_store.load_conversation_fixture(path)
+
+
+@events.test_start.add_listener
+def configure_message_sizes(environment, **kwargs):
+    """Build the follow-up message generator for --message-size lognormal/uniform."""
+    global payload_generator
+    options = environment.parsed_options
+    if not options or options.message_size == "sample" or payload_generator:
+        return
+    payload_generator = PayloadGenerator(
+        options.message_size,
+        options.message_size_median,
+        options.message_size_sigma,
+        options.message_size_max,
+        SAMPLE_MESSAGES + [message for _, message in QUESTION_POOL],
+    )
+
+
+@events.test_start.add_listener
+def partition_identity_space(environment, **kwargs):
+    """
+    Master: fix the identity seed, prime step and partition count in parsed_options,
+    which are forwarded to workers with the spawn message.
+    Worker: take the slice of the username sequence matching this worker's index.
+    """
+    runner = environment.runner
+    options = environment.parsed_options
+    if isinstance(runner, MasterRunner):
+        if not options.identity_seed:
+            options.identity_seed = user_name_generator.seed
+        if not options.identity_prime:
+            options.identity_prime = user_name_generator.prime_number
+        if not options.identity_partitions:
+            options.identity_partitions = max(runner.worker_count, options.expect_workers)
+        logging.info(
+            f"Identity space: {MAX_USERS} users in {options.identity_partitions} partitions "
+            f"(seed={options.identity_seed}, prime={options.identity_prime})"
+        )
+    elif isinstance(runner, WorkerRunner):
+        if math.gcd(options.identity_prime, MAX_USERS) != 1:
+            raise ValueError(f"--identity-prime {options.identity_prime} must be coprime with MAX_USERS={MAX_USERS}")
+        if runner.worker_index >= options.identity_partitions:
+            logging.error(
+                f"Worker index {runner.worker_index} has no identity partition "
+                f"(only {options.identity_partitions}); usernames may collide. Raise --identity-partitions."
+            )
+        user_name_generator.assign_partition(
+            options.identity_seed,
+            options.identity_prime,
+            runner.worker_index % options.identity_partitions,
+            options.identity_partitions,
+        )
 
 
-class UserStore:
-    """Thread-safe storage for registered users and their tokens."""
-    def __init__(self):
-        self.used_usernames = {}
-        self.username_lock = threading.Lock()
-        # Track conversations per user for proper access control
-        self.user_conversations = {}  # user_id -> [conversation_ids]
-        self.conversations_lock = threading.Lock()
-
-    def get_random_user(self):
-        with self.username_lock:
-            if not self.used_usernames:
-                return None
-            random_username = random.choice(list(self.used_usernames.keys()))
-            return self.used_usernames[random_username]
-
-    def store_user(self, username, auth_token, user_id):
-        with self.username_lock:
-            self.used_usernames[username] = {
-                "username": username,
-                "auth_token": auth_token,
-                "user_id": user_id
-            }
-        with self.conversations_lock:
-            if user_id not in self.user_conversations:
-                self.user_conversations[user_id] = []
-        return self.used_usernames[username]
-
-    def add_conversation(self, user_id, conversation_id):
-        """Add a conversation to a specific user's list."""
-        with self.conversations_lock:
-            if user_id not in self.user_conversations:
-                self.user_conversations[user_id] = []
-            if conversation_id not in self.user_conversations[user_id]:
-                self.user_conversations[user_id].append(conversation_id)
-
-    def get_random_conversation(self, user_id):
-        """Get a random conversation that this user has access to."""
-        with self.conversations_lock:
-            if user_id not in self.user_conversations or not self.user_conversations[user_id]:
-                return None
-            return random.choice(self.user_conversations[user_id])
+@events.report_to_master.add_listener
+def report_identity_counts(client_id, data):
+    """Worker: piggyback identity counts and harness stats on the regular stats report."""
+    data["identities"] = {
+        "generated": user_name_generator.current_index + 1,
+        "stored": len(user_store),
+    }
+    data["harness_stats"] = {name: stats.snapshot() for name, stats in harness_stats.items()}
+
+
+@events.worker_report.add_listener
+def collect_identity_counts(client_id, data):
+    """Master: keep the latest identity counts and harness stats reported by each worker."""
+    if "identities" in data:
+        worker_identity_counts[client_id] = data["identities"]
+    if "harness_stats" in data:
+        worker_harness_stats[client_id] = data["harness_stats"]
+
+
+@events.quitting.add_listener
+def log_identity_counts(environment, **kwargs):
+    """Master: log per-worker and total identity counts at the end of a distributed run."""
+    if not isinstance(environment.runner, MasterRunner) or not worker_identity_counts:
+        return
+    logging.info("Identity counts per worker:")
+    for client_id, counts in sorted(worker_identity_counts.items()):
+        logging.info(f"  {client_id}: generated={counts['generated']}, stored={counts['stored']}")
+    total_generated = sum(c["generated"] for c in worker_identity_counts.values())
+    total_stored = sum(c["stored"] for c in worker_identity_counts.values())
+    logging.info(f"  total: generated={total_generated}, stored={total_stored}")
+
+
+def harness_snapshots(environment, name):
+    """Snapshots of one harness stat: the last one of every worker on a master, this process's own otherwise."""
+    if isinstance(environment.runner, MasterRunner):
+        return [reports[name] for reports in worker_harness_stats.values() if name in reports]
+    return [harness_stats[name].snapshot()]
+
+
+@events.quitting.add_listener
+def log_harness_stats(environment, **kwargs):
+    """Log the harness side-channel stats, merged across workers in distributed runs."""
+    if isinstance(environment.runner, WorkerRunner):
+        return
+    for name, stats in harness_stats.items():
+        stats.log_summary(harness_snapshots(environment, name))
+
+
+@events.quitting.add_listener
+def write_generator_report(environment, **kwargs):
+    """With --csv, write the generator self-monitoring verdict next to locust's stats."""
+    options = environment.parsed_options
+    if isinstance(environment.runner, WorkerRunner) or not options or not options.csv_prefix:
+        return
+    report = GeneratorStats.report(harness_snapshots(environment, "generator_stats"))
+    with open(f"{options.csv_prefix}_generator.json", "w") as f:
+        json.dump(report, f, indent=2)
+
+
+@events.quitting.add_listener
+def write_stage_log(environment, **kwargs):
+    """With --csv, write when each stage of the load shape started, for plot_timeseries.py."""
+    options = environment.parsed_options
+    shape = environment.shape_class
+    if isinstance(environment.runner, WorkerRunner) or not options or not options.csv_prefix:
+        return
+    if not isinstance(shape, StageLog) or not shape.stage_log:
+        return
+    with open(f"{options.csv_prefix}_stages.json", "w") as f:
+        json.dump({"shape": type(shape).__name__, "stages": shape.stage_log}, f, indent=2)
+
+
+@events.quitting.add_listener
+def write_job_pipeline_report(environment, **kwargs):
+    """With --csv and --job-probe, write the job pipeline latencies per category next to locust's stats."""
+    options = environment.parsed_options
+    if isinstance(environment.runner, WorkerRunner) or not options or not options.csv_prefix or not options.job_probe:
+        return
+    report = JobPipelineStats.report(harness_snapshots(environment, "job_pipeline_stats"))
+    with open(f"{options.csv_prefix}_job_pipeline.json", "w") as f:
+        json.dump(report, f, indent=2)
+
+
+@events.quitting.add_listener
+def write_claim_report(environment, **kwargs):
+    """With --csv in the claim contention scenario, write the claim outcomes and queue timings."""
+    options = environment.parsed_options
+    if isinstance(environment.runner, WorkerRunner) or not options or not options.csv_prefix:
+        return
+    if SCENARIO != "claim-contention":
+        return
+    report = ClaimStats.report(harness_snapshots(environment, "claim_stats"))
+    report["experts"] = options.num_users
+    with open(f"{options.csv_prefix}_claims.json", "w") as f:
+        json.dump(report, f, indent=2)
+
+
+@events.test_start.add_listener
+def start_job_probes(environment, **kwargs):
+    """Count --job-probe run minutes from the start of the test."""
+    options = environment.parsed_options
+    if options and options.job_probe and not isinstance(environment.runner, MasterRunner):
+        job_pipeline_stats.started = time.time()
+
+
+@events.test_stop.add_listener
+def stop_job_probes(environment, **kwargs):
+    """Stop the probes still waiting; each records its missing stages as undelivered and cut off."""
+    job_probes.kill(block=True, timeout=5)
+
+
+@events.test_start.add_listener
+def start_generator_monitor(environment, **kwargs):
+    """Sample loop lag, CPU and greenlets in every process that runs users (not on the master)."""
+    global generator_monitor
+    options = environment.parsed_options
+    if not options or isinstance(environment.runner, MasterRunner) or generator_monitor is not None:
+        return
+    generator_stats.cpu_limit = options.monitor_cpu_limit
+    generator_stats.lag_limit_ms = options.monitor_lag_limit_ms
+    log_path, source = process_log_path(environment, options.monitor_log) if options.monitor_log else (None, None)
+    process = psutil.Process()
+    process.cpu_percent(None)  # The first call only sets the baseline
+    loop = gevent.get_hub().loop
+
+    def sample_periodically():
+        interval = options.monitor_interval
+        while True:
+            expected = time.monotonic() + interval
+            gevent.sleep(interval)
+            lag_ms = max(0.0, time.monotonic() - expected) * 1000
+            cpu_percent = process.cpu_percent(None)
+            user_greenlets = len(environment.runner.user_greenlets)
+            generator_stats.record_sample(lag_ms, cpu_percent, user_greenlets, loop.activecnt)
+            if log_path:
+                with open(log_path, "a") as f:
+                    f.write(json.dumps({
+                        "time": time.time(),
+                        "source": source,
+                        "loop_lag_ms": round(lag_ms, 3),
+                        "cpu_percent": cpu_percent,
+                        "user_greenlets": user_greenlets,
+                        "active_watchers": loop.activecnt,
+                    }) + "\n")
+
+    generator_monitor = gevent.spawn(sample_periodically)
+
+
+@events.test_stop.add_listener
+def stop_generator_monitor(environment, **kwargs):
+    global generator_monitor
+    if generator_monitor is not None:
+        generator_monitor.kill()
+        generator_monitor = None
+
+
+@events.request.add_listener
+def record_latency_histogram(request_type, name, response_time, **kwargs):
+    """Record every request into its endpoint's HDR histogram."""
+    latency_stats.record(f"{request_type} {name}", response_time)
+
+
+@events.request.add_listener
+def record_conversation_size_latency(request_type, name, response_time, context, **kwargs):
+    """Record requests made on a conversation of known size into that size's histogram."""
+    size = context.get("conversation_size") if context else None
+    if size is not None:
+        conversation_size_stats.record(f"{request_type} {name}", size, response_time)
+
+
+def process_log_path(environment, path):
+    """Per-process log path and source label: workers add their index before the extension."""
+    if isinstance(environment.runner, WorkerRunner):
+        source = f"worker-{environment.runner.worker_index}"
+        root, ext = os.path.splitext(path)
+        return f"{root}.{source}{ext}", source
+    return path, "local"
+
+
+def write_histogram_snapshot(path, source):
+    """Append the histograms recorded since the previous snapshot as one JSONL line."""
+    histograms = latency_stats.interval_snapshot()
+    if histograms:
+        with open(path, "a") as f:
+            f.write(json.dumps({"time": time.time(), "source": source, "histograms": histograms}) + "\n")
+
+
+@events.test_start.add_listener
+def start_histogram_log(environment, **kwargs):
+    """Start appending interval histogram snapshots to --histogram-log (not on the master, which records no requests)."""
+    global histogram_log_writer
+    options = environment.parsed_options
+    if not options or not options.histogram_log or isinstance(environment.runner, MasterRunner):
+        return
+    path, source = process_log_path(environment, options.histogram_log)
+
+    def write_periodically():
+        while True:
+            gevent.sleep(options.histogram_interval)
+            write_histogram_snapshot(path, source)
+
+    histogram_log_writer = gevent.spawn(write_periodically)
+
+
+@events.test_stop.add_listener
+def stop_histogram_log(environment, **kwargs):
+    """Stop the histogram log writer and flush the last partial interval."""
+    global histogram_log_writer
+    if histogram_log_writer is None:
+        return
+    histogram_log_writer.kill()
+    histogram_log_writer = None
+    write_histogram_snapshot(*process_log_path(environment, environment.parsed_options.histogram_log))
+
+
+@events.test_start.add_listener
+def open_trace_file(environment, **kwargs):
+    """Open this process's --trace-file (not on the master, which runs no workflows)."""
+    global trace_file
+    options = environment.parsed_options
+    if not options or not options.trace_file or isinstance(environment.runner, MasterRunner) or trace_file:
+        return
+    path, _ = process_log_path(environment, options.trace_file)
+    trace_file = open(path, "a")
+
+
+@events.test_stop.add_listener
+def close_trace_file(environment, **kwargs):
+    global trace_file
+    if trace_file:
+        trace_file.close()
+        trace_file = None
+
+
+def dispatch_trace(environment, partition_index, partition_count):
+    """
+    Stream --replay-trace and put each request of this process's partition of trace users
+    into replay_queue at its scheduled time. Blocks while the queue is full, which shows
+    up as lag; quits a local run once the trace is exhausted and drained.
+    """
+    options = environment.parsed_options
+    started = time.monotonic()
+    trace_start = None
+    for request in read_trace(options.replay_trace, options.replay_format):
+        if trace_start is None:
+            trace_start = request.timestamp
+        if zlib.crc32((request.user or "").encode()) % partition_count != partition_index:
+            continue
+        offset = request.timestamp - trace_start
+        scheduled = started + offset / options.replay_speed
+        delay = scheduled - time.monotonic()
+        if delay > 0:
+            gevent.sleep(delay)
+        replay_queue.put((scheduled, offset, request))
+    replay_queue.join()
+    logging.info(f"Replay of {options.replay_trace} finished after {time.monotonic() - started:.0f}s")
+    if not isinstance(environment.runner, WorkerRunner):
+        environment.runner.quit()
+
+
+@events.test_start.add_listener
+def start_replay(environment, **kwargs):
+    """Start the trace dispatcher; workers take the trace users whose hash falls in their identity partition."""
+    global replay_queue
+    options = environment.parsed_options
+    if not REPLAY_TRACE or isinstance(environment.runner, MasterRunner) or replay_queue is not None:
+        return
+    partition_index, partition_count = 0, 1
+    if isinstance(environment.runner, WorkerRunner):
+        partition_count = options.identity_partitions
+        partition_index = environment.runner.worker_index % partition_count
+    replay_queue = JoinableQueue(maxsize=options.replay_queue)
+    gevent.spawn(dispatch_trace, environment, partition_index, partition_count)
+
+
+@events.request.add_listener
+def record_trace_span(request_type, name, response_time, context, exception=None, **kwargs):
+    """Add requests made inside a workflow trace to it as spans."""
+    trace = context.get("trace") if context else None
+    if trace is not None:
+        trace.add_span(f"{request_type} {name}", response_time, exception is not None)
+
+
+@events.request.add_listener
+def record_intended_latency(request_type, name, response_time, context, **kwargs):
+    """Record open-loop requests with their task's lateness added to the measured response time."""
+    lateness_ms = context.get("intended_lateness_ms") if context else None
+    if lateness_ms is not None:
+        arrival_stats.record(f"{request_type} {name}", response_time + lateness_ms)
+
+
+@events.request.add_listener
+def record_claim_outcome(response_time, context, **kwargs):
+    """Record claims, classified by claim_conversation, by outcome."""
+    outcome = context.get("claim_outcome") if context else None
+    if outcome is not None:
+        claim_stats.record(outcome, context["conversation_id"], response_time)
+
+
+def feed_contention(environment, session, headers):
+    """
+    Claim contention feeder: add --contention-rate waiting conversations per second and poll
+    the queue every --contention-poll seconds, timing when each conversation left it. Stops a
+    local run once the backlog is drained and no more conversations are coming.
+    """
+    options = environment.parsed_options
+    host = environment.host.rstrip("/")
+    created = {}  # conversation_id -> time created, until it leaves the waiting queue
+    backlog = set(claim_stats.backlog_ids)
+    created.update(claim_stats.backlog_ids)
+    next_due = time.monotonic()
+    while True:
+        gevent.sleep(options.contention_poll)
+        if options.contention_rate > 0:
+            while next_due <= time.monotonic():
+                conversation_id = create_contention_conversation(session, host, headers, claim_stats.created)
+                if conversation_id:
+                    created[conversation_id] = time.time()
+                next_due += 1 / options.contention_rate
+        response = session.get(f"{host}/expert/queue", headers=headers)
+        if response.status_code != 200:
+            continue
+        waiting = {str(c.get("id")) for c in response.json().get("waitingConversations", [])}
+        now = time.time()
+        for conversation_id in [c for c in created if c not in waiting]:
+            claim_stats.record_dequeued(now - created.pop(conversation_id))
+            backlog.discard(conversation_id)
+        if not backlog and claim_stats.drained is None:
+            claim_stats.drained = now
+            logging.info(f"Contention backlog of {claim_stats.backlog} drained in {now - claim_stats.backlog_ready:.1f}s")
+            if options.contention_rate <= 0 and not isinstance(environment.runner, WorkerRunner):
+                # In its own greenlet: quitting fires test_stop, which kills this one
+                gevent.spawn(environment.runner.quit)
+                return
+
+
+def create_contention_conversation(session, host, headers, index):
+    """Create one waiting conversation without messages, so no job assigns it; returns its id or None."""
+    response = session.post(f"{host}/conversations", json={"title": f"Contention {index}"}, headers=headers)
+    if response.status_code != 201:
+        return None
+    claim_stats.created += 1
+    return str(response.json().get("id"))
 
 
-user_store = UserStore()
-user_name_generator = UserNameGenerator(max_users=MAX_USERS)
+@events.test_start.add_listener
+def start_contention_feeder(environment, **kwargs):
+    """
+    Claim contention: in one process (the local runner or worker 0), create the backlog of
+    waiting conversations before this process spawns its experts, then start the feeder.
+    """
+    global contention_feeder
+    runner = environment.runner
+    if SCENARIO != "claim-contention" or isinstance(runner, MasterRunner) or contention_feeder is not None:
+        return
+    claim_stats.track_wins = True
+    if isinstance(runner, WorkerRunner) and runner.worker_index != 0:
+        return
+    options = environment.parsed_options
+    host = environment.host.rstrip("/")
+    session = requests.Session()
+    username = f"contention_feeder_{os.urandom(4).hex()}"
+    response = session.post(f"{host}/auth/register", json={"username": username, "password": username})
+    if response.status_code != 201:
+        raise RuntimeError(f"Claim contention feeder could not register: {response.status_code} {response.text[:200]}")
+    headers = auth_headers(response.json().get("token"))
+    pool = Pool(10)  # requests' default connection pool size
+    ids = pool.map(
+        lambda index: create_contention_conversation(session, host, headers, index), range(options.contention_backlog)
+    )
+    claim_stats.backlog_ids = {conversation_id: time.time() for conversation_id in ids if conversation_id}
+    claim_stats.backlog = len(claim_stats.backlog_ids)
+    claim_stats.backlog_ready = time.time()
+    logging.info(f"Contention backlog of {claim_stats.backlog} waiting conversations created")
+    contention_feeder = gevent.spawn(feed_contention, environment, session, headers)
+
+
+@events.test_stop.add_listener
+def stop_contention_feeder(environment, **kwargs):
+    global contention_feeder
+    if contention_feeder is not None:
+        contention_feeder.kill()
+        contention_feeder = None
+
+
+@events.test_start.add_listener
+def start_idle_swarm(environment, **kwargs):
+    """
+    --idle-mode multiplexed: start this process's IdleSwarm with its share of --idle-clients
+    (split by identity partition in distributed runs, like the username sequence).
+    """
+    global idle_swarm
+    runner = environment.runner
+    if IDLE_MODE != "multiplexed" or PERSONAS_DISABLED or isinstance(runner, MasterRunner) or idle_swarm is not None:
+        return
+    if IDLE_TRANSPORT != "poll":
+        logging.warning(f"--idle-mode multiplexed only multiplexes polling clients; --idle-transport {IDLE_TRANSPORT} runs PushUsers")
+        return
+    options = environment.parsed_options
+    partition_index, partition_count = 0, 1
+    if isinstance(runner, WorkerRunner):
+        partition_count = options.identity_partitions
+        partition_index = runner.worker_index % partition_count
+    if not len(user_store):
+        raise ValueError(
+            "--idle-mode multiplexed needs --user-fixture: identities registered at spawn time would all land on one user"
+        )
+    clients = options.idle_clients // partition_count + (partition_index < options.idle_clients % partition_count)
+    idle_swarm = IdleSwarm(environment, options.polling, options.idle_concurrency, options.idle_tick)
+    idle_swarm.start(clients, options.idle_spawn_rate, partition_index, partition_count)
+    logging.info(f"IdleSwarm: spawning {clients} multiplexed idle clients at {options.idle_spawn_rate:g}/s")
+
+
+@events.test_stop.add_listener
+def stop_idle_swarm(environment, **kwargs):
+    global idle_swarm
+    if idle_swarm is not None:
+        idle_swarm.stop()
+        idle_swarm = None
+
+
+def apply_profile(environment, profile):
+    """
+    Set the persona weights, task weights, think times and question mix of a Profile; what
+    it leaves out goes back to the locustfile's own. Running users pick up tasks, think
+    times and questions with their next task; the weights decide the persona of every
+    user spawned from now on.
+    """
+    global active_profile
+    for name, persona in profile.personas.items():
+        if name not in PROFILED_PERSONAS:
+            raise ValueError(f"Profile {profile.name}: unknown persona {name}, expected one of {list(PROFILED_PERSONAS)}")
+        unknown = set(persona.tasks or ()) - set(PROFILED_PERSONAS[name][1])
+        if unknown:
+            raise ValueError(f"Profile {profile.name}: {name} has no tasks {sorted(unknown)}")
+    question_mix.set_weights(profile.question_categories or QUESTION_CATEGORY_WEIGHTS)
+
+    for name, (cls, tasks, default) in PROFILED_PERSONAS.items():
+        persona = profile.personas.get(name, default)
+        cls.weight = persona.weight if persona.weight is not None else default.weight
+        cls.think_time = persona.think_time or default.think_time
+        cls.tasks = [tasks[task] for task, weight in (persona.tasks or default.tasks).items() for _ in range(weight)]
+    PushUser.weight = IdleUser.weight  # Stands in for IdleUser with a push transport
+
+    rebuild_user_generator(environment.runner)
+
+    active_profile = profile
+    profile_log.append({"time": time.time(), "label": f"profile {profile.name}"})
+    weights = ", ".join(f"{name} {cls.weight}" for name, (cls, _, _) in PROFILED_PERSONAS.items())
+    logging.info(f"Traffic profile {profile.name}: weights {weights}; questions {question_mix.weights}")
+
+
+def rebuild_user_generator(runner):
+    """
+    Make a running dispatcher spawn with the current class weights. Locust has no public way
+    to: runner.start() rebuilds the dispatcher's user generator only when the set of user
+    classes changes, not their weights. So this resets the private _user_generator, whose
+    behaviour was only tested on LOCUST_DISPATCHER_VERSIONS; on any other version this logs a
+    warning and leaves the dispatcher alone, so the new weights only apply from the next test start.
+    """
+    dispatcher = getattr(runner, "_users_dispatcher", None)
+    if dispatcher is None:
+        return  # Not dispatching yet: the weights apply when the test starts
+    if not LOCUST_VERSION.startswith(LOCUST_DISPATCHER_VERSIONS) or not hasattr(dispatcher, "_user_gen"):
+        logging.warning(f"New persona weights apply from the next test start (locust {LOCUST_VERSION} is untested)")
+        return
+    dispatcher._user_generator = dispatcher._user_gen()
+
+
+def receive_profile(environment, msg, **kwargs):
+    """Worker: apply a profile the master switched to."""
+    apply_profile(environment, Profile.from_dict(msg.data))
+
+
+def watch_profile(environment, path):
+    """Master or local runner: re-apply --traffic-profile whenever the file, or the file its symlink points to, changes."""
+    options = environment.parsed_options
+    seen = None
+    while True:
+        try:
+            version = (os.path.realpath(path), os.stat(path).st_mtime_ns)
+            if seen is None:
+                seen = version
+            elif version != seen:
+                seen = version
+                profile = read_profile(path)
+                apply_profile(environment, profile)
+                if isinstance(environment.runner, MasterRunner):
+                    environment.runner.send_message("apply_profile", profile.to_dict())
+        except (OSError, ValueError) as e:
+            logging.error(f"Keeping traffic profile {active_profile.name if active_profile else 'default'}: {e}")
+        gevent.sleep(options.traffic_profile_poll)
+
+
+@events.init.add_listener
+def load_profile(environment, **kwargs):
+    """
+    Apply --traffic-profile in every process before any user spawns. Workers also take profile
+    switches from the master; the master or local runner watches the file for them.
+    """
+    global profile_watcher
+    runner = environment.runner
+    if isinstance(runner, WorkerRunner):
+        runner.register_message("apply_profile", receive_profile)
+    options = environment.parsed_options
+    if not options or not options.traffic_profile:
+        return
+    if isinstance(runner, WorkerRunner) and not os.path.exists(options.traffic_profile):
+        logging.warning(f"No {options.traffic_profile} on this worker; waiting for the master's profile")
+        return
+    apply_profile(environment, read_profile(options.traffic_profile))
+    if not isinstance(runner, WorkerRunner):
+        profile_watcher = gevent.spawn(watch_profile, environment, options.traffic_profile)
+
+
+@events.test_start.add_listener
+def send_profile(environment, **kwargs):
+    """Master: hand the current profile to the workers, including ones without the file."""
+    if isinstance(environment.runner, MasterRunner) and active_profile is not None:
+        environment.runner.send_message("apply_profile", active_profile.to_dict())
+
+
+@events.quitting.add_listener
+def write_profile_log(environment, **kwargs):
+    """With --csv and --traffic-profile, write when each profile was applied, for plot_timeseries.py."""
+    options = environment.parsed_options
+    if isinstance(environment.runner, WorkerRunner) or not options or not options.csv_prefix or not profile_log:
+        return
+    with open(f"{options.csv_prefix}_profiles.json", "w") as f:
+        json.dump({"stages": profile_log}, f, indent=2)
 
 
 class ChatBackend:
@@ -339,6 +1249,110 @@ class ChatBackend:
     Base class for all user personas.
     Provides common authentication and API interaction methods.
     """
+    arrival_schedule = None  # ArrivalSchedule with --arrival-rate
+    active_trace = None  # WorkflowTrace of the running workflow task
+    client_cache = None  # ClientCache with --client-cache, created on first use
+    plan = None  # WorkloadPlan with --workload-seed
+    rng = random  # Per-user seeded random.Random with --workload-seed
+
+    def request_context(self):
+        """Request event context: open-loop lateness and the active workflow trace, when there are any."""
+        context = self.arrival_schedule.context() if self.arrival_schedule else {}
+        if self.active_trace:
+            context["trace"] = self.active_trace
+        return context
+
+    def start_workload_plan(self):
+        """
+        With --workload-seed, take questions, messages, task choices and think times from a
+        seeded WorkloadPlan, and every other random choice from its seeded random.Random.
+        """
+        options = self.environment.parsed_options
+        seed = getattr(options, "workload_seed", None) if options else None
+        if seed is None:
+            return
+        if WorkloadPlan is None:
+            raise RuntimeError("--workload-seed needs numpy (pip install numpy)")
+
+        persona = type(self).__name__
+        spawn_number = planned_users.get(persona, 0)
+        planned_users[persona] = spawn_number + 1
+        worker_index = self.environment.runner.worker_index if isinstance(self.environment.runner, WorkerRunner) else 0
+        self.plan = WorkloadPlan(seed, (worker_index, zlib.crc32(persona.encode()), spawn_number))
+        self.rng = self.plan.random
+        # Uniform draws mapped onto the current tasks, so a profile switch keeps the plan deterministic
+        self._taskset_instance.get_next_task = lambda: self.tasks[int(self.plan.uniform("task", 0, 1) * len(self.tasks))]
+
+    def profiled_wait_time(self):
+        """
+        wait_time of the profiled personas: a draw from the persona's think_time, which
+        --traffic-profile can replace at runtime. With --workload-seed the draw comes from the plan.
+        """
+        if self.plan:
+            return self.think_time.quantile(self.plan.uniform("think_time", 0, 1))
+        return self.think_time.sample()
+
+    def start_arrival_schedule(self):
+        """With --arrival-rate, replace the persona's closed-loop wait_time with an open-loop schedule."""
+        options = self.environment.parsed_options
+        rate = getattr(options, "arrival_rate", 0) if options else 0
+        if rate > 0:
+            self.arrival_schedule = ArrivalSchedule(rate, options.arrival_distribution, arrival_stats, time.monotonic())
+            self.wait_time = self.arrival_schedule.wait_time
+            self.context = self.request_context
+
+    @contextmanager
+    def workflow_trace(self, workflow):
+        """Group the requests made inside the block into one trace of the given workflow."""
+        trace = WorkflowTrace(workflow, self.user.get("user_id") if self.user else None)
+        self.active_trace = trace
+        self.context = self.request_context
+        try:
+            yield trace
+        finally:
+            self.active_trace = None
+            trace.finish()
+            trace_stats.record(trace)
+            if trace_file:
+                trace_file.write(trace.to_json() + "\n")
+
+    def get_json(self, user, path, name):
+        """
+        GET a JSON endpoint, through this user's client cache when --client-cache is set.
+        Returns the decoded body, or None if the request failed.
+        """
+        options = self.environment.parsed_options
+        if self.client_cache is None and getattr(options, "client_cache", False):
+            self.client_cache = ClientCache(options.client_cache_size, options.client_cache_ttl)
+        headers = auth_headers(user.get("auth_token"))
+        if self.client_cache is None:
+            response = self.client.get(path, headers=headers, name=name)
+            return response.json() if response.status_code == 200 else None
+
+        entry = self.client_cache.get(path)
+        if entry is not None:
+            etag, data, payload_bytes, _ = entry
+            if self.client_cache.is_fresh(entry):
+                client_cache_stats.record(name, "fresh", payload_bytes)
+                return data
+            if etag:
+                headers["If-None-Match"] = etag
+        response = self.client.get(path, headers=headers, name=name)
+        if response.status_code == 304 and entry is not None:
+            self.client_cache.put(path, etag, data, payload_bytes)
+            client_cache_stats.record(name, "revalidated", payload_bytes)
+            return data
+        client_cache_stats.record(name, "miss")
+        if response.status_code != 200:
+            return None
+        data = response.json()
+        self.client_cache.put(path, response.headers.get("ETag"), data, len(response.content or b""))
+        return data
+
+    def invalidate_cached(self, *paths):
+        """Drop cached responses that a write by this user has made stale."""
+        if self.client_cache is not None:
+            self.client_cache.invalidate(*paths)
 
     def login(self, username, password):
         """Login an existing user."""
@@ -364,60 +1378,88 @@ class ChatBackend:
             return user_store.store_user(username, data.get("token"), data.get("user", {}).get("id"))
         return None
 
-    def check_conversation_updates(self, user):
-        """Check for conversation updates."""
-        params = {"userId": user.get("user_id")}
-        if hasattr(self, 'last_check_time') and self.last_check_time:
-            params["since"] = self.last_check_time.isoformat()
+    def fetch_updates(self, user, feed, since=None):
+        """
+        Fetch one of the polling feeds in UPDATE_FEEDS.
+        Returns (rows, payload_bytes); rows is None if the request failed.
+        """
+        path, id_param = UPDATE_FEEDS[feed]
+        params = {id_param: user.get("user_id")}
+        if since:
+            params["since"] = since
+
+        context = {}
+        if feed == "messages":
+            # The feed scans all the user's conversations, so bucket it by their total size
+            history_size = user_store.get_history_size(user.get("user_id"))
+            if history_size is not None:
+                context["conversation_size"] = history_size
 
         response = self.client.get(
-            "/api/conversations/updates",
+            path,
             params=params,
             headers=auth_headers(user.get("auth_token")),
-            name="/api/conversations/updates"
+            name=path,
+            context=context
         )
+        if response.status_code != 200:
+            return None, 0
+        data = response.json()
+        if isinstance(data, dict):
+            # Expert queue feed returns both lists in one object
+            data = data.get("waitingConversations", []) + data.get("assignedConversations", [])
+        return data, len(response.content or b"")
+
+    def clock_since(self):
+        """The client-clock timestamp of the previous poll, if any."""
+        if hasattr(self, 'last_check_time') and self.last_check_time:
+            return self.last_check_time.isoformat()
+        return None
 
-        return response.status_code == 200
+    def check_conversation_updates(self, user):
+        """Check for conversation updates."""
+        rows, _ = self.fetch_updates(user, "conversations", self.clock_since())
+        return rows is not None
 
     def check_message_updates(self, user):
         """Check for message updates."""
-        params = {"userId": user.get("user_id")}
-        if hasattr(self, 'last_check_time') and self.last_check_time:
-            params["since"] = self.last_check_time.isoformat()
-
-        response = self.client.get(
-            "/api/messages/updates",
-            params=params,
-            headers=auth_headers(user.get("auth_token")),
-            name="/api/messages/updates"
-        )
-
-        return response.status_code == 200
+        rows, _ = self.fetch_updates(user, "messages", self.clock_since())
+        return rows is not None
 
     def check_expert_queue_updates(self, user):
         """Check for expert queue updates."""
-        params = {"expertId": user.get("user_id")}
-        if hasattr(self, 'last_check_time') and self.last_check_time:
-            params["since"] = self.last_check_time.isoformat()
-
-        response = self.client.get(
-            "/api/expert-queue/updates",
-            params=params,
-            headers=auth_headers(user.get("auth_token")),
-            name="/api/expert-queue/updates"
-        )
+        rows, _ = self.fetch_updates(user, "expert_queue", self.clock_since())
+        return rows is not None
 
-        return response.status_code == 200
+    def poll_with_cursors(self, user, cursors):
+        """
+        Poll all feeds concurrently, sending as since the newest server timestamp seen on each feed,
+        and drop the rows repeated at that timestamp (advance_cursor).
+        Advances cursors (feed -> (timestamp, ids of the rows at it)) in place and returns the
+        (new rows, payload_bytes) of each feed and the number of repeated rows dropped.
+        """
+        greenlets = [
+            gevent.spawn(self.fetch_updates, user, feed, cursors[feed][0] if feed in cursors else None)
+            for feed in UPDATE_FEEDS
+        ]
+        gevent.joinall(greenlets, raise_error=True)
+        results = []
+        repeated = 0
+        for feed, greenlet in zip(UPDATE_FEEDS, greenlets, strict=True):
+            rows, payload_bytes = greenlet.value
+            if rows:
+                fresh, cursor = advance_cursor(rows, UPDATE_CURSOR_FIELDS[feed], cursors.get(feed, NO_CURSOR))
+                repeated += len(rows) - len(fresh)
+                if cursor[0]:
+                    cursors[feed] = cursor
+                rows = fresh
+            results.append((rows, payload_bytes))
+        return results, repeated
 
     def get_conversations(self, user):
         """Get all conversations for the user."""
-        response = self.client.get(
-            "/conversations",
-            headers=auth_headers(user.get("auth_token")),
-            name="/conversations"
-        )
-        if response.status_code == 200:
-            conversations = response.json()
+        conversations = self.get_json(user, "/conversations", "/conversations")
+        if conversations is not None:
             # Sync backend conversations with local tracking
             # Backend returns conversations where user is initiator OR assigned expert
             user_id = user.get("user_id")
@@ -445,6 +1487,7 @@ class ChatBackend:
             headers=auth_headers(user.get("auth_token")),
             name="/conversations"
         )
+        self.invalidate_cached("/conversations")
         if response.status_code == 201:
             data = response.json()
             conversation_id = data.get("id")
@@ -455,35 +1498,44 @@ class ChatBackend:
         return None
 
     def get_messages(self, user, conversation_id):
-        """Get messages for a conversation."""
-        response = self.client.get(
+        """Get messages for a conversation, reporting the request with the number of messages returned."""
+        with self.client.get(
             f"/conversations/{conversation_id}/messages",
             headers=auth_headers(user.get("auth_token")),
-            name="/conversations/[id]/messages"
-        )
-        if response.status_code == 200:
-            return response.json()
-        return []
+            name="/conversations/[id]/messages",
+            catch_response=True
+        ) as response:
+            if response.status_code != 200:
+                return []
+            try:
+                messages = response.json()
+            except ValueError as e:
+                response.failure(f"Response body is not JSON: {e}")
+                return []
+            user_store.set_conversation_size(conversation_id, len(messages))
+            # The request event fires when this block exits, so its listeners see the size
+            response.request_meta["context"]["conversation_size"] = len(messages)
+            return messages
 
     def post_message(self, user, conversation_id, content):
         """Post a message to a conversation."""
+        size = user_store.get_conversation_size(conversation_id)
         response = self.client.post(
             "/messages",
             json={"conversationId": conversation_id, "content": content},
             headers=auth_headers(user.get("auth_token")),
-            name="/messages"
+            name="/messages",
+            context={} if size is None else {"conversation_size": size}
         )
+        self.invalidate_cached("/conversations", "/expert/queue")
+        if response.status_code == 201 and size is not None:
+            user_store.set_conversation_size(conversation_id, size + 1)
         return response.status_code == 201
 
     def get_expert_queue(self, user):
         """Get the expert queue."""
-        response = self.client.get(
-            "/expert/queue",
-            headers=auth_headers(user.get("auth_token")),
-            name="/expert/queue"
-        )
-        if response.status_code == 200:
-            queue = response.json()
+        queue = self.get_json(user, "/expert/queue", "/expert/queue")
+        if queue is not None:
             # Sync assigned conversations with local tracking
             # This ensures conversations claimed by this expert are tracked
             user_id = user.get("user_id")
@@ -496,14 +1548,28 @@ class ChatBackend:
         return None
 
     def claim_conversation(self, user, conversation_id):
-        """Claim a conversation as an expert."""
-        response = self.client.post(
+        """
+        Claim a conversation as an expert. A 422 means another expert claimed it first: that
+        lost race is reported as a success, and claim_stats tells it apart from real errors.
+        """
+        with self.client.post(
             f"/expert/conversations/{conversation_id}/claim",
             headers=auth_headers(user.get("auth_token")),
-            name="/expert/conversations/[id]/claim"
-        )
+            name="/expert/conversations/[id]/claim",
+            catch_response=True
+        ) as response:
+            if response.status_code == 200:
+                outcome = "won"
+            elif response.status_code == 422:
+                outcome = "lost"
+                response.success()
+            else:
+                outcome = "error"
+            # The request event fires when this block exits, so record_claim_outcome sees these
+            response.request_meta["context"].update(claim_outcome=outcome, conversation_id=str(conversation_id))
+        self.invalidate_cached("/conversations", "/expert/queue")
         # If claim successful, add to this expert's conversation list
-        if response.status_code == 200:
+        if outcome == "won":
             user_store.add_conversation(user.get("user_id"), conversation_id)
             return True
         return False
@@ -536,40 +1602,95 @@ class ChatBackend:
         if conversation:
             conversation_id = conversation.get("id")
             # Post initial message
+            posted_at = time.time()
             if self.post_message(user, conversation_id, message):
+                self.probe_job_pipeline(user, conversation, QUESTION_CATEGORY_BY_TITLE.get(title, "other"), posted_at)
                 return conversation_id
         return None
 
-    def select_random_question(self):
-        """Select a random question with weighted distribution (33% each category)."""
-        category = random.choices(
-            ["faq", "expertise", "unrelated"],
-            weights=[33, 33, 34],  # Sums to 100
-            k=1
-        )[0]
-        
-        if category == "faq":
-            questions = FAQ_ANSWERABLE_QUESTIONS
-        elif category == "expertise":
-            questions = EXPERTISE_ONLY_QUESTIONS
-        else:
-            questions = UNRELATED_QUESTIONS
-        
-        title = random.choice(list(questions.keys()))
-        return (title, questions[title])
-
+    def probe_job_pipeline(self, user, conversation, category, posted_at):
+        """With --job-probe, watch a share of first messages for the jobs they enqueue in a separate greenlet."""
+        options = self.environment.parsed_options
+        fraction = getattr(options, "job_probe", 0) if options else 0
+        # Sampled from the module random, so probing leaves seeded workload plans unchanged
+        if fraction > 0 and random.random() < fraction:
+            job_probes.spawn(self.watch_job_pipeline, user, conversation, category, posted_at)
 
-class NewUser(HttpUser, ChatBackend):
+    def watch_job_pipeline(self, user, conversation, category, posted_at):
+        """
+        Poll the conversation and message feeds until the conversation shows an assigned expert
+        (AssignExpertJob) and an expert reply (AutoRespondToQuestionJob), or --job-probe-timeout
+        passes, then record how long after posted_at each showed up. A probe cut off by the end
+        of the test is recorded too, with its missing stages undelivered, so slow jobs still count.
+        """
+        conversation_id = str(conversation.get("id"))
+        params = {"userId": user.get("user_id"), "since": conversation.get("createdAt")}
+        headers = auth_headers(user.get("auth_token"))
+        stage_ms = dict.fromkeys(JobPipelineStats.STAGES)
+        try:
+            self.poll_job_pipeline(conversation_id, params, headers, posted_at, stage_ms)
+        except gevent.GreenletExit:
+            job_pipeline_stats.record(category, posted_at, stage_ms, cut_off=True)
+            raise
+        job_pipeline_stats.record(category, posted_at, stage_ms)
+
+    def poll_job_pipeline(self, conversation_id, params, headers, posted_at, stage_ms):
+        """watch_job_pipeline's polling loop; fills in stage_ms as the stages show up."""
+        options = self.environment.parsed_options
+        while None in stage_ms.values() and time.time() - posted_at < options.job_probe_timeout:
+            gevent.sleep(options.job_probe_interval)
+            if stage_ms["assigned"] is None:
+                response = self.client.get(
+                    "/api/conversations/updates", params=params, headers=headers,
+                    name="/api/conversations/updates (job probe)"
+                )
+                if response.status_code == 200 and any(
+                    str(c.get("id")) == conversation_id and c.get("assignedExpertId") for c in response.json()
+                ):
+                    stage_ms["assigned"] = (time.time() - posted_at) * 1000
+            if stage_ms["replied"] is None:
+                response = self.client.get(
+                    "/api/messages/updates", params=params, headers=headers,
+                    name="/api/messages/updates (job probe)"
+                )
+                if response.status_code == 200 and any(
+                    str(m.get("conversationId")) == conversation_id and m.get("senderRole") == "expert"
+                    for m in response.json()
+                ):
+                    stage_ms["replied"] = (time.time() - posted_at) * 1000
+
+    @client_code
+    def select_random_question(self):
+        """Select a random question with the current category mix (33% each category unless a profile changes it)."""
+        if self.plan:
+            return question_mix.choose_planned(self.plan)
+        return question_mix.choose()
+
+    @client_code
+    def select_message(self):
+        """Select a follow-up message: a sized payload with --message-size, otherwise a sample message."""
+        if payload_generator:
+            return payload_generator.message(self.rng)
+        if self.plan:
+            return SAMPLE_MESSAGES[self.plan.integer("message", len(SAMPLE_MESSAGES))]
+        return random.choice(SAMPLE_MESSAGES)
+
+
+class NewUser(ChatHttpUser, ChatBackend):
     """
     Persona: A brand new user registering for the first time.
     Registers, creates their first conversation, and posts initial message.
     Weight: 1 (~10% of simulated users)
     """
     weight = 1
-    wait_time = between(1, 3)
+    think_time = ThinkTime("uniform", low=1, high=3)  # Seconds between tasks
+    wait_time = ChatBackend.profiled_wait_time
+    abstract = PERSONAS_DISABLED
 
     def on_start(self):
         """Register a new user."""
+        self.start_workload_plan()
+        self.start_arrival_schedule()
         self.last_check_time = None
         username = user_name_generator.generate_username()
         password = username
@@ -592,18 +1713,24 @@ class NewUser(HttpUser, ChatBackend):
         self.get_conversations(self.user)
 
 
-class IdleUser(HttpUser, ChatBackend):
+class IdleUser(ChatHttpUser, ChatBackend):
     """
     Persona: A user that logs in and is idle but their browser polls for updates.
     Checks for message updates, conversation updates, and expert queue updates every 5 seconds.
     Weight: 4 (~40% of simulated users)
     """
     weight = 4
-    wait_time = between(5, 5)  # Check every 5 seconds
+    think_time = ThinkTime("constant", value=5)  # Check every 5 seconds
+    wait_time = ChatBackend.profiled_wait_time
+    abstract = IDLE_TRANSPORT != "poll" or IDLE_MODE != "users" or PERSONAS_DISABLED
 
     def on_start(self):
         """Called when a simulated user starts."""
+        self.start_workload_plan()
+        self.start_arrival_schedule()
         self.last_check_time = None
+        self.polling = getattr(self.environment.parsed_options, "polling", "clock")
+        self.cursors = {}  # feed -> (newest server timestamp seen, ids of the rows at it), for cursor polling
         self.user = user_store.get_random_user()
         if not self.user:
             # Fallback: register a new user if store is empty
@@ -614,29 +1741,309 @@ class IdleUser(HttpUser, ChatBackend):
     @task
     def poll_for_updates(self):
         """Poll for all types of updates."""
-        # Check conversation updates
-        self.check_conversation_updates(self.user)
+        if self.polling == "cursor":
+            # All three feeds at once, each resuming from the newest server timestamp it returned
+            results, repeated = self.poll_with_cursors(self.user, self.cursors)
+        else:
+            # Conversation, message and expert queue updates, one after another
+            results = [self.fetch_updates(self.user, feed, self.clock_since()) for feed in UPDATE_FEEDS]
+            repeated = 0
 
-        # Check message updates
-        self.check_message_updates(self.user)
+            # Update last check time
+            self.last_check_time = datetime.utcnow()
 
-        # Check expert queue updates
-        self.check_expert_queue_updates(self.user)
+        poll_stats.record(self.polling, results, repeated)
 
-        # Update last check time
-        self.last_check_time = datetime.utcnow()
 
+class IdleSwarm(ChatBackend):
+    """
+    --idle-mode multiplexed: thousands of idle polling clients driven by one scheduler greenlet
+    over one shared HTTP session, instead of one IdleUser (a greenlet, an HTTP session and an
+    instance dict) each.
+
+    A client is a row in typed array columns: the UserStore slot of its identity (spread over
+    the --user-fixture users), and the epoch time of its previous poll (clock polling) or the
+    newest server timestamp seen on each feed (cursor polling). Rows due for a poll wait in a
+    timing wheel of --idle-tick buckets. The scheduler hands due rows to a Pool of
+    --idle-concurrency polls, oldest tick first; while the pool is full the rest stay in their
+    bucket with their due time and the wheel keeps turning, so an overloaded backend shows up
+    as dispatch lag in idle_swarm_stats rather than as a stalled scheduler.
+    Polls make the same requests as IdleUser's and wait IdleUser.think_time between them,
+    so --traffic-profile changes apply to both modes.
+    """
+    def __init__(self, environment, polling, concurrency, tick):
+        self.environment = environment
+        self.polling = polling
+        self.tick = tick
+        self.pool = Pool(concurrency)
+        if HTTP_CLIENT_MODE == "fast":
+            self.client = FastHttpSession(
+                environment.host, environment.events.request, None,
+                client_pool=ChatHttpUser.client_pool, headers=ChatHttpUser.default_headers,
+            )
+        else:
+            # A cursor poll fetches its feeds at once, so it may hold one connection per feed
+            connections = concurrency * (len(UPDATE_FEEDS) if polling == "cursor" else 1)
+            self.client = HttpSession(
+                environment.host, environment.events.request, None, pool_manager=PoolManager(maxsize=connections)
+            )
+        self.slots = array("l")  # row -> UserStore slot
+        if polling == "cursor":
+            self.cursors = {feed: array("d") for feed in UPDATE_FEEDS}  # feed -> row -> newest timestamp, 0 for none
+            self.cursor_ids = {}  # (row, feed) -> ids of the rows at that cursor, only for clients that got any
+        else:
+            self.last_polls = array("d")  # row -> previous poll time, 0 before the first
+        self.wheel = TimingWheel(tick)
+        self.identities = len(user_store)  # Store size at start; clients spread over these slots
+        self.greenlets = Group()
+
+    def __len__(self):
+        return len(self.slots)
+
+    def state_bytes(self):
+        """Bytes held by the client columns, the timing wheel (array buffers) and the sparse cursor ids."""
+        columns = [self.slots] + list(self.cursors.values() if self.polling == "cursor" else [self.last_polls])
+        cursor_ids = getattr(self, "cursor_ids", {})
+        ids_bytes = sys.getsizeof(cursor_ids) + sum(sys.getsizeof(ids) for ids in cursor_ids.values())
+        return sum(column.itemsize * len(column) for column in columns) + self.wheel.state_bytes() + ids_bytes
+
+    def start(self, clients, spawn_rate, partition_index, partition_count):
+        self.greenlets.spawn(self.run_scheduler)
+        self.greenlets.spawn(self.spawn_clients, clients, spawn_rate, partition_index, partition_count)
+
+    def stop(self):
+        self.greenlets.kill()
+        self.pool.kill()
+        self.update_stats()
+
+    def update_stats(self):
+        idle_swarm_stats.update(len(self), self.state_bytes(), IdleUser.think_time.quantile(0.5))
+
+    def spawn_clients(self, clients, spawn_rate, partition_index, partition_count):
+        """
+        Add clients at spawn_rate per second; each polls right away, as a freshly spawned IdleUser does.
+        Every wake-up adds all the clients due by then, so a busy process catches up in one go.
+        """
+        started = time.monotonic()
+        added = 0
+        while added < clients:
+            due = min(clients, int((time.monotonic() - started) * spawn_rate) + 1)
+            for row in range(added, due):
+                self.add_client(self.identity_slot(row * partition_count + partition_index))
+                if row % 100 == 0:
+                    self.update_stats()
+            added = due
+            gevent.sleep(max(0, started + added / spawn_rate - time.monotonic()))
+        self.update_stats()
+
+    def identity_slot(self, key):
+        """The UserStore slot for key, spread evenly over the users the store held at start."""
+        return key % self.identities
+
+    def add_client(self, slot):
+        row = len(self.slots)
+        self.slots.append(slot)
+        if self.polling == "cursor":
+            for column in self.cursors.values():
+                column.append(0.0)
+        else:
+            self.last_polls.append(0.0)
+        self.wheel.schedule(row, time.monotonic())
 
-class ActiveUser(HttpUser, ChatBackend):
+    def run_scheduler(self):
+        """
+        Hand the rows due by now to the poll pool, oldest tick first, without ever blocking on it:
+        rows the pool has no room for stay in their bucket until a poll finishes.
+        """
+        while True:
+            self.wheel.turn(time.monotonic())
+            while not self.pool.full():
+                rows, due = self.wheel.take_due(self.pool.free_count())
+                if not rows:
+                    break
+                for row in rows:
+                    self.pool.spawn(self.poll, row, due)
+            if self.pool.full():
+                self.pool.wait_available(timeout=self.tick)
+            else:
+                gevent.sleep(max(0, self.wheel.next_tick_time() - time.monotonic()))
+
+    def poll(self, row, due):
+        """Poll all feeds for one client, as IdleUser.poll_for_updates does, then schedule its next poll."""
+        idle_swarm_stats.record_lag(time.monotonic() - due)
+        user = user_store.user_slots[self.slots[row]]
+        try:
+            if self.polling == "cursor":
+                cursors = {
+                    feed: (format_cursor(column[row]), self.cursor_ids.get((row, feed), frozenset()))
+                    for feed, column in self.cursors.items() if column[row]
+                }
+                results, repeated = self.poll_with_cursors(user, cursors)
+                for feed, (cursor, ids) in cursors.items():
+                    self.cursors[feed][row] = parse_cursor(cursor)
+                    self.cursor_ids[(row, feed)] = ids
+            else:
+                previous = self.last_polls[row]
+                since = datetime.fromtimestamp(previous, timezone.utc).isoformat() if previous else None
+                results = [self.fetch_updates(user, feed, since) for feed in UPDATE_FEEDS]
+                repeated = 0
+                self.last_polls[row] = time.time()
+            poll_stats.record(f"{self.polling}, multiplexed", results, repeated)
+        finally:
+            self.wheel.schedule(row, time.monotonic() + IdleUser.think_time.sample())
+
+
+class PushUser(ChatHttpUser, ChatBackend):
+    """
+    Persona: An idle user whose browser receives updates over a push connection instead of polling.
+    Replaces IdleUser when --idle-transport is sse or long-poll.
+    Each delivered event is reported as a request whose response time is the end-to-end
+    delivery latency, from the server's sentAt stamp to receipt here.
+    Weight: 4 (~40% of simulated users)
+    """
+    weight = 4
+    wait_time = between(1, 2)  # Reconnect backoff once a connection drops
+    abstract = IDLE_TRANSPORT == "poll" or PERSONAS_DISABLED
+
+    def on_start(self):
+        """Pick a stored user, registering one if the store is empty."""
+        self.cursor = None  # id of the last delivered event
+        self.user = user_store.get_random_user()
+        if not self.user:
+            # Fallback: register a new user if store is empty
+            username = user_name_generator.generate_username()
+            password = username
+            self.user = self.register(username, password)
+
+    @task
+    def receive_updates(self):
+        """Hold a push connection until it drops; wait_time then backs off before reconnecting."""
+        if IDLE_TRANSPORT == "sse":
+            self.stream_events(self.user)
+        else:
+            while self.long_poll(self.user):
+                pass
+
+    def report_event(self, name, event_type, data, length):
+        """Report one delivered event with its end-to-end delivery latency."""
+        latency_ms = max(0.0, time.time() * 1000 - float(data.get("sentAt", 0)))
+        push_stats.event_delivered(IDLE_TRANSPORT, latency_ms)
+        self.environment.events.request.fire(
+            request_type=IDLE_TRANSPORT.upper(),
+            name=f"{name} [{event_type}]",
+            response_time=latency_ms,
+            response_length=length,
+            exception=None,
+            context={},
+        )
+
+    def stream_events(self, user):
+        """
+        Read a Server-Sent Events stream over a raw socket, so a held stream costs the same
+        in either HTTP client mode and does not occupy a pooled connection.
+        """
+        name = "/api/updates/stream"
+        target = urlsplit(self.host)
+        port = target.port or (443 if target.scheme == "https" else 80)
+        path = f"{name}?{urlencode({'userId': user.get('user_id')})}"
+        started = time.perf_counter()
+        sock = None
+        push_stats.connection_opened(IDLE_TRANSPORT)
+        try:
+            sock = socket.create_connection((target.hostname, port), timeout=30)
+            if target.scheme == "https":
+                sock = ssl.create_default_context().wrap_socket(sock, server_hostname=target.hostname)
+            headers = {
+                "Host": target.netloc,
+                "Accept": "text/event-stream",
+                "Authorization": f"Bearer {user.get('auth_token')}",
+            }
+            if self.cursor:
+                headers["Last-Event-ID"] = str(self.cursor)
+            request = f"GET {path} HTTP/1.1\r\n" + "".join(f"{k}: {v}\r\n" for k, v in headers.items()) + "\r\n"
+            sock.sendall(request.encode())
+            stream = sock.makefile("rb")
+            status_line = stream.readline().decode("latin-1")
+            while stream.readline() not in (b"\r\n", b"\n", b""):
+                pass  # Skip response headers
+            status = int(status_line.split(" ")[1]) if status_line else 0
+            self.environment.events.request.fire(
+                request_type="SSE",
+                name=name,
+                response_time=(time.perf_counter() - started) * 1000,
+                response_length=0,
+                exception=None if status == 200 else Exception(f"Stream rejected: {status_line.strip()}"),
+                context={},
+            )
+            if status != 200:
+                return
+            # Between events the stream only sends heartbeats, so no read timeout
+            sock.settimeout(None)
+            event_type, data_lines = "message", []
+            for raw_line in stream:
+                line = raw_line.decode().rstrip("\r\n")
+                if line.startswith("event:"):
+                    event_type = line[6:].strip()
+                elif line.startswith("data:"):
+                    data_lines.append(line[5:].strip())
+                elif line.startswith("id:"):
+                    self.cursor = line[3:].strip()
+                elif not line and data_lines:
+                    payload = "\n".join(data_lines)
+                    self.report_event(name, event_type, json.loads(payload), len(payload))
+                    event_type, data_lines = "message", []
+        except OSError as e:
+            self.environment.events.request.fire(
+                request_type="SSE",
+                name=name,
+                response_time=(time.perf_counter() - started) * 1000,
+                response_length=0,
+                exception=e,
+                context={},
+            )
+        finally:
+            push_stats.connection_closed(IDLE_TRANSPORT)
+            if sock:
+                sock.close()
+
+    def long_poll(self, user):
+        """Wait on one long-poll request and report the events it returns. Returns False on failure."""
+        name = "/api/updates/long-poll"
+        params = {"userId": user.get("user_id")}
+        if self.cursor:
+            params["cursor"] = self.cursor
+        push_stats.connection_opened(IDLE_TRANSPORT)
+        try:
+            response = self.client.get(
+                name,
+                params=params,
+                headers=auth_headers(user.get("auth_token")),
+                name=name
+            )
+        finally:
+            push_stats.connection_closed(IDLE_TRANSPORT)
+        if response.status_code != 200:
+            return False
+        for event in response.json():
+            self.cursor = event.get("id")
+            self.report_event(name, event.get("type"), event.get("data", {}), 0)
+        return True
+
+
+class ActiveUser(ChatHttpUser, ChatBackend):
     """
     Persona: An active user that creates conversations, posts messages, and browses.
     Weight: 3 (~30% of simulated users)
     """
     weight = 3
-    wait_time = between(1, 5)
+    think_time = ThinkTime("uniform", low=1, high=5)  # Seconds between tasks
+    wait_time = ChatBackend.profiled_wait_time
+    abstract = PERSONAS_DISABLED
 
     def on_start(self):
         """Login or register the user."""
+        self.start_workload_plan()
+        self.start_arrival_schedule()
         self.last_check_time = None
         self.user = user_store.get_random_user()
         if not self.user:
@@ -651,7 +2058,7 @@ class ActiveUser(HttpUser, ChatBackend):
         conversations = self.get_conversations(self.user)
         if conversations and len(conversations) > 0:
             # View a random conversation's details
-            conv = random.choice(conversations)
+            conv = self.rng.choice(conversations)
             self.get_conversation(self.user, conv.get("id"))
 
     @task(2)
@@ -665,7 +2072,7 @@ class ActiveUser(HttpUser, ChatBackend):
         """Post a message to a randomly selected conversation that this user owns."""
         conversation_id = user_store.get_random_conversation(self.user.get("user_id"))
         if conversation_id:
-            content = random.choice(SAMPLE_MESSAGES)
+            content = self.select_message()
             self.post_message(self.user, conversation_id, content)
 
     @task(3)
@@ -683,7 +2090,7 @@ class ActiveUser(HttpUser, ChatBackend):
         self.last_check_time = datetime.utcnow()
 
 
-class ExpertUser(HttpUser, ChatBackend):
+class ExpertUser(ChatHttpUser, ChatBackend):
     """
     Persona: An expert user that claims and responds to conversations.
     Fetches expert queue, claims conversations, reads messages, and posts responses.
@@ -691,10 +2098,14 @@ class ExpertUser(HttpUser, ChatBackend):
     Weight: 2 (~20% of simulated users)
     """
     weight = 2
-    wait_time = between(2, 8)
+    think_time = ThinkTime("uniform", low=2, high=8)  # Seconds between tasks
+    wait_time = ChatBackend.profiled_wait_time
+    abstract = PERSONAS_DISABLED
 
     def on_start(self):
         """Login or register the expert user and set up their profile."""
+        self.start_workload_plan()
+        self.start_arrival_schedule()
         self.last_check_time = None
         self.user = user_store.get_random_user()
         if not self.user:
@@ -706,67 +2117,79 @@ class ExpertUser(HttpUser, ChatBackend):
         # A new user is created with 10% (new user) chance,
         # A new expert profile is set up 20% (set up chance) * 20% (expert chance) = 4% of the time
         # This means for every new user, there is a 40% chance they will be an expert with profile
-        if random.randint(1, 100) <= 20:
+        if self.rng.randint(1, 100) <= 20:
             self.setup_expert_profile()
 
     def setup_expert_profile(self):
         """Set up expert profile with bio and knowledge base links."""
-        # Select a random expertise area
-        expertise = random.choice(list(EXPERT_BIOS.keys()))
-        bio_data = EXPERT_BIOS[expertise]
-        
-        bio = bio_data["bio"]
-        knowledge_base_links = bio_data["urls"]
-        
+        bio, knowledge_base_links = self.select_expert_bio()
+
         # Update the expert profile
         self.update_expert_profile(self.user, bio, knowledge_base_links)
 
+    @client_code
+    def select_expert_bio(self):
+        """Select a random expertise area's bio and knowledge base links."""
+        if self.plan:
+            expertise = EXPERT_BIO_KEYS[self.plan.integer("expert_bio", len(EXPERT_BIO_KEYS))]
+        else:
+            expertise = random.choice(EXPERT_BIO_KEYS)
+        bio_data = EXPERT_BIOS[expertise]
+        options = self.environment.parsed_options
+        host = getattr(options, "knowledge_base_host", "") if options else ""
+        if host:
+            # mock_llm_server.py serves https://site/path as {host}/site/path
+            return bio_data["bio"], [f"{host.rstrip('/')}/{url.split('://', 1)[1]}" for url in bio_data["urls"]]
+        return bio_data["bio"], bio_data["urls"]
+
     @task(4)
     def respond_to_conversations(self):
         """
         Main expert workflow: fetch queue, read messages, post responses.
         This chains multiple requests to simulate real expert behavior.
         """
-        # 1. Fetch the expert queue
-        queue = self.get_expert_queue(self.user)
-        if not queue:
-            return
+        with self.workflow_trace("respond_to_conversations"):
+            # 1. Fetch the expert queue
+            queue = self.get_expert_queue(self.user)
+            if not queue:
+                return
 
-        # 2. Get assigned conversations (conversations this expert has claimed)
-        assigned = queue.get("assignedConversations", [])
+            # 2. Get assigned conversations (conversations this expert has claimed)
+            assigned = queue.get("assignedConversations", [])
 
-        if not assigned:
-            # No assigned conversations, try to claim one from waiting
-            waiting = queue.get("waitingConversations", [])
-            if waiting:
-                conv = random.choice(waiting)
-                self.claim_conversation(self.user, conv.get("id"))
-            return
+            if not assigned:
+                # No assigned conversations, try to claim one from waiting
+                waiting = queue.get("waitingConversations", [])
+                if waiting:
+                    conv = self.rng.choice(waiting)
+                    self.claim_conversation(self.user, conv.get("id"))
+                return
 
-        # 3. Choose random subset of assigned conversations (up to 3)
-        num_to_respond = min(len(assigned), random.randint(1, 3))
-        conversations_to_respond = random.sample(assigned, num_to_respond)
+            # 3. Choose random subset of assigned conversations (up to 3)
+            num_to_respond = min(len(assigned), self.rng.randint(1, 3))
+            conversations_to_respond = self.rng.sample(assigned, num_to_respond)
 
-        # 4. For each conversation: load messages and post a response
-        for conv in conversations_to_respond:
-            conv_id = conv.get("id")
+            # 4. For each conversation: load messages and post a response
+            for conv in conversations_to_respond:
+                conv_id = conv.get("id")
 
-            # Load messages for this conversation
-            self.get_messages(self.user, conv_id)
+                # Load messages for this conversation
+                self.get_messages(self.user, conv_id)
 
-            # Post a response message
-            response = random.choice(SAMPLE_MESSAGES)
-            self.post_message(self.user, conv_id, response)
+                # Post a response message
+                response = self.select_message()
+                self.post_message(self.user, conv_id, response)
 
     @task(2)
     def claim_waiting_conversation(self):
         """Check queue and claim a waiting conversation."""
-        queue = self.get_expert_queue(self.user)
-        if queue:
-            waiting = queue.get("waitingConversations", [])
-            if waiting:
-                conv = random.choice(waiting)
-                self.claim_conversation(self.user, conv.get("id"))
+        with self.workflow_trace("claim_waiting_conversation"):
+            queue = self.get_expert_queue(self.user)
+            if queue:
+                waiting = queue.get("waitingConversations", [])
+                if waiting:
+                    conv = self.rng.choice(waiting)
+                    self.claim_conversation(self.user, conv.get("id"))
 
     @task(1)
     def view_expert_profile(self):
@@ -777,7 +2200,7 @@ class ExpertUser(HttpUser, ChatBackend):
     def update_profile_occasionally(self):
         """Occasionally update expert profile (triggers FAQ generation and scraping)."""
         # 10% chance to update profile
-        if random.randint(1, 100) <= 10:
+        if self.rng.randint(1, 100) <= 10:
             self.setup_expert_profile()
 
     @task(2)
@@ -789,7 +2212,146 @@ class ExpertUser(HttpUser, ChatBackend):
         self.last_check_time = datetime.utcnow()
 
 
-class StepLoadShape(LoadTestShape):
+class ReplayUser(ChatHttpUser, ChatBackend):
+    """
+    Persona: replays requests of a recorded trace (--replay-trace) as they fall due.
+    Each trace user is mapped onto a stored identity by hash when first seen, and keeps it for
+    the run, so a trace user's requests always carry the same token; conversation ids are
+    mapped onto that identity's own (or another user's for the expert claim routes).
+    Only active with --replay-trace, which disables every other persona.
+    """
+    wait_time = constant(0)  # Pacing comes from the dispatcher
+    abstract = not REPLAY_TRACE
+
+    def on_start(self):
+        """Register one identity per ReplayUser unless a fixture already provides enough."""
+        self.user = None
+        if len(user_store) < self.environment.runner.user_count:
+            username = user_name_generator.generate_username()
+            self.user = self.register(username, username)
+
+    @task
+    def replay_next(self):
+        """Take the next due request and replay it, recording how late it started."""
+        scheduled, offset, request = replay_queue.get()
+        try:
+            lag_ms = max(0.0, time.monotonic() - scheduled) * 1000
+            replay_stats.record(offset, lag_ms, self.environment.parsed_options.replay_lag_ms)
+            self.replay(request)
+        finally:
+            replay_queue.task_done()
+
+    def identity_for(self, trace_user):
+        """The identity a trace user was mapped to when first seen; the store still grows afterwards."""
+        if trace_user is None:
+            return user_store.get_random_user()
+        identity = replay_identities.get(trace_user)
+        if identity is None:
+            identity = user_store.get_user_for_key(zlib.crc32(trace_user.encode()))
+            if identity is not None:
+                replay_identities[trace_user] = identity
+        return identity
+
+    def replay(self, request):
+        """Rewrite a trace request onto a stored identity and send it."""
+        parts = urlsplit(request.path)
+        path = parts.path
+        if path == "/auth/register":
+            username = user_name_generator.generate_username()
+            self.register(username, username)
+            return
+        identity = self.identity_for(request.user)
+        if identity is None:
+            return
+        if path == "/auth/login":
+            self.login(identity["username"], identity["username"])
+            return
+
+        user_id = identity.get("user_id")
+        # Trace conversation ids mean nothing here: use one of the identity's own conversations,
+        # or for the expert routes (claim, unclaim) one that another user asked
+        path = re.sub(
+            r"^(/conversations/)\d+",
+            lambda match: match.group(1) + str(user_store.get_random_conversation(user_id) or 0),
+            path,
+        )
+        path = re.sub(
+            r"^(/expert/conversations/)\d+",
+            lambda match: match.group(1) + str(user_store.get_random_other_conversation(user_id) or 0),
+            path,
+        )
+        query = [
+            (key, str(user_id) if key in ("userId", "expertId") else value)
+            for key, value in parse_qsl(parts.query)
+        ]
+        body = request.body
+        if isinstance(body, dict) and "conversationId" in body:
+            body = {**body, "conversationId": user_store.get_random_conversation(user_id) or body["conversationId"]}
+
+        response = self.client.request(
+            request.method,
+            path + (f"?{urlencode(query)}" if query else ""),
+            json=body,
+            headers=auth_headers(identity.get("auth_token")),
+            name=re.sub(r"/\d+", "/[id]", parts.path),
+        )
+        if request.method == "POST" and path == "/conversations" and response.status_code == 201:
+            user_store.add_conversation(user_id, response.json().get("id"))
+
+
+class ClaimContentionUser(ChatHttpUser, ChatBackend):
+    """
+    Persona: an expert racing the others for the waiting queue (--scenario claim-contention).
+    Fetches /expert/queue and claims random.choice(waiting), as ExpertUser does, without
+    think time; waits --contention-poll seconds when the queue is empty.
+    Only active in the claim contention scenario, which disables every other persona.
+    """
+    wait_time = constant(0)
+    abstract = SCENARIO != "claim-contention"
+
+    def on_start(self):
+        """Register a fresh expert, so K users are K distinct experts."""
+        username = user_name_generator.generate_username()
+        self.user = self.register(username, username) or self.login(username, username)
+        if not self.user:
+            raise Exception(f"Failed to register or login expert {username}")
+
+    @task
+    def claim_next(self):
+        queue = self.get_expert_queue(self.user)
+        waiting = queue.get("waitingConversations", []) if queue else []
+        if not waiting:
+            gevent.sleep(self.environment.parsed_options.contention_poll)
+            return
+        self.claim_conversation(self.user, random.choice(waiting).get("id"))
+
+
+# Personas a --traffic-profile configures: name -> (class, its tasks by function name, its own settings)
+PROFILED_PERSONAS = {
+    cls.__name__: (
+        cls,
+        {task.__name__: task for task in cls.tasks},
+        PersonaProfile(cls.weight, cls.think_time, dict(Counter(task.__name__ for task in cls.tasks))),
+    )
+    for cls in (NewUser, IdleUser, ActiveUser, ExpertUser)
+}
+
+
+class StageLog:
+    """Mixin for load shapes: records the wall-clock start of every stage for {csv prefix}_stages.json."""
+    stage_log = None
+    current_stage = None
+
+    def mark_stage(self, stage, label):
+        """Note that stage (any comparable key) is running; a new key starts a new stage."""
+        if stage != self.current_stage:
+            if self.stage_log is None:
+                self.stage_log = []
+            self.current_stage = stage
+            self.stage_log.append({"time": time.time(), "label": label})
+
+
+class StepLoadShape(StageLog, LoadTestShape):
     """
     Dynamic arrival rate load test shape.
     Doubles the spawn rate every 60 seconds to find breaking point.
@@ -802,7 +2364,10 @@ class StepLoadShape(LoadTestShape):
         - 60s: 32 users/sec (target: ~3720 users)
         - 60s: 64 users/sec (target: ~7560 users)
         - 60s: 128 users/sec (continues until breaking point)
+
+    Active unless --load-shape selects another shape.
     """
+    abstract = LOAD_SHAPE != "step"
 
     stages = [
         {"duration": 60, "users": 120, "spawn_rate": 2},
@@ -817,10 +2382,125 @@ class StepLoadShape(LoadTestShape):
     def tick(self):
         run_time = self.get_run_time()
 
-        for stage in self.stages:
+        for index, stage in enumerate(self.stages):
             if run_time < stage["duration"]:
+                self.mark_stage(index, f"{stage['users']} users @ {stage['spawn_rate']}/s")
                 tick_data = (stage["users"], stage["spawn_rate"])
                 return tick_data
 
         # After all stages, maintain last stage
         return (self.stages[-1]["users"], self.stages[-1]["spawn_rate"])
+
+
+class AdaptiveLoadShape(StageLog, LoadTestShape):
+    """
+    Breaking-point search driven by live runner stats.
+
+    Holds each user count for --adaptive-step-seconds, then judges the step from the
+    current-window p95, failure ratio and RPS:
+        - broken if p95 > --adaptive-p95-ms or failures/RPS > --adaptive-failure-ratio
+        - broken if RPS grew less than --adaptive-plateau of the proportional gain over
+          the last healthy step (more users, but not more throughput)
+
+    Doubles the users until a step breaks, then bisects between the last healthy and
+    the first broken user count until they are within --adaptive-resolution. The last
+    healthy step is the saturation point; it is written to --adaptive-result together
+    with every judged step, and the run stops.
+
+    Active when --load-shape is 'adaptive'.
+    """
+    abstract = LOAD_SHAPE != "adaptive"
+    ramp_seconds = 10  # Each step reaches its user count within this time
+
+    def __init__(self):
+        super().__init__()
+        self.users = None
+        self.healthy = None  # (users, rps) of the highest healthy step
+        self.broken_users = None
+        self.step_started = 0
+        self.steps = []
+
+    def tick(self):
+        options = self.runner.environment.parsed_options
+        run_time = self.get_run_time()
+        if self.users is None:
+            self.users = options.adaptive_start_users
+            self.step_started = run_time
+
+        if run_time - self.step_started >= options.adaptive_step_seconds:
+            self.judge_step(options)
+            self.users = self.next_users(options)
+            if self.users is None:
+                self.write_result(options)
+                return None
+            self.step_started = run_time
+
+        self.mark_stage(len(self.steps), f"{self.users} users")
+        spawn_rate = max(1, abs(self.users - self.runner.user_count) / self.ramp_seconds)
+        return self.users, spawn_rate
+
+    def judge_step(self, options):
+        """Record the step that just finished and whether the backend kept up with it."""
+        total = self.runner.stats.total
+        rps = total.current_rps
+        failure_ratio = total.current_fail_per_sec / rps if rps > 0 else 1.0
+        p95 = total.get_current_response_time_percentile(0.95) or 0
+        reasons = []
+        if p95 > options.adaptive_p95_ms:
+            reasons.append("p95")
+        if failure_ratio > options.adaptive_failure_ratio:
+            reasons.append("failures")
+        if self.healthy and self.users > self.healthy[0]:
+            healthy_users, healthy_rps = self.healthy
+            expected_gain = healthy_rps * (self.users / healthy_users - 1)
+            if rps - healthy_rps < options.adaptive_plateau * expected_gain:
+                reasons.append("rps plateau")
+
+        self.steps.append({
+            "users": self.users,
+            "rps": round(rps, 2),
+            "p95_ms": p95,
+            "failure_ratio": round(failure_ratio, 4),
+            "broken": reasons,
+        })
+        logging.info(
+            f"Adaptive step: {self.users} users, {rps:.1f} RPS, p95 {p95}ms, "
+            f"{failure_ratio:.1%} failures -> {', '.join(reasons) or 'healthy'}"
+        )
+        if reasons:
+            self.broken_users = self.users
+        elif not self.healthy or self.users > self.healthy[0]:
+            self.healthy = (self.users, rps)
+
+    def next_users(self, options):
+        """Double until a step breaks, then bisect; None once the knee is bracketed closely enough."""
+        if self.broken_users is None:
+            if self.users >= options.adaptive_max_users:
+                return None
+            return min(self.users * 2, options.adaptive_max_users)
+        healthy_users = self.healthy[0] if self.healthy else 0
+        if self.broken_users - healthy_users <= max(1, options.adaptive_resolution * self.broken_users):
+            return None
+        return (healthy_users + self.broken_users) // 2
+
+    def write_result(self, options):
+        """Write the measured saturation point and the judged steps as JSON."""
+        healthy_users, healthy_rps = self.healthy or (0, 0.0)
+        result = {
+            "saturation_users": healthy_users,
+            "saturation_rps": round(healthy_rps, 2),
+            "broken_users": self.broken_users,
+            "reached_max_users": self.broken_users is None,
+            "thresholds": {
+                "p95_ms": options.adaptive_p95_ms,
+                "failure_ratio": options.adaptive_failure_ratio,
+                "plateau": options.adaptive_plateau,
+            },
+            "steps": self.steps,
+        }
+        with open(options.adaptive_result, "w") as f:
+            json.dump(result, f, indent=2)
+        logging.info(
+            f"Breaking point: {healthy_users} users at {healthy_rps:.1f} RPS "
+            f"(broke at {self.broken_users}), written to {options.adaptive_result}"
+        )
@@ -0,0 +1,410 @@
+"""
+Deterministic local stand-in for Amazon Bedrock and the experts' knowledge base sites.
+
+The background jobs (AssignExpertJob, AutoRespondToQuestionJob, GenerateExpertFaqJob,
+GenerateConversationSummaryJob) call Bedrock, and GenerateExpertFaqJob first scrapes the
+EXPERT_BIOS URLs with WebScraperService. Offline these fail, and online their latency is
+not ours to control. This server answers both, so the job pipeline can be load-tested
+reproducibly and its throughput measured:
+
+    POST /model/{modelId}/converse     Bedrock Converse API. The reply depends only on the
+                                       prompt: the expert whose bio shares the most words
+                                       with the question (or NONE), the FAQ of the scraped
+                                       sites from sample_topic_faq.json, the FAQ answer whose
+                                       question matches (or NO_AUTO_RESPONSE), or the first
+                                       line of the conversation as its summary.
+    GET  /{site host and path}         Canned knowledge base page of a sample_topic_faq.json
+                                       site, e.g. /adyahrastogi.github.io/, linking one page
+                                       per topic, which the scraper follows (depth 1)
+    GET  /topics/{slug}                A topic's questions and answers
+    GET  /stats                        Per prompt kind counts, queueing and service time
+
+Latency follows token counts (about 4 characters per token): --ttft-ms before the first
+token, then --tokens-per-second, plus --prefill-tokens-per-second for the prompt if set.
+At most --concurrency calls are served at once; up to --queue-limit more wait for a slot,
+and the rest are throttled with 429 ThrottlingException, as Bedrock does past its quota.
+
+Pointing the backend at it (the Ruby SDK signs with any credentials; the scraper only
+follows https URLs, so serve TLS with a certificate the backend trusts):
+
+    openssl req -x509 -newkey rsa:2048 -nodes -days 30 -subj /CN=localhost -addext subjectAltName=DNS:localhost \\
+        -keyout mock.key -out mock.crt
+    python mock_llm_server.py --port 8443 --tls-cert mock.crt --tls-key mock.key --concurrency 8
+    ALLOW_BEDROCK_CALL=true BEDROCK_ENDPOINT=https://localhost:8443 SSL_CERT_FILE=mock.crt \\
+        AWS_ACCESS_KEY_ID=mock AWS_SECRET_ACCESS_KEY=mock bin/dev
+    locust -f locustfile.py --knowledge-base-host https://localhost:8443 --job-probe 0.1 --host http://localhost:3000
+
+Requests with the locust user agent still get BedrockClient's built-in fake reply; only
+the background jobs, which run outside those requests, reach this server.
+"""
+
+import argparse
+import asyncio
+import html
+import json
+import math
+import os
+import re
+import ssl
+import time
+from urllib.parse import unquote
+
+from standin_server import REASONS, Request, json_response
+
+SAMPLE_TOPIC_FAQ = os.path.join(os.path.dirname(os.path.abspath(__file__)), "sample_topic_faq.json")
+CHARS_PER_TOKEN = 4
+MIN_OVERLAP = 2  # Shared words needed for a routing or FAQ match
+MAX_FAQ_PAIRS = 6  # As ExpertFaqService's prompt asks for
+STOPWORDS = {
+    "about", "after", "also", "been", "best", "does", "from", "have", "help", "here", "into", "just", "know",
+    "like", "more", "most", "much", "need", "only", "other", "should", "some", "than", "that", "their",
+    "them", "then", "there", "these", "they", "this", "what", "when", "where", "which", "with", "would", "your",
+}
+
+# Prompt kinds, recognized by a phrase of the system prompt each service sends
+PROMPT_KINDS = [
+    ("routing", "expert routing assistant"),
+    ("faq", "builds concise, helpful FAQ entries"),
+    ("auto_reply", "You are assisting on behalf of expert"),
+    ("summary", "creates brief summaries of conversations"),
+]
+
+
+def words(text):
+    """Lowercase content words of a text, for deterministic overlap matching."""
+    return {word for word in re.findall(r"[a-z0-9]+", text.lower()) if len(word) > 3 and word not in STOPWORDS}
+
+
+def slug(value):
+    return re.sub(r"[^a-z0-9]+", "-", value.lower()).strip("-")
+
+
+def estimate_tokens(text):
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def best_match(question, candidates):
+    """The candidate key sharing the most words with question (first one on ties), or None below MIN_OVERLAP."""
+    question_words = words(question)
+    best, best_overlap = None, MIN_OVERLAP - 1
+    for key, text in candidates:
+        overlap = len(question_words & words(text))
+        if overlap > best_overlap:
+            best, best_overlap = key, overlap
+    return best
+
+
+class KnowledgeBase:
+    """The sites and topic FAQs of sample_topic_faq.json."""
+    def __init__(self, path):
+        with open(path) as f:
+            data = json.load(f)
+        topics = data.pop("All topics")
+        self.topics = {name.lower(): (name, qa) for name, qa in topics.items()}
+        self.sites = {}  # "host/path" without scheme -> list of topic names
+        for url, names in data.items():
+            self.sites[url.split("://", 1)[-1]] = names
+        self.topic_slugs = {slug(name): name for name in [*topics, *(n for names in data.values() for n in names)]}
+
+    def topic(self, name):
+        """(display name, {question: answer}) of a topic, matched case-insensitively; unknown topics have no Q&A."""
+        return self.topics.get(name.lower(), (name, {}))
+
+    def site_for(self, url_or_path):
+        """Topic names of the site a URL or mock path refers to, or None. Matches the longest site key it contains."""
+        matches = [site for site in self.sites if site in url_or_path or site.rstrip("/") == url_or_path.strip("/")]
+        return self.sites[max(matches, key=len)] if matches else None
+
+    def faq_pairs(self, topic_names):
+        """(question, answer) pairs of the given topics, with one generic pair for a topic without any."""
+        pairs = []
+        for name in topic_names:
+            display, qa = self.topic(name)
+            pairs.extend(qa.items() or [(f"Can you help with {display}?", f"Yes, {display} is one of my topics.")])
+        return pairs
+
+    def site_page(self, topic_names):
+        links = "".join(
+            f'<li><a href="/topics/{slug(name)}">{html.escape(self.topic(name)[0])}</a></li>' for name in topic_names
+        )
+        return f"<html><body><h1>Knowledge base</h1><p>Topics I write about:</p><ul>{links}</ul></body></html>"
+
+    def topic_page(self, name):
+        display, qa = self.topic(name)
+        entries = "".join(f"<h2>{html.escape(q)}</h2><p>{html.escape(a)}</p>" for q, a in qa.items())
+        return f"<html><body><h1>{html.escape(display)}</h1>{entries or '<p>Notes coming soon.</p>'}</body></html>"
+
+
+class MockLLM:
+    """Deterministic replies to the prompts the backend's services send."""
+    def __init__(self, knowledge_base):
+        self.knowledge_base = knowledge_base
+
+    @staticmethod
+    def kind(system_prompt):
+        for kind, phrase in PROMPT_KINDS:
+            if phrase in system_prompt:
+                return kind
+        return "other"
+
+    def reply(self, kind, user_prompt):
+        if kind == "routing":
+            return self.route(user_prompt)
+        if kind == "faq":
+            return self.faq(user_prompt)
+        if kind == "auto_reply":
+            return self.auto_reply(user_prompt)
+        if kind == "summary":
+            return self.summary(user_prompt)
+        return "This is a response from the mock LLM."
+
+    def route(self, prompt):
+        """AssignExpertJob: the expert whose bio best matches the question, or NONE."""
+        question, _, experts_text = prompt.partition("Available Experts:")
+        experts = re.findall(r"Expert ID: (\d+)\nUsername: [^\n]*\nBio: ([^\n]*)", experts_text)
+        return best_match(question, experts) or "NONE"
+
+    def faq(self, prompt):
+        """ExpertFaqService: up to MAX_FAQ_PAIRS Q&A pairs of the sites named in the scraped sources."""
+        topic_names = []
+        for source in re.findall(r"Source: (\S+)", prompt):
+            for name in self.knowledge_base.site_for(source) or []:
+                if name not in topic_names:
+                    topic_names.append(name)
+        pairs = self.knowledge_base.faq_pairs(topic_names)[:MAX_FAQ_PAIRS]
+        if not pairs:
+            return "FAQ unavailable"
+        return "\n".join(f"Q: {question}\nA: {answer}" for question, answer in pairs)
+
+    def auto_reply(self, prompt):
+        """AutoResponderService: the answer of the FAQ question matching the user's, or the skip token."""
+        faq, _, question = prompt.partition("User question:")
+        pairs = re.findall(r"Q: ([^\n]*)\nA: ([^\n]*)", faq)
+        answer = best_match(question, [(a, q) for q, a in pairs])
+        return answer or "NO_AUTO_RESPONSE"
+
+    def summary(self, prompt):
+        """ConversationSummaryService: the first message, without its sender."""
+        lines = prompt.partition("Summarize this conversation:")[2].strip().splitlines()
+        first = lines[0].partition(": ")[2] if lines else ""
+        return first[:100] or "Conversation"
+
+
+class MockLLMServer:
+    """asyncio HTTP/1.1 server with keep-alive for the Converse API, the canned sites and /stats."""
+    def __init__(self, knowledge_base, ttft_ms=300.0, tokens_per_second=50.0, prefill_tokens_per_second=0.0,
+                 concurrency=8, queue_limit=100, page_latency_ms=0.0):
+        self.knowledge_base = knowledge_base
+        self.llm = MockLLM(knowledge_base)
+        self.ttft_ms = ttft_ms
+        self.tokens_per_second = tokens_per_second
+        self.prefill_tokens_per_second = prefill_tokens_per_second
+        self.queue_limit = queue_limit
+        self.page_latency_ms = page_latency_ms
+        self.slots = asyncio.Semaphore(concurrency)
+        self.waiting = 0
+        self.active = 0
+        self.started = time.time()
+        self.stats = {}  # prompt kind -> totals
+        self.pages = {"served": 0, "not_found": 0}
+
+    async def handle_connection(self, reader, writer):
+        """Serve requests on one connection until the client closes it."""
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                method, target, _ = request_line.decode("latin-1").split(" ", 2)
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                if headers.get("expect", "").lower() == "100-continue":
+                    writer.write(b"HTTP/1.1 100 Continue\r\n\r\n")
+                length = int(headers.get("content-length", 0))
+                body = await reader.readexactly(length) if length else b""
+
+                status, payload, response_headers = await self.dispatch(Request(method, target, headers, body))
+                head = f"HTTP/1.1 {status} {REASONS.get(status, 'OK')}\r\nContent-Length: {len(payload)}\r\n"
+                head += "".join(f"{name}: {value}\r\n" for name, value in response_headers.items())
+                writer.write(head.encode("latin-1") + b"\r\n" + payload)
+                await writer.drain()
+                if headers.get("connection", "").lower() == "close":
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError, ssl.SSLError):
+            pass
+        finally:
+            writer.close()
+
+    async def dispatch(self, request):
+        converse = re.fullmatch(r"/model/([^/]+)/converse", request.path)
+        if converse and request.method == "POST":
+            return await self.converse(request, unquote(converse.group(1)))
+        if request.method == "GET" and request.path == "/stats":
+            return json_response(200, self.snapshot())
+        if request.method == "GET":
+            return await self.page(request)
+        return json_response(404, {"message": "Not found"})
+
+    def kind_stats(self, kind):
+        return self.stats.setdefault(kind, {
+            "requests": 0, "completed": 0, "throttled": 0, "queue_ms": 0.0, "service_ms": 0.0,
+            "input_tokens": 0, "output_tokens": 0,
+        })
+
+    async def converse(self, request, model_id):
+        """Bedrock Converse: a deterministic reply, delayed by its token counts and the concurrency limit."""
+        params = request.json()
+        system_prompt = " ".join(block.get("text", "") for block in params.get("system", []))
+        user_prompt = " ".join(
+            block.get("text", "") for message in params.get("messages", []) for block in message.get("content", [])
+        )
+        kind = self.llm.kind(system_prompt)
+        totals = self.kind_stats(kind)
+        totals["requests"] += 1
+        if self.waiting >= self.queue_limit and self.slots.locked():
+            totals["throttled"] += 1
+            return json_response(
+                429, {"message": "Too many requests, please wait before trying again."},
+                {"x-amzn-ErrorType": "ThrottlingException"},
+            )
+
+        queued = time.monotonic()
+        self.waiting += 1
+        try:
+            await self.slots.acquire()
+        finally:
+            self.waiting -= 1
+        started = time.monotonic()
+        self.active += 1
+        try:
+            text = self.llm.reply(kind, user_prompt)
+            max_tokens = params.get("inferenceConfig", {}).get("maxTokens")
+            stop_reason = "end_turn"
+            if max_tokens and estimate_tokens(text) > max_tokens:
+                text, stop_reason = text[:max_tokens * CHARS_PER_TOKEN], "max_tokens"
+            input_tokens = estimate_tokens(system_prompt + user_prompt)
+            output_tokens = estimate_tokens(text)
+            delay = self.ttft_ms / 1000 + output_tokens / self.tokens_per_second
+            if self.prefill_tokens_per_second > 0:
+                delay += input_tokens / self.prefill_tokens_per_second
+            await asyncio.sleep(delay)
+        finally:
+            self.active -= 1
+            self.slots.release()
+        finished = time.monotonic()
+        totals["completed"] += 1
+        totals["queue_ms"] += (started - queued) * 1000
+        totals["service_ms"] += (finished - started) * 1000
+        totals["input_tokens"] += input_tokens
+        totals["output_tokens"] += output_tokens
+        return json_response(200, {
+            "output": {"message": {"role": "assistant", "content": [{"text": text}]}},
+            "stopReason": stop_reason,
+            "usage": {"inputTokens": input_tokens, "outputTokens": output_tokens, "totalTokens": input_tokens + output_tokens},
+            "metrics": {"latencyMs": round((finished - queued) * 1000)},
+        })
+
+    async def page(self, request):
+        """A canned knowledge base page: a site by its original host and path, or a topic."""
+        if self.page_latency_ms > 0:
+            await asyncio.sleep(self.page_latency_ms / 1000)
+        topic = re.fullmatch(r"/topics/([^/]+)", request.path)
+        if topic and topic.group(1) in self.knowledge_base.topic_slugs:
+            content = self.knowledge_base.topic_page(self.knowledge_base.topic_slugs[topic.group(1)])
+        else:
+            # Either /{original host}/{original path}, or the original URL when DNS points its host here
+            host = request.headers.get("host", "").split(":")[0]
+            topic_names = self.knowledge_base.site_for(f"{host}{request.path}") or self.knowledge_base.site_for(request.path.lstrip("/"))
+            if topic_names is None:
+                self.pages["not_found"] += 1
+                return 404, b"<html><body>Not found</body></html>", {"Content-Type": "text/html"}
+            content = self.knowledge_base.site_page(topic_names)
+        self.pages["served"] += 1
+        return 200, content.encode(), {"Content-Type": "text/html; charset=utf-8"}
+
+    def snapshot(self):
+        """Totals per prompt kind with throughput and mean queueing and service times."""
+        elapsed = max(time.time() - self.started, 1e-9)
+        kinds = {}
+        for kind, totals in self.stats.items():
+            completed = totals["completed"] or 1
+            kinds[kind] = {
+                **totals,
+                "queue_ms": round(totals["queue_ms"]),
+                "service_ms": round(totals["service_ms"]),
+                "completed_per_second": round(totals["completed"] / elapsed, 3),
+                "mean_queue_ms": round(totals["queue_ms"] / completed, 1),
+                "mean_service_ms": round(totals["service_ms"] / completed, 1),
+            }
+        return {"uptime_s": round(elapsed, 1), "active": self.active, "waiting": self.waiting, "kinds": kinds, "pages": self.pages}
+
+    async def report_periodically(self, interval):
+        """Print one line of calls completed per prompt kind every interval seconds."""
+        previous = {}
+        while True:
+            await asyncio.sleep(interval)
+            counts = {kind: totals["completed"] for kind, totals in self.stats.items()}
+            rates = ", ".join(
+                f"{kind} {(count - previous.get(kind, 0)) / interval:.2f}/s" for kind, count in sorted(counts.items())
+            )
+            throttled = sum(totals["throttled"] for totals in self.stats.values())
+            print(f"active {self.active}, waiting {self.waiting}, throttled {throttled} total; {rates or 'idle'}", flush=True)
+            previous = counts
+
+
+async def serve(args):
+    server = MockLLMServer(
+        KnowledgeBase(args.knowledge_base),
+        ttft_ms=args.ttft_ms,
+        tokens_per_second=args.tokens_per_second,
+        prefill_tokens_per_second=args.prefill_tokens_per_second,
+        concurrency=args.concurrency,
+        queue_limit=args.queue_limit,
+        page_latency_ms=args.page_latency_ms,
+    )
+    context = None
+    if args.tls_cert:
+        context = ssl.create_default_context(ssl.Purpose.CLIENT_AUTH)
+        context.load_cert_chain(args.tls_cert, args.tls_key)
+    listener = await asyncio.start_server(server.handle_connection, args.bind, args.port, ssl=context, backlog=1024)
+    scheme = "https" if context else "http"
+    print(f"Mock LLM server listening on {scheme}://{args.bind}:{args.port}", flush=True)
+    async with listener:
+        tasks = [listener.serve_forever()]
+        if args.report_interval > 0:
+            tasks.append(server.report_periodically(args.report_interval))
+        await asyncio.gather(*tasks)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--bind", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8443)
+    parser.add_argument("--tls-cert", default="", help="PEM certificate to serve HTTPS with (default: plain HTTP)")
+    parser.add_argument("--tls-key", default="", help="PEM private key of --tls-cert")
+    parser.add_argument("--knowledge-base", default=SAMPLE_TOPIC_FAQ, help="Sites and topic FAQs to serve")
+    parser.add_argument("--ttft-ms", type=float, default=300.0, help="Time to first token of every call")
+    parser.add_argument("--tokens-per-second", type=float, default=50.0, help="Output tokens generated per second")
+    parser.add_argument("--prefill-tokens-per-second", type=float, default=0.0,
+                        help="Prompt tokens processed per second (0: prompt length adds no latency)")
+    parser.add_argument("--concurrency", type=int, default=8, help="Calls served at the same time")
+    parser.add_argument("--queue-limit", type=int, default=100,
+                        help="Calls waiting for a slot before further ones are throttled with 429")
+    parser.add_argument("--page-latency-ms", type=float, default=0.0, help="Latency of every knowledge base page")
+    parser.add_argument("--report-interval", type=float, default=10.0, help="Seconds between throughput lines (0: none)")
+    args = parser.parse_args()
+    if bool(args.tls_cert) != bool(args.tls_key):
+        parser.error("--tls-cert and --tls-key go together")
+    try:
+        asyncio.run(serve(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
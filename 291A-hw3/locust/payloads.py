@@ -0,0 +1,45 @@
+"""
+Message bodies with realistic length distributions (--message-size).
+
+Real chat messages are mostly short with a long tail of pasted logs, code and
+multi-paragraph questions, which a lognormal length distribution models well: with
+the default median of 200 characters and sigma 1.0, one message in a hundred is over
+2 KB. Bodies are slices of a text built once from the harness's sample messages and
+questions, so generating one costs a slice rather than string building per message.
+
+    lognormal - lengths lognormally distributed around --message-size-median
+    uniform   - lengths uniform between 1 and twice --message-size-median
+Lengths are capped at --message-size-max characters.
+"""
+
+import math
+
+PAYLOAD_DISTRIBUTIONS = ["lognormal", "uniform"]
+
+
+class PayloadGenerator:
+    """Message bodies whose lengths in characters follow the configured distribution."""
+    def __init__(self, distribution, median, sigma, max_chars, corpus):
+        if distribution not in PAYLOAD_DISTRIBUTIONS:
+            raise ValueError(f"Unknown payload distribution {distribution!r}, expected one of {PAYLOAD_DISTRIBUTIONS}")
+        self.distribution = distribution
+        self.median = median
+        self.sigma = sigma
+        self.max_chars = max_chars
+        text = " ".join(corpus)
+        # Long enough that a message of max_chars can start anywhere in the first half
+        self.text = (text + " ") * (2 * max_chars // (len(text) + 1) + 2)
+
+    def length(self, rng):
+        """Draw one message length in characters."""
+        if self.distribution == "lognormal":
+            length = rng.lognormvariate(math.log(self.median), self.sigma)
+        else:
+            length = rng.uniform(1, 2 * self.median)
+        return min(max(1, int(length)), self.max_chars)
+
+    def message(self, rng):
+        """Draw one message body, using rng (random or a seeded random.Random) for its length and offset."""
+        length = self.length(rng)
+        start = rng.randrange(len(self.text) - length)
+        return self.text[start:start + length].strip() or self.text[:length]
@@ -0,0 +1,196 @@
+"""
+Declarative traffic profiles for the locustfile's personas (--traffic-profile).
+
+A profile (JSON, or TOML when it ends in .toml) sets, per persona, its spawn weight,
+the relative weights of its tasks and its think-time distribution, and the mix of
+question categories new conversations are drawn from. Anything left out keeps the
+value hardcoded in the locustfile:
+
+    {
+      "name": "exam-week",
+      "personas": {
+        "ActiveUser": {
+          "weight": 5,
+          "think_time": {"distribution": "lognormal", "median": 2.0, "sigma": 0.8, "max": 60},
+          "tasks": {"create_new_conversation": 4, "post_message_to_conversation": 6, "read_messages": 3}
+        },
+        "IdleUser": {"weight": 2}
+      },
+      "question_categories": {"faq": 50, "expertise": 40, "unrelated": 10}
+    }
+
+Think-time distributions and their parameters (seconds):
+    constant     value
+    uniform      low, high
+    exponential  mean
+    lognormal    median, sigma (of the log)
+    Every distribution takes an optional max that caps its draws.
+
+Draws go through the inverse CDF, so one uniform number gives one think time and a
+seeded WorkloadPlan stays deterministic whichever distribution a profile picks.
+calibrate_profile.py fits a profile from a recorded request log.
+"""
+
+import json
+import math
+import os
+import random
+import tomllib
+from statistics import NormalDist
+
+THINK_TIME_PARAMETERS = {
+    "constant": ("value",),
+    "uniform": ("low", "high"),
+    "exponential": ("mean",),
+    "lognormal": ("median", "sigma"),
+}
+# Keeps inverse CDFs with an infinite tail finite at u = 0 or 1
+QUANTILE_EPSILON = 1e-12
+
+
+class ThinkTime:
+    """A think-time distribution (seconds), drawn by inverse transform."""
+    __slots__ = ("distribution", "params", "max")
+
+    def __init__(self, distribution, max=None, **params):
+        expected = THINK_TIME_PARAMETERS.get(distribution)
+        if expected is None:
+            raise ValueError(f"Unknown think time distribution {distribution!r}, expected one of {list(THINK_TIME_PARAMETERS)}")
+        if set(params) != set(expected):
+            raise ValueError(f"{distribution} think time takes {', '.join(expected)} (and max), got {', '.join(params) or 'nothing'}")
+        if any(value < 0 for value in params.values()):
+            raise ValueError(f"{distribution} think time parameters must not be negative: {params}")
+        if distribution == "uniform" and params["low"] > params["high"]:
+            raise ValueError(f"uniform think time has low {params['low']} above high {params['high']}")
+        self.distribution = distribution
+        self.params = {name: float(params[name]) for name in expected}
+        self.max = float(max) if max is not None else None
+
+    @classmethod
+    def from_dict(cls, spec):
+        spec = dict(spec)
+        return cls(spec.pop("distribution"), **spec)
+
+    def to_dict(self):
+        spec = {"distribution": self.distribution, **{name: round(value, 3) for name, value in self.params.items()}}
+        if self.max is not None:
+            spec["max"] = round(self.max, 3)
+        return spec
+
+    def quantile(self, u):
+        """Think time at cumulative probability u in [0, 1)."""
+        p = self.params
+        if self.distribution == "constant":
+            value = p["value"]
+        elif self.distribution == "uniform":
+            value = p["low"] + (p["high"] - p["low"]) * u
+        elif self.distribution == "exponential":
+            value = -p["mean"] * math.log(max(1 - u, QUANTILE_EPSILON))
+        else:
+            u = min(max(u, QUANTILE_EPSILON), 1 - QUANTILE_EPSILON)
+            value = p["median"] * math.exp(p["sigma"] * NormalDist().inv_cdf(u))
+        return min(value, self.max) if self.max is not None else value
+
+    def cdf(self, x):
+        """Probability of a think time at most x (ignoring max), for goodness of fit."""
+        p = self.params
+        if self.distribution == "constant":
+            return 1.0 if x >= p["value"] else 0.0
+        if self.distribution == "uniform":
+            if p["high"] == p["low"]:
+                return 1.0 if x >= p["low"] else 0.0
+            return min(max((x - p["low"]) / (p["high"] - p["low"]), 0.0), 1.0)
+        if x <= 0:
+            return 0.0
+        if self.distribution == "exponential":
+            return 1 - math.exp(-x / p["mean"]) if p["mean"] > 0 else 1.0
+        if p["sigma"] == 0 or p["median"] == 0:
+            return 1.0 if x >= p["median"] else 0.0
+        return NormalDist().cdf(math.log(x / p["median"]) / p["sigma"])
+
+    def sample(self, rng=random):
+        return self.quantile(rng.random())
+
+    def __repr__(self):
+        params = ", ".join(f"{name}={value:g}" for name, value in self.params.items())
+        cap = f", max={self.max:g}" if self.max is not None else ""
+        return f"{self.distribution}({params}{cap})"
+
+
+class PersonaProfile:
+    """Spawn weight, task weights and think time of one persona; None keeps the locustfile's own."""
+    __slots__ = ("weight", "think_time", "tasks")
+
+    def __init__(self, weight=None, think_time=None, tasks=None):
+        self.weight = weight
+        self.think_time = think_time
+        self.tasks = tasks
+
+    @classmethod
+    def from_dict(cls, spec):
+        unknown = set(spec) - {"weight", "think_time", "tasks"}
+        if unknown:
+            raise ValueError(f"Unknown persona settings: {', '.join(sorted(unknown))}")
+        weight = spec.get("weight")
+        if weight is not None and (not isinstance(weight, int) or weight < 0):
+            raise ValueError(f"Persona weight must be a non-negative integer, got {weight!r}")
+        tasks = spec.get("tasks")
+        if tasks is not None:
+            if not all(isinstance(w, int) and w >= 0 for w in tasks.values()) or not any(tasks.values()):
+                raise ValueError(f"Task weights must be non-negative integers, not all zero: {tasks}")
+        think_time = spec.get("think_time")
+        return cls(weight, ThinkTime.from_dict(think_time) if think_time else None, dict(tasks) if tasks else None)
+
+    def to_dict(self):
+        spec = {}
+        if self.weight is not None:
+            spec["weight"] = self.weight
+        if self.think_time is not None:
+            spec["think_time"] = self.think_time.to_dict()
+        if self.tasks is not None:
+            spec["tasks"] = dict(self.tasks)
+        return spec
+
+
+class Profile:
+    """A named traffic profile: PersonaProfiles by persona class name and the question category weights."""
+    def __init__(self, name, personas=None, question_categories=None):
+        self.name = name
+        self.personas = personas or {}
+        self.question_categories = question_categories
+
+    @classmethod
+    def from_dict(cls, spec, default_name="profile"):
+        unknown = set(spec) - {"name", "personas", "question_categories", "calibration"}
+        if unknown:
+            raise ValueError(f"Unknown profile settings: {', '.join(sorted(unknown))}")
+        personas = {}
+        for persona, persona_spec in spec.get("personas", {}).items():
+            try:
+                personas[persona] = PersonaProfile.from_dict(persona_spec)
+            except (ValueError, KeyError, TypeError) as e:
+                raise ValueError(f"Persona {persona}: {e}") from e
+        categories = spec.get("question_categories")
+        if categories is not None and (any(w < 0 for w in categories.values()) or not any(categories.values())):
+            raise ValueError(f"Question category weights must be non-negative, not all zero: {categories}")
+        return cls(spec.get("name", default_name), personas, dict(categories) if categories else None)
+
+    def to_dict(self):
+        spec = {"name": self.name, "personas": {name: persona.to_dict() for name, persona in self.personas.items()}}
+        if self.question_categories is not None:
+            spec["question_categories"] = dict(self.question_categories)
+        return spec
+
+
+def read_profile(path):
+    """Load and validate a profile file; its name defaults to the file name."""
+    if path.endswith(".toml"):
+        with open(path, "rb") as f:
+            spec = tomllib.load(f)
+    else:
+        with open(path) as f:
+            spec = json.load(f)
+    try:
+        return Profile.from_dict(spec, os.path.splitext(os.path.basename(path))[0])
+    except ValueError as e:
+        raise ValueError(f"{path}: {e}") from e
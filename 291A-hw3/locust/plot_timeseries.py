@@ -0,0 +1,110 @@
+"""
+Time-series plots of one or more load test runs over their ramp.
+
+Where visualize_results.py reduces a run to four numbers, this shows when and how the
+backend broke: RPS, p50/p95/p99 response time, failure ratio and active users over
+time, one figure per endpoint, with the load shape's stage boundaries marked.
+
+    python plot_timeseries.py --run baseline results/baseline --run combined results/combined
+    python plot_timeseries.py --run baseline results/baseline --endpoints all --log-latency
+
+Each PREFIX is the value passed to locust --csv. Runs are aligned on their start and
+drawn on shared axes in one color each. {PREFIX}_stats_history.csv is streamed and
+folded into at most --max-points points per series (see locust_results.py), so
+hour-long histories plot in seconds. Endpoint series need locust --csv-full-history;
+without it only "Aggregated" is available. Stage boundaries come from {PREFIX}_stages.json,
+which the locustfile writes for the step and adaptive shapes, and traffic profile switches
+from {PREFIX}_profiles.json (--traffic-profile).
+"""
+
+import argparse
+import os
+
+import matplotlib.pyplot as plt
+
+from locust_results import csv_prefix, history_time_span, read_history_series, read_stage_log
+
+PERCENTILE_STYLES = {"p50": "-", "p95": "--", "p99": ":"}
+
+
+def load_run(prefix, endpoints, max_points):
+    """Downsampled series and stage boundaries of one run."""
+    path = f"{prefix}_stats_history.csv"
+    if not os.path.exists(path):
+        raise SystemExit(f"No stats history found for prefix {prefix}")
+    start, _ = history_time_span(path)
+    series = read_history_series(path, None if endpoints == ["all"] else set(endpoints), max_points)
+    return series, read_stage_log(prefix, start) if start is not None else []
+
+
+def plot_endpoint(endpoint, runs, output_dir, log_latency):
+    """Draw and save the RPS, latency, failure and user panels of one endpoint for every run."""
+    fig, (rps_ax, latency_ax, failure_ax, users_ax) = plt.subplots(4, 1, figsize=(14, 12), sharex=True)
+    colors = plt.rcParams["axes.prop_cycle"].by_key()["color"]
+
+    for i, (label, (series, stages)) in enumerate(runs.items()):
+        color = colors[i % len(colors)]
+        values = series.get(endpoint)
+        if values:
+            time = values["time"]
+            rps_ax.plot(time, values["rps"], color=color, label=label)
+            for key, style in PERCENTILE_STYLES.items():
+                points = [(t, v) for t, v in zip(time, values[key], strict=True) if v is not None]
+                latency_ax.plot([t for t, _ in points], [v for _, v in points], style, color=color,
+                                label=f"{label} {key}")
+            failure_ax.plot(time, [ratio * 100 for ratio in values["failure_ratio"]], color=color, label=label)
+            users_ax.plot(time, values["users"], color=color, label=label)
+        for stage_time, stage_label in stages:
+            for ax in (rps_ax, latency_ax, failure_ax, users_ax):
+                ax.axvline(stage_time, color=color, linestyle=":", alpha=0.4)
+            if i == 0:
+                users_ax.annotate(stage_label, (stage_time, 1), xycoords=("data", "axes fraction"),
+                                  rotation=90, va="top", ha="right", fontsize=7, alpha=0.7)
+
+    rps_ax.set_ylabel("Requests/s")
+    latency_ax.set_ylabel("Response time (ms)")
+    if log_latency:
+        latency_ax.set_yscale("log")
+    failure_ax.set_ylabel("Failures (%)")
+    users_ax.set_ylabel("Users")
+    users_ax.set_xlabel("Seconds since start")
+    rps_ax.set_title(f"{endpoint} over time", fontsize=14, fontweight="bold")
+    for ax in (rps_ax, latency_ax, failure_ax, users_ax):
+        ax.grid(alpha=0.3)
+    rps_ax.legend(loc="upper left", fontsize=8)
+    latency_ax.legend(loc="upper left", fontsize=7, ncol=len(runs))
+
+    plt.tight_layout()
+    safe_name = "".join(c if c.isalnum() else "_" for c in endpoint).strip("_")
+    output_path = os.path.join(output_dir, f"timeseries_{safe_name}.png")
+    plt.savefig(output_path, dpi=150, bbox_inches="tight")
+    plt.close(fig)
+    print(f"Graph saved as: {output_path}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--run", nargs=2, action="append", required=True, metavar=("LABEL", "PREFIX"),
+                        help="Locust --csv prefix of one run, repeatable to overlay runs")
+    parser.add_argument("--endpoints", nargs="+", default=["Aggregated"],
+                        help="Series to plot, e.g. Aggregated 'GET /expert/queue', or 'all'")
+    parser.add_argument("--max-points", type=int, default=600, help="Points per series after downsampling")
+    parser.add_argument("--log-latency", action="store_true", help="Logarithmic response time axis")
+    parser.add_argument("--output-dir", default=".", help="Directory for the generated graphs")
+    args = parser.parse_args()
+
+    runs = {label: load_run(csv_prefix(prefix), args.endpoints, args.max_points) for label, prefix in args.run}
+    if args.endpoints == ["all"]:
+        # Every series any run has, Aggregated first
+        endpoints = sorted({name for series, _ in runs.values() for name in series}, key=lambda n: (n != "Aggregated", n))
+    else:
+        endpoints = args.endpoints
+    for endpoint in endpoints:
+        if not any(endpoint in series for series, _ in runs.values()):
+            print(f"WARNING: no run has a {endpoint!r} series (endpoints need locust --csv-full-history)")
+            continue
+        plot_endpoint(endpoint, runs, args.output_dir, args.log_latency)
+
+
+if __name__ == "__main__":
+    main()
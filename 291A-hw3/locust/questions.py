@@ -0,0 +1,211 @@
+"""
+The questions new conversations are opened with, grouped by whether an expert's FAQ can
+answer them, only an expert's expertise can, or nobody's can. The locustfile draws from
+them through a QuestionMix of category weights, and calibrate_profile.py fits those
+weights by the questions' titles.
+"""
+
+import bisect
+import itertools
+import random
+
+# Questions that can be auto-answered (FAQ exists) - 33%
+FAQ_ANSWERABLE_QUESTIONS = {
+    # Gaming
+    "What games do you recommend for competitive play?": "I mainly play League of Legends and Brawl Stars competitively, but I enjoy ranked ladders more for learning than pure competition. What aspect of competitive gaming interests you most?",
+    "How do you balance gaming with other activities?": "I use time-boxed sessions and prioritize fitness and sleep. Playing socially also helps keep the hobby balanced. What's your current struggle with balance?",
+    "What's your take on mobile gaming?": "I enjoy Brawl Stars and Clash Royale on mobile. They're great for quick sessions and have surprisingly deep gameplay. Are you looking for mobile game recommendations?",
+    
+    # Board Games
+    "What board game should I start with?": "For exploring modern board games, I'd recommend Irish Gauge (a train game) or Race for the Galaxy (space-age card game). Both are accessible yet strategic. What's your experience level?",
+    "Where can I buy board games affordably?": "I strongly recommend Facebook marketplace - you can get games for 20-80% off! Amazon works for new games, or find a local board game store. What games are you looking for?",
+    "What's a good 2-player board game?": "I love 7 Wonders Duel - it's a 20-minute card drafting game that's easy to learn but has great depth. I've even played it with my parents! What kind of games do you enjoy?",
+    "Can you recommend games for large groups?": "For larger groups with mixed skill levels, I'd suggest Liars Dice or Wizard - both are inclusive and fun! How many players are you planning for?",
+    
+    # Coffee
+    "What's the difference between Arabica and Robusta?": "Arabica beans have a sweeter, softer taste with fruit and berry tones. Robusta is stronger and harsher with grain-like overtones. Which flavor profile appeals to you?",
+    "How should I store coffee beans?": "Store them in an airtight container at room temperature, away from heat, light, and moisture. Never refrigerate! How long do your beans typically last?",
+    "What's the ideal water temperature for brewing?": "The ideal temperature is between 195°F and 205°F (90°C-96°C). Too hot burns the coffee, too cold under-extracts it. What brewing method do you use?",
+    "What's the difference between latte and cappuccino?": "A cappuccino has equal parts espresso, steamed milk, and foam. A latte has more steamed milk and just a light layer of foam. Which do you prefer?",
+    
+    # Ergonomic Keyboards
+    "Why should I use an ergonomic keyboard?": "They reduce strain and improve comfort, especially if you have typing issues. I switched because of bad spacebar habits. What discomfort are you experiencing?",
+    "What keyboard do you use daily?": "I use a ZSA Moonlander MK1 with split, tenting, and ortholinear design. It has thumb clusters which are game-changing. What features interest you most?",
+    "What's an ortholinear layout?": "Keys arranged in a grid pattern instead of staggered rows. It minimizes wrist movement and increases efficiency. The learning curve is steep but worth it. Ready to try something new?",
+    "What keyboard should I get as my endgame?": "I'm eyeing either a minimal Corne or a custom 3D printed Dactyl Manuform. Both offer different philosophies of ergonomics. What's your priority - portability or ultimate comfort?",
+    
+    # Cars
+    "What's your dream car?": "My realistic dream is the upcoming Toyota Supra MK6 - reliable, stylish, and not too expensive. Unrealistically, an RWB Porsche 911 widebody. What's yours?",
+    "Is the Supra MK5 a real Toyota?": "No, it's basically a BMW. That's why I'm waiting for the MK6 which should be more Toyota. Are you considering buying one?",
+    "Should I get hybrid or electric?": "Hybrids are better now - better reliability, efficiency, and range. I'd only consider electric when solid-state batteries are mainstream. What's your use case?",
+    "What car do you currently drive?": "I drive a Toyota RAV4 2017 - most comfortable and reliable car ever. It's practical and dependable. What are you looking for in a car?",
+    
+    # Japan Travel
+    "What's the best season to visit Japan?": "Spring! Cherry blossoms bloom late March to early April, and the temperature is perfect. Book early though, it's popular. When are you planning to go?",
+    "Can you recommend a hidden gem in Japan?": "Rokko mountain in Kobe, Hyogo - one hostel, gondola access only, remote but developed enough. It's magical for solo travelers. Are you planning a solo trip?",
+    "What's your favorite Japanese city?": "Kyoto! Perfect blend of traditional and modern. Pro tip: book an Airbnb near Fushimi Inari and visit at night to avoid crowds. Have you been before?",
+    "Where should I go to avoid tourists?": "Visit less popular prefectures for authentic experiences. The current tourism boom makes hidden areas even more special. What kind of experience are you looking for?",
+    
+    # Pop Mart
+    "What is Pop Mart?": "Pop Mart creates collectible art toys sold in blind boxes - you don't know which figure you get until opening! It's exciting and addictive. Ever collected anything?",
+    "Why is Labubu so popular?": "Labubu from the Monsters series by Kasing Lung has a unique design - mischievous monster with rabbit ears. The character just resonates with people! Have you seen one in person?",
+    "What's your favorite Pop Mart character?": "Dimoo! I love his big eyes, cloud-like hair, and dreamy adventures. Each series tells a story. Do you have a favorite character?",
+    "Should I buy single boxes or a case?": "Singles for the surprise thrill! A case (12 boxes) guarantees all standard figures if you want to complete a series. What's your collecting style?",
+    
+    # Vegetarian Weightlifting
+    "Can vegetarians build muscle effectively?": "Yes! Muscle growth depends on progressive training and sufficient protein (0.7-1g per pound body weight). With proper planning, vegetarians build muscle just as well. What's your current protein intake?",
+    "What are good vegetarian protein sources?": "Legumes, tofu, tempeh, seitan, quinoa, eggs, Greek yogurt, cottage cheese, and nutritional yeast. Variety is key! What proteins do you currently eat?",
+    "Should I use protein powder as a vegetarian?": "Not strictly necessary if you prioritize protein in meals, but it's convenient for busy days or post-workout. I use it occasionally. Do you have trouble hitting protein goals?",
+    "What about creatine for vegetarians?": "Yes! Most creatine is synthetic and vegetarian-friendly. It's especially helpful for vegetarians since we don't get it from diet naturally. It improves strength and cognitive function. Have you tried it?",
+    
+    # Mechanical Keyboards
+    "What mechanical keyboard should I get?": "Depends on your use case! For typing, tactile switches like Browns. For gaming, linear like Reds. Budget and size matter too. What's your main use?",
+    "What's the difference between keyboard switches?": "Linear (smooth), Tactile (bump feedback), Clicky (audible click). Each feels completely different. Sound and feel are personal preference. Want to try a switch tester?",
+    
+    # Neovim  
+    "How do I get started with Neovim?": "Start with a minimal config, add plugins gradually. Learn Lua basics and understand lazy loading. Don't copy entire configs blindly! What's your current editor?",
+    "Should I migrate from Vim to Neovim?": "If you want better plugin ecosystem, Lua configuration, and built-in LSP support - yes! Migration is gradual. What Vim features do you rely on most?"
+}
+
+# Questions that are expertise-related but not FAQ-answerable - 33%
+EXPERTISE_ONLY_QUESTIONS = {
+    # Gaming
+    "How do I improve at League of Legends?": "I need specific help climbing ranked. I main support and struggle with map awareness and deciding when to roam. Any tips for climbing in lower elos?",
+    "What makes a good game design?": "I'm working on my first indie game and want to understand what makes games compelling. What are the key elements of good game design that keep players engaged?",
+    
+    # Web Development
+    "How do I optimize React performance?": "My React app is getting slow with large lists. I've tried useMemo but still seeing lag. What are the best practices for handling large datasets in React?",
+    "What's the best way to structure a Node.js API?": "I'm building a REST API with Node.js and Express. What folder structure, middleware patterns, and error handling strategies do you recommend for scalability?",
+    
+    # Machine Learning
+    "How do I prevent overfitting in neural networks?": "My model performs great on training data but poorly on validation. I've tried dropout and regularization. What else should I consider to improve generalization?",
+    "What's the best approach for small datasets in ML?": "I have limited training data for an image classification task. Should I use transfer learning, data augmentation, or something else? What works best?",
+    
+    # Board Games
+    "What's your strategy for Dune Imperium?": "I keep losing at Dune Imperium and feel like I'm missing key strategies. How do you balance deck building with board control? Any tips for winning?",
+    "How do I convince friends to try modern board games?": "My friends only know Monopoly and Catan. How do I introduce them to better games without overwhelming them? What's a good gateway game?",
+    
+    # Photography
+    "What camera settings for night photography?": "I'm trying to photograph stars and cityscapes at night but my photos come out blurry or too dark. What ISO, aperture, and shutter speed should I use?",
+    "How do I get into film photography?": "I want to try film photography but it seems expensive and complicated. What camera should I start with and where do I get film developed?",
+    
+    # Triathlon
+    "How do I train for my first triathlon?": "I can swim, bike, and run separately but never combined them. How should I structure my training for a sprint triathlon in 3 months?",
+    "What's the best nutrition strategy for endurance?": "I bonk during long training sessions. What should I eat before, during, and after long workouts? How do I fuel for race day?",
+    
+    # Cars
+    "Should I buy a used Supra or new Civic Type R?": "I'm deciding between a used MK4 Supra or new Civic Type R. Similar price range. Which would you choose for a daily driver that's also fun?",
+    "How do I get into car modifications?": "I want to modify my car but don't know where to start. What mods give the best bang for buck? Should I do cosmetic or performance first?",
+    
+    # Japan
+    "How do I plan a month-long solo trip to Japan?": "I want to solo travel Japan for a month like you did. How do I plan an itinerary? What's a good budget? Any tips for traveling alone?",
+    "What should I know about Japanese etiquette?": "I'm visiting Japan for the first time and worried about making cultural mistakes. What are the most important etiquette rules I should know?",
+    
+    # Coffee
+    "What espresso machine should I buy?": "I want to make café-quality espresso at home. What's a good entry-level machine that won't break the bank but produces great results?",
+    "How do I dial in espresso properly?": "I got an espresso machine but my shots are either too bitter or sour. How do I dial in the grind size and extraction time correctly?",
+    
+    # Ergonomic Keyboards
+    "Should I learn Colemak or stick with QWERTY?": "I'm considering learning Colemak for my new ergonomic keyboard. Is the learning curve worth it? How long did it take you to become proficient?",
+    "How do I transition to a split keyboard?": "I just got a split keyboard and can barely type. How long does adaptation take? Any tips for speeding up the learning process?",
+    
+    # Neovim
+    "What's your Neovim plugin setup?": "I'm rebuilding my Neovim config from scratch. What plugins do you consider essential? How do you organize your config files?",
+    "How do I set up LSP in Neovim?": "I'm confused about LSP setup in Neovim. What's the difference between nvim-lspconfig, null-ls, and Mason? Which do I actually need?",
+    
+    # Mechanical Keyboards
+    "Should I build or buy my first custom keyboard?": "I'm interested in custom keyboards but overwhelmed by options. Should I buy a prebuilt first or dive into building my own?",
+    "What's the best switch for typing all day?": "I type 8+ hours daily and want to reduce fatigue. What switch type and actuation force would you recommend for all-day typing comfort?",
+    
+    # Vegetarian Weightlifting
+    "What's a good vegetarian bulking meal plan?": "I'm trying to bulk as a vegetarian but struggling to eat enough calories and protein. Can you suggest a daily meal plan that hits macros?",
+    "How do I prevent iron deficiency while lifting?": "I'm worried about iron deficiency affecting my training. What vegetarian iron sources are best and how do I maximize absorption?",
+    
+    # Pop Mart
+    "How do I start collecting Pop Mart figures?": "I'm new to Pop Mart and overwhelmed by all the series. Where should I start? How do I avoid overspending on this hobby?",
+    "Where can I trade Pop Mart figures?": "I have duplicate figures and want to trade. Where's the best place to find other collectors? How do I ensure safe trades?",
+    
+    # Fountain Pens
+    "What fountain pen should I buy first?": "I've never used a fountain pen but want to try. What's a good beginner pen that's not too expensive but writes well?",
+    "How do I maintain my fountain pens?": "My fountain pen is skipping and feels scratchy. How do I clean it properly? What maintenance should I do regularly?"
+}
+
+# Questions unrelated to anyone's expertise - 33%
+UNRELATED_QUESTIONS = {
+    "How do I fix my washing machine?": "My washing machine is making a loud banging noise during the spin cycle. I've checked for unbalanced loads but the problem persists. What could be wrong?",
+    "What's the best way to learn Spanish?": "I want to become fluent in Spanish for travel. Should I use apps like Duolingo, take classes, or find a language exchange partner? What worked for you?",
+    "How do I start investing in stocks?": "I'm 25 and want to start investing but know nothing about stocks. Should I use index funds, individual stocks, or a robo-advisor? What's a good starting strategy?",
+    "Can you recommend good hiking trails?": "I'm looking for day hikes within 2 hours of Los Angeles. I'm intermediate level and prefer scenic views. Any recommendations?",
+    "How do I prepare for a job interview?": "I have a job interview next week for a project manager position. What questions should I prepare for? How do I make a strong impression?",
+    "What's the best way to organize my closet?": "My closet is a mess and I can't find anything. What organization systems work best? Should I use Marie Kondo method or something else?",
+    "How do I train my dog to stop barking?": "My dog barks at everything - people, other dogs, delivery trucks. Training hasn't helped. What techniques work for excessive barking?",
+    "What's a good beginner guitar?": "I want to learn guitar but don't want to spend too much on my first instrument. What's a good beginner acoustic guitar under $300?",
+    "How do I deal with noisy neighbors?": "My upstairs neighbors are extremely loud late at night. I've talked to them but nothing changed. What are my options?",
+    "What's the best way to meal prep?": "I want to meal prep for the week to save time and eat healthier. What containers should I use? How do I keep food fresh?",
+    "How do I remove coffee stains from carpet?": "I spilled coffee on my white carpet and the stain won't come out. I've tried various cleaners with no luck. Any secret techniques?",
+    "What's a good beginner workout routine?": "I haven't exercised in years and want to start. What's a good beginner routine that won't overwhelm me? How many days per week?",
+    "How do I start a podcast?": "I want to start a podcast about local history. What equipment do I need? What platforms should I use for hosting and distribution?",
+    "What's the best city for digital nomads?": "I'm a remote worker considering relocating abroad for a year. What cities are best for digital nomads in terms of cost, internet, and community?",
+    "How do I write a resume for career change?": "I'm changing careers from teaching to tech. How do I write a resume that highlights transferable skills? What should I emphasize?",
+    "What's a good beginner sewing project?": "I just got a sewing machine and want to start with something simple. What's a good first project to learn basic techniques?",
+    "How do I start a vegetable garden?": "I want to start growing vegetables in my backyard but have no experience. What vegetables are easiest for beginners? When should I plant?",
+    "What's the best way to learn piano?": "I'm 30 and want to learn piano. Is it too late? Should I get a teacher or use online resources? What keyboard should I start with?",
+    "How do I reduce my carbon footprint?": "I want to live more sustainably but don't know where to start. What changes have the biggest impact? What's realistic for everyday life?",
+    "What's a good side hustle?": "I need extra income and have evenings/weekends free. What are realistic side hustles that don't require huge upfront investment?",
+    "How do I make sourdough bread?": "I want to start making sourdough bread at home. How do I create and maintain a starter? What's the basic process?",
+    "What's the best way to learn touch typing?": "I'm a slow typer and want to improve. What's the best method to learn touch typing? How long does it typically take?",
+    "How do I start freelance writing?": "I want to freelance write but don't know how to find clients or set rates. Where do I start? What platforms are best for beginners?",
+    "What's a good laptop for college?": "I'm starting college and need a laptop for general use - notes, essays, web browsing. What specs do I actually need? What's a good budget?",
+    "How do I negotiate salary?": "I got a job offer but the salary seems low. How do I negotiate without seeming ungrateful? What's a good strategy?"
+}
+
+# Question categories and their share of new conversations (33% each)
+QUESTION_CATEGORIES = {
+    "faq": (FAQ_ANSWERABLE_QUESTIONS, 33),
+    "expertise": (EXPERTISE_ONLY_QUESTIONS, 33),
+    "unrelated": (UNRELATED_QUESTIONS, 34),
+}
+# Titles per category, built once instead of list(dict.keys()) on every pick
+QUESTION_TITLES = {category: tuple(questions) for category, (questions, _) in QUESTION_CATEGORIES.items()}
+QUESTION_CATEGORY_BY_TITLE = {title: category for category, titles in QUESTION_TITLES.items() for title in titles}
+QUESTION_CATEGORY_WEIGHTS = {category: weight for category, (_, weight) in QUESTION_CATEGORIES.items()}
+# Every question, in category order, for --workload-seed plans
+QUESTION_POOL = [
+    (title, questions[title])
+    for questions, _ in QUESTION_CATEGORIES.values()
+    for title in questions
+]
+
+
+class QuestionMix:
+    """
+    Category weights that new conversations' questions are drawn with; a --traffic-profile
+    can replace them at runtime. Categories left out of the weights are not asked.
+    """
+    def __init__(self, weights):
+        self.set_weights(weights)
+
+    def set_weights(self, weights):
+        unknown = set(weights) - set(QUESTION_CATEGORIES)
+        if unknown:
+            raise ValueError(f"Unknown question categories {sorted(unknown)}, expected some of {list(QUESTION_CATEGORIES)}")
+        self.weights = {category: weights.get(category, 0) for category in QUESTION_CATEGORIES}
+        self.categories = [category for category, weight in self.weights.items() if weight > 0]
+        self.category_weights = [self.weights[category] for category in self.categories]
+        # Cumulative probability of every question in QUESTION_POOL, for --workload-seed plans
+        total = sum(self.category_weights)
+        self.cumulative = list(itertools.accumulate(
+            self.weights[category] / total / len(questions)
+            for category, (questions, _) in QUESTION_CATEGORIES.items()
+            for _ in questions
+        ))
+
+    def choose(self):
+        category = random.choices(self.categories, weights=self.category_weights, k=1)[0]
+        title = random.choice(QUESTION_TITLES[category])
+        return (title, QUESTION_CATEGORIES[category][0][title])
+
+    def choose_planned(self, plan):
+        """Question for the plan's next uniform draw, so the plan stays deterministic when the mix changes."""
+        u = plan.uniform("question", 0, 1) * self.cumulative[-1]
+        return QUESTION_POOL[min(bisect.bisect_right(self.cumulative, u), len(QUESTION_POOL) - 1)]
@@ -0,0 +1,328 @@
+"""
+Run a declarative matrix of headless load tests and keep the results in a SQLite store.
+
+The matrix file (JSON, or TOML when it ends in .toml) lists the targets to test, the
+load shapes to run them with and how often to repeat each cell:
+
+    {
+      "name": "scaling",
+      "repetitions": 3,
+      "run_time": "10m",
+      "locust_args": ["--processes", "4"],
+      "shapes": {
+        "step": ["--load-shape", "step"],
+        "flat-300": ["--load-shape", "none", "-u", "300", "-r", "50"]
+      },
+      "targets": [
+        {"config": "Single instance", "variant": "baseline", "host": "http://baseline:3000"},
+        {"config": "Single instance", "variant": "combined", "host": "http://combined:3000"},
+        {"config": "Offline", "variant": "standin", "host": "standin", "standin_args": ["--latency-ms", "20"]}
+      ]
+    }
+
+A target whose host is "standin" (or every target with --offline) runs against a fresh
+standin_server.py, so the matrix can be dry-run without a Rails stack. Cells run in
+repetition order, one round of all targets and shapes after the other, so slow drift of
+the environment spreads over every variant instead of favouring the ones measured first.
+
+Each run keeps its locust CSVs and HDR histogram logs under --output-dir, replacing the
+files of an earlier run of the same cell, and one row of summary numbers goes into the
+store, keyed by matrix, config, variant, shape and repetition. A run that exited non-zero or made no requests is stored but counts as
+failed: --resume reruns it and the report leaves it out of the means and flags the cell.
+--resume skips the cells that already have a successful run. The report prints, per
+config, variant and shape, the mean of the successful repetitions with its 95% confidence
+interval:
+
+    python run_matrix.py scaling.json --store results.db
+    python run_matrix.py --report --store results.db
+"""
+
+import argparse
+import glob
+import json
+import math
+import os
+import sqlite3
+import subprocess
+import sys
+import time
+import tomllib
+
+from benchmark_client import LOCUSTFILE, start_standin_server
+from latency_histogram import aggregate, merge_histogram_logs
+from locust_results import generator_bound, read_request_counts, read_stats_history
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    matrix TEXT NOT NULL,
+    config TEXT NOT NULL,
+    variant TEXT NOT NULL,
+    shape TEXT NOT NULL,
+    repetition INTEGER NOT NULL,
+    host TEXT,
+    started_at REAL,
+    duration_s REAL,
+    exit_code INTEGER,
+    prefix TEXT,
+    requests INTEGER,
+    failures INTEGER,
+    max_rps REAL,
+    p50_ms REAL,
+    p95_ms REAL,
+    p99_ms REAL,
+    users REAL,
+    generator_bound TEXT,
+    PRIMARY KEY (matrix, config, variant, shape, repetition)
+)
+"""
+METRICS = ["max_rps", "p50_ms", "p95_ms", "p99_ms", "users"]
+# Runs that count; the others (a crashed locust, a dead target) stay in the store for inspection only
+SUCCESSFUL_RUN = "exit_code = 0 AND requests > 0"
+
+# Two-sided 95% Student t quantiles by degrees of freedom; larger samples use the normal 1.96
+T_QUANTILES_95 = [
+    12.706, 4.303, 3.182, 2.776, 2.571, 2.447, 2.365, 2.306, 2.262, 2.228,
+    2.201, 2.179, 2.160, 2.145, 2.131, 2.120, 2.110, 2.101, 2.093, 2.086,
+    2.080, 2.074, 2.069, 2.064, 2.060, 2.056, 2.052, 2.048, 2.045, 2.042,
+]
+
+
+def read_matrix(path):
+    """Load a matrix file, filling in the defaults."""
+    if path.endswith(".toml"):
+        with open(path, "rb") as f:
+            matrix = tomllib.load(f)
+    else:
+        with open(path) as f:
+            matrix = json.load(f)
+    matrix.setdefault("name", os.path.splitext(os.path.basename(path))[0])
+    matrix.setdefault("repetitions", 3)
+    matrix.setdefault("run_time", "5m")
+    matrix.setdefault("locust_args", [])
+    matrix.setdefault("shapes", {"step": ["--load-shape", "step"]})
+    if not matrix.get("targets"):
+        raise ValueError(f"{path} lists no targets")
+    return matrix
+
+
+def cells(matrix):
+    """Yield (repetition, target, shape, shape_args) in run order: one full round per repetition."""
+    for repetition in range(1, matrix["repetitions"] + 1):
+        for target in matrix["targets"]:
+            for shape, shape_args in matrix["shapes"].items():
+                yield repetition, target, shape, shape_args
+
+
+def slug(value):
+    return "".join(c if c.isalnum() else "_" for c in value).strip("_").lower()
+
+
+def confidence_interval(values):
+    """Mean and half-width of its two-sided 95% Student t confidence interval (0 with one value)."""
+    n = len(values)
+    mean = sum(values) / n
+    if n < 2:
+        return mean, 0.0
+    stdev = math.sqrt(sum((v - mean) ** 2 for v in values) / (n - 1))
+    t = T_QUANTILES_95[n - 2] if n - 2 < len(T_QUANTILES_95) else 1.96
+    return mean, t * stdev / math.sqrt(n)
+
+
+def run_cell(matrix, repetition, target, shape, shape_args, output_dir, offline, p95_limit, failure_limit):
+    """Run one headless locust for a cell and return its store row."""
+    config, variant = target["config"], target["variant"]
+    prefix = os.path.join(output_dir, slug(matrix["name"]), slug(config), slug(variant), slug(shape), f"rep{repetition}")
+    os.makedirs(os.path.dirname(prefix), exist_ok=True)
+    # A rerun of the cell (--resume after a failure, or the matrix run again) must not read the
+    # previous run's files: the histogram logs are appended to, and the JSON reports are only
+    # written when there is something to report
+    for path in glob.glob(f"{prefix}_*"):
+        os.remove(path)
+    standin = None
+    host = target["host"]
+    if offline or host == "standin":
+        standin, host = start_standin_server(target.get("standin_args", []))
+    cmd = [
+        sys.executable, "-m", "locust",
+        "-f", LOCUSTFILE,
+        "--headless",
+        "--host", host,
+        "--run-time", matrix["run_time"],
+        "--csv", prefix,
+        "--histogram-log", f"{prefix}_histograms.jsonl",
+        "--adaptive-result", f"{prefix}_breaking_point.json",
+        "--only-summary",
+        "--exit-code-on-error", "0",
+        *matrix["locust_args"],
+        *target.get("locust_args", []),
+        *shape_args,
+    ]
+    started = time.time()
+    try:
+        with open(f"{prefix}.log", "w") as log:
+            exit_code = subprocess.run(cmd, stdout=log, stderr=subprocess.STDOUT).returncode
+    finally:
+        if standin:
+            standin.terminate()
+            standin.wait()
+
+    requests, failures = (0, 0)
+    max_rps, p50, p95, users = (0.0, 0, 0, 0)
+    if os.path.exists(f"{prefix}_stats.csv"):
+        requests, failures = read_request_counts(f"{prefix}_stats.csv")
+    if os.path.exists(f"{prefix}_stats_history.csv"):
+        max_rps, p50, p95, users = read_stats_history(f"{prefix}_stats_history.csv", p95_limit, failure_limit)
+    histograms = glob.glob(f"{prefix}_histograms*.jsonl")
+    p99 = aggregate(merge_histogram_logs(histograms)).value_at_percentile(99) / 1000 if histograms else None
+    return {
+        "matrix": matrix["name"],
+        "config": config,
+        "variant": variant,
+        "shape": shape,
+        "repetition": repetition,
+        "host": host,
+        "started_at": started,
+        "duration_s": time.time() - started,
+        "exit_code": exit_code,
+        "prefix": prefix,
+        "requests": requests,
+        "failures": failures,
+        "max_rps": max_rps,
+        "p50_ms": p50,
+        "p95_ms": p95,
+        "p99_ms": p99,
+        "users": users,
+        "generator_bound": "; ".join(generator_bound(prefix)) or None,
+    }
+
+
+def open_store(path):
+    store = sqlite3.connect(path)
+    store.row_factory = sqlite3.Row
+    store.execute(SCHEMA)
+    return store
+
+
+def store_run(store, row):
+    columns = ", ".join(row)
+    placeholders = ", ".join(f":{column}" for column in row)
+    store.execute(f"INSERT OR REPLACE INTO runs ({columns}) VALUES ({placeholders})", row)
+    store.commit()
+
+
+def stored_cells(store, matrix_name):
+    """The (config, variant, shape, repetition) cells of a matrix that have a successful run."""
+    rows = store.execute(
+        f"SELECT config, variant, shape, repetition FROM runs WHERE matrix = ? AND {SUCCESSFUL_RUN}", (matrix_name,)
+    )
+    return {tuple(row) for row in rows}
+
+
+def store_matrix(store, matrix_name=None):
+    """The matrix to read from a store: matrix_name, or the only one it holds."""
+    names = [row[0] for row in store.execute("SELECT DISTINCT matrix FROM runs ORDER BY matrix")]
+    if matrix_name:
+        if matrix_name not in names:
+            raise SystemExit(f"No runs of matrix {matrix_name!r} in the store (it has: {', '.join(names) or 'none'})")
+        return matrix_name
+    if len(names) != 1:
+        raise SystemExit(f"The store holds matrices {', '.join(names)}; pick one with --matrix" if names else "The store has no runs")
+    return names[0]
+
+
+def summarize(store, matrix_name=None):
+    """
+    Group the stored runs by (matrix, config, variant, shape) and return
+    {key: {"runs": n, "failed": n, "generator_bound": n, metric: (mean, half_width)}}, in
+    first-run order. Only successful runs are averaged; metrics are None if a cell has none.
+    """
+    query = (
+        f"SELECT *, {SUCCESSFUL_RUN} AS succeeded FROM runs"
+        + (" WHERE matrix = ?" if matrix_name else "") + " ORDER BY started_at"
+    )
+    groups = {}
+    failed = {}
+    for row in store.execute(query, (matrix_name,) if matrix_name else ()):
+        key = (row["matrix"], row["config"], row["variant"], row["shape"])
+        rows = groups.setdefault(key, [])
+        if row["succeeded"]:
+            rows.append(row)
+        else:
+            failed[key] = failed.get(key, 0) + 1
+    summary = {}
+    for key, rows in groups.items():
+        summary[key] = {
+            "runs": len(rows),
+            "failed": failed.get(key, 0),
+            "generator_bound": sum(1 for row in rows if row["generator_bound"]),
+        }
+        for metric in METRICS:
+            values = [row[metric] for row in rows if row[metric] is not None]
+            summary[key][metric] = confidence_interval(values) if values else None
+    return summary
+
+
+def print_report(summary):
+    """Print each cell's means with 95% confidence intervals."""
+    print("=" * 118)
+    print(f"  {'Matrix / config / variant / shape':50s} {'Runs':>4s} {'Max RPS':>15s} {'P50 ms':>13s} {'P95 ms':>15s} {'P99 ms':>15s}")
+    print("-" * 118)
+    for (matrix_name, config, variant, shape), cell in summary.items():
+        label = f"{matrix_name} / {config} / {variant} / {shape}"
+
+        def cell_value(cell, metric, width):
+            if cell[metric] is None:
+                return f"{'-':>{width}s}"
+            mean, half_width = cell[metric]
+            return f"{f'{mean:.1f}±{half_width:.1f}':>{width}s}"
+
+        notes = []
+        if cell["failed"]:
+            notes.append(f"{cell['failed']} failed run(s) left out")
+        if cell["generator_bound"]:
+            notes.append(f"{cell['generator_bound']} generator-bound")
+        note = f"  <- {', '.join(notes)}" if notes else ""
+        print(
+            f"  {label[:50]:50s} {cell['runs']:4d} {cell_value(cell, 'max_rps', 15)} {cell_value(cell, 'p50_ms', 13)} "
+            f"{cell_value(cell, 'p95_ms', 15)} {cell_value(cell, 'p99_ms', 15)}{note}"
+        )
+    print("=" * 118)
+    print("  mean±x: x is the half-width of the 95% confidence interval over the successful repetitions")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("matrix", nargs="?", help="Matrix file (.json or .toml)")
+    parser.add_argument("--store", default="results.db", help="SQLite result store")
+    parser.add_argument("--output-dir", default="results", help="Directory for the locust CSVs, logs and histograms")
+    parser.add_argument("--offline", action="store_true", help="Run every target against a local standin_server.py")
+    parser.add_argument("--resume", action="store_true", help="Skip cells that already have a successful run in the store")
+    parser.add_argument("--report", action="store_true", help="Only print the report of the runs in the store")
+    parser.add_argument("--p95-limit", type=float, default=1000, help="p95 (ms) above which the backend counts as broken")
+    parser.add_argument("--failure-limit", type=float, default=0.05, help="Failure ratio above which the backend counts as broken")
+    args = parser.parse_args()
+    if not args.matrix and not args.report:
+        parser.error("give a matrix file, or --report")
+
+    store = open_store(args.store)
+    matrix = read_matrix(args.matrix) if args.matrix else None
+    if matrix and not args.report:
+        done = stored_cells(store, matrix["name"]) if args.resume else set()
+        planned = list(cells(matrix))
+        for i, (repetition, target, shape, shape_args) in enumerate(planned, 1):
+            key = (target["config"], target["variant"], shape, repetition)
+            if key in done:
+                continue
+            print(f"[{i}/{len(planned)}] {target['config']} / {target['variant']} / {shape}, repetition {repetition}...", flush=True)
+            row = run_cell(
+                matrix, repetition, target, shape, shape_args, args.output_dir, args.offline, args.p95_limit, args.failure_limit
+            )
+            store_run(store, row)
+            if row["exit_code"] != 0 or not row["requests"]:
+                print(f"  failed (locust exited with {row['exit_code']}, {row['requests']} requests), see {row['prefix']}.log")
+
+    print_report(summarize(store, matrix["name"] if matrix else None))
+
+
+if __name__ == "__main__":
+    main()
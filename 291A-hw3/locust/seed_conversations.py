@@ -0,0 +1,224 @@
+"""
+Bulk-create long conversations ahead of a run and save them to a conversation fixture.
+
+The personas only ever grow conversations by a handful of messages, so a normal run
+never loads GET /conversations/:id/messages or /api/messages/updates on long
+histories. This builds them through the API: each conversation is opened by one user
+of a seed_users.py fixture, who then posts --messages messages to it (lognormally
+spread with --messages-sigma) with bodies from payloads.py. Conversations are built
+concurrently, the messages of each one in order. Tokens that expire during a long
+build are refreshed by logging in again.
+
+The fixture lists each conversation with its owner and message count. With
+--conversation-fixture, the locustfile adds the conversations to their owners in the
+UserStore, so personas reading or posting as those users hit the long histories, and
+their latencies are reported by conversation size (ConversationSizeStats) from the first
+request on.
+
+Usage:
+    python seed_users.py --host http://localhost:3000 --count 500 --output users.fixture
+    python seed_conversations.py --host http://localhost:3000 --user-fixture users.fixture \\
+        --conversations 50 --messages 2000 --output conversations.json
+    locust -f locustfile.py --user-fixture users.fixture --conversation-fixture conversations.json \\
+        --message-size lognormal --host http://localhost:3000
+"""
+
+import argparse
+import json
+import logging
+import math
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from latency_histogram import LatencyHistogram
+from payloads import PAYLOAD_DISTRIBUTIONS, PayloadGenerator
+from user_fixture import read_user_fixture
+
+CONVERSATION_SIZE_BUCKETS = [10, 100, 1000, 10000]  # Upper bounds (exclusive) of the message count buckets
+
+# Text the message bodies are cut from; the locustfile uses its own sample messages and questions
+FIXTURE_CORPUS = [
+    "I have been trying to get this working for a while and wanted to share everything I have tried so far.",
+    "Here is the full output from the last run, including the stack trace and the configuration I used.",
+    "Could you walk me through the steps again? I followed the documentation but something is different.",
+    "That worked for the first part, but the second step still fails with the same error as before.",
+    "Thanks, that explanation makes sense. I will try it on the staging environment and report back.",
+]
+
+
+def write_conversation_fixture(path, conversations, created_at=None):
+    """Write (conversation_id, user_id, message_count) tuples to a JSON conversation fixture."""
+    conversations = [
+        {"id": conversation_id, "user_id": user_id, "messages": message_count}
+        for conversation_id, user_id, message_count in conversations
+    ]
+    with open(path, "w") as f:
+        json.dump({"created_at": created_at or time.time(), "conversations": conversations}, f)
+    return len(conversations)
+
+
+def read_conversation_fixture(path):
+    """Yield (conversation_id, user_id, message_count) tuples from a conversation fixture."""
+    with open(path) as f:
+        fixture = json.load(f)
+    for conversation in fixture["conversations"]:
+        yield conversation["id"], conversation["user_id"], conversation["messages"]
+
+
+class ConversationSizeStats:
+    """Per request HDR latency histograms bucketed by the message count of the conversation involved."""
+    def __init__(self):
+        self.histograms = {}  # "METHOD name" -> {bucket label -> LatencyHistogram}
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def bucket(size):
+        """Label of the CONVERSATION_SIZE_BUCKETS bucket a message count falls into, e.g. '100-999'."""
+        lower = 0
+        for upper in CONVERSATION_SIZE_BUCKETS:
+            if size < upper:
+                return f"{lower}-{upper - 1}"
+            lower = upper
+        return f"{lower}+"
+
+    def record(self, name, size, response_time_ms):
+        with self.lock:
+            buckets = self.histograms.setdefault(name, {})
+            label = self.bucket(size)
+            histogram = buckets.get(label)
+            if histogram is None:
+                histogram = buckets[label] = LatencyHistogram()
+            histogram.record(response_time_ms * 1000)
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                name: {label: histogram.encode() for label, histogram in buckets.items()}
+                for name, buckets in self.histograms.items()
+            }
+
+    @staticmethod
+    def merge(snapshots):
+        """Decode and add up snapshots name by name and bucket by bucket."""
+        merged = {}
+        for snapshot in snapshots:
+            for name, buckets in snapshot.items():
+                target = merged.setdefault(name, {})
+                for label, encoded in buckets.items():
+                    target.setdefault(label, LatencyHistogram()).merge(LatencyHistogram.decode(encoded))
+        return merged
+
+    @classmethod
+    def log_summary(cls, snapshots):
+        """Log percentiles per request and conversation size bucket, smallest conversations first."""
+        merged = cls.merge(snapshots)
+        if not merged:
+            return
+        logging.info("Latency by conversation size (messages, ms):")
+        for name, buckets in sorted(merged.items()):
+            for label, histogram in sorted(buckets.items(), key=lambda item: int(item[0].split("-")[0].rstrip("+"))):
+                p50, p95, p99 = (histogram.value_at_percentile(p) / 1000 for p in (50, 95, 99))
+                logging.info(
+                    f"  {name} [{label}]: {histogram.total} requests, p50 {p50:.1f}, p95 {p95:.1f}, p99 {p99:.1f}"
+                )
+
+
+class FixtureUser:
+    """A fixture user whose token is refreshed by logging in again when the backend rejects it."""
+    def __init__(self, username, auth_token, user_id):
+        self.username = username
+        self.auth_token = auth_token
+        self.user_id = user_id
+        self.lock = threading.Lock()
+
+    def post(self, session, host, path, payload):
+        response = session.post(f"{host}{path}", json=payload, headers={"Authorization": f"Bearer {self.auth_token}"})
+        if response.status_code == 401:
+            self.refresh(session, host)
+            response = session.post(f"{host}{path}", json=payload, headers={"Authorization": f"Bearer {self.auth_token}"})
+        return response
+
+    def refresh(self, session, host):
+        with self.lock:
+            credentials = {"username": self.username, "password": self.username}
+            response = session.post(f"{host}/auth/login", json=credentials)
+            if response.status_code == 200:
+                self.auth_token = response.json().get("token")
+
+
+def build_conversation(session, host, user, index, message_count, generator, rng):
+    """Open one conversation as user and post message_count messages to it. Returns the fixture entry or None."""
+    response = user.post(session, host, "/conversations", {"title": f"Fixture conversation {index}"})
+    if response.status_code != 201:
+        return None
+    conversation_id = response.json().get("id")
+    posted = 0
+    for _ in range(message_count):
+        response = user.post(
+            session, host, "/messages", {"conversationId": conversation_id, "content": generator.message(rng)}
+        )
+        if response.status_code == 201:
+            posted += 1
+    return conversation_id, user.user_id, posted
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", required=True, help="Base URL of the backend")
+    parser.add_argument("--user-fixture", required=True, help="seed_users.py fixture whose users open the conversations")
+    parser.add_argument("--conversations", type=int, default=20, help="Number of conversations to build")
+    parser.add_argument("--messages", type=int, default=1000, help="Median messages per conversation")
+    parser.add_argument("--messages-sigma", type=float, default=0.0, help="Lognormal spread of messages per conversation (0: all equal)")
+    parser.add_argument("--message-size", choices=PAYLOAD_DISTRIBUTIONS, default="lognormal", help="Distribution of message lengths")
+    parser.add_argument("--message-size-median", type=int, default=200, help="Median message length in characters")
+    parser.add_argument("--message-size-sigma", type=float, default=1.0, help="Lognormal sigma of message lengths")
+    parser.add_argument("--message-size-max", type=int, default=16384, help="Longest message in characters")
+    parser.add_argument("--seed", type=int, default=0, help="Seed of message counts and bodies")
+    parser.add_argument("--concurrency", type=int, default=16, help="Conversations built at the same time")
+    parser.add_argument("--output", default="conversations.json", help="Fixture file to write")
+    args = parser.parse_args()
+
+    host = args.host.rstrip("/")
+    users = [FixtureUser(*user) for user in read_user_fixture(args.user_fixture)]
+    if not users:
+        parser.error(f"{args.user_fixture} has no users")
+    generator = PayloadGenerator(
+        args.message_size, args.message_size_median, args.message_size_sigma, args.message_size_max, FIXTURE_CORPUS
+    )
+    rng = random.Random(args.seed)
+    sizes = [
+        max(1, round(rng.lognormvariate(math.log(args.messages), args.messages_sigma))) if args.messages_sigma else args.messages
+        for _ in range(args.conversations)
+    ]
+    started = time.monotonic()
+
+    # One session per worker thread, so connections are reused without sharing a session across threads
+    local = threading.local()
+
+    def build(index):
+        if not hasattr(local, "session"):
+            local.session = requests.Session()
+        return build_conversation(
+            local.session, host, users[index % len(users)], index, sizes[index], generator, random.Random(args.seed + index)
+        )
+
+    with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+        results = list(executor.map(build, range(args.conversations)))
+
+    conversations = [r for r in results if r]
+    messages = sum(r[2] for r in conversations)
+    write_conversation_fixture(args.output, conversations)
+    elapsed = time.monotonic() - started
+    print(
+        f"Built {len(conversations)} conversations with {messages} messages in {elapsed:.1f}s "
+        f"({messages / elapsed:.1f} messages/s), {args.conversations - len(conversations)} failed"
+    )
+    print(f"Fixture written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
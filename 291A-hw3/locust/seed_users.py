@@ -0,0 +1,73 @@
+"""
+Bulk-create load test users ahead of a run and save their JWTs to a user fixture.
+
+Registers seed users concurrently (logging in instead when the user already exists),
+then writes usernames, ids and tokens to a compact fixture file that the locustfile
+loads with --user-fixture. Ramps then start with a full UserStore instead of
+spending their first minutes on bcrypt in /auth/register.
+
+Usernames are deterministic ({prefix}{i}, password = username), so re-running the
+command against the same backend refreshes the tokens of the same users.
+JWTs expire after 15 minutes, so seed (or re-seed) right before the run.
+
+Usage:
+    python seed_users.py --host http://localhost:3000 --count 5000 --output users.fixture
+    locust -f locustfile.py --user-fixture users.fixture --host http://localhost:3000
+"""
+
+import argparse
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from user_fixture import write_user_fixture
+
+
+def seed_user(session, host, username):
+    """Register a user, or log in if it already exists. Returns (username, token, user_id) or None."""
+    credentials = {"username": username, "password": username}
+    response = session.post(f"{host}/auth/register", json=credentials)
+    if response.status_code != 201:
+        response = session.post(f"{host}/auth/login", json=credentials)
+    if response.status_code not in (200, 201):
+        return None
+    data = response.json()
+    return username, data.get("token"), data.get("user", {}).get("id")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", required=True, help="Base URL of the backend")
+    parser.add_argument("--count", type=int, required=True, help="Number of users to seed")
+    parser.add_argument("--output", default="users.fixture", help="Fixture file to write")
+    parser.add_argument("--prefix", default="seed_user_", help="Username prefix, kept apart from the harness's user_{n} names")
+    parser.add_argument("--concurrency", type=int, default=32, help="Concurrent register/login requests")
+    args = parser.parse_args()
+
+    host = args.host.rstrip("/")
+    usernames = [f"{args.prefix}{i}" for i in range(args.count)]
+    started = time.monotonic()
+
+    # One session per worker thread, so connections are reused without sharing a session across threads
+    local = threading.local()
+
+    def seed(username):
+        if not hasattr(local, "session"):
+            local.session = requests.Session()
+        return seed_user(local.session, host, username)
+
+    with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+        results = list(executor.map(seed, usernames))
+
+    users = [r for r in results if r and r[1] and r[2] is not None]
+    failed = len(usernames) - len(users)
+    write_user_fixture(args.output, users)
+    elapsed = time.monotonic() - started
+    print(f"Seeded {len(users)} users in {elapsed:.1f}s ({len(users) / elapsed:.1f} users/s), {failed} failed")
+    print(f"Fixture written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,695 @@
+"""
+Local stand-in backend for running the locust harness offline.
+
+Implements every route the harness uses, following API_SPECIFICATION.md, with all
+state kept in memory: /auth/*, /conversations, /messages, /expert/* and the
+/api/*/updates polling feeds. It needs neither Rails, MySQL nor Bedrock, so it
+gives a ceiling test for the locustfile itself: if RPS flattens against the
+stand-in, the generator is the bottleneck.
+
+It also serves the push endpoints that PushUser connects to, which the Rails
+backend does not offer (it only supports polling):
+    GET /api/updates/stream?userId=    Server-Sent Events, one event per update
+    GET /api/updates/long-poll?userId=&cursor=
+                                       JSON list of updates after cursor, held open until
+                                       one arrives or --long-poll-timeout expires
+
+Every push event carries "sentAt" (server clock, epoch milliseconds) so clients can
+measure end-to-end delivery latency. Posted messages and claims are pushed to the
+users involved; with --event-interval N, each connected user additionally receives
+a synthetic update on average every N seconds (exponentially distributed).
+
+GET responses carry a weak ETag and are answered with an empty 304 when it matches
+If-None-Match, as Rack::ETag and Rack::ConditionalGet do in front of the Rails API.
+
+Latency and error injection:
+    --latency-ms 20 --latency-dist exponential   added to every response
+    --route-latency /expert/queue=150            per-path override (repeatable)
+    --error-rate 0.01                            fraction of requests answered with 500
+
+Background jobs (--job-workers N, --job-ms MS):
+    A first message enqueues an expert assignment, a summary and an auto-reply, as the
+    Rails models and MessagesController do, onto one FIFO queue drained by N workers.
+    Jobs that would call the LLM take --job-ms on average (exponential). The assignment
+    picks a random user with a bio, and the auto-reply answers as the assigned expert, so
+    locust --job-probe sees the queue lag grow as the offered load exceeds the workers.
+
+Usage:
+    python standin_server.py --port 3000 --event-interval 5
+    locust -f locustfile.py --host http://localhost:3000
+"""
+
+import argparse
+import asyncio
+import hashlib
+import heapq
+import json
+import random
+import re
+import sys
+import time
+import traceback
+from collections import deque
+from urllib.parse import parse_qs, urlsplit
+
+REASONS = {
+    200: "OK",
+    201: "Created",
+    204: "No Content",
+    304: "Not Modified",
+    401: "Unauthorized",
+    403: "Forbidden",
+    404: "Not Found",
+    422: "Unprocessable Entity",
+    500: "Internal Server Error",
+    503: "Service Unavailable",
+}
+
+EVENT_BUFFER_SIZE = 100  # Recent events kept per user for long-poll and reconnecting streams
+SSE_HEARTBEAT_SECONDS = 15
+IDLE_SUBSCRIBER_SECONDS = 60  # Stop synthetic events for users that have not connected for this long
+LATENCY_DISTRIBUTIONS = ["fixed", "exponential"]
+
+
+def iso_now():
+    """Current UTC time in the backend's ISO 8601 format (second resolution, like Rails' iso8601)."""
+    return time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
+
+
+class Request:
+    """A parsed HTTP request."""
+    def __init__(self, method, target, headers, body):
+        parts = urlsplit(target)
+        self.method = method
+        self.path = parts.path
+        self.query = {key: values[-1] for key, values in parse_qs(parts.query).items()}
+        self.headers = headers
+        self.body = body
+
+    def json(self):
+        return json.loads(self.body) if self.body else {}
+
+
+def json_response(status, payload, headers=None):
+    """Build a (status, body, headers) response tuple with a JSON body."""
+    return status, json.dumps(payload).encode(), {"Content-Type": "application/json", **(headers or {})}
+
+
+def conditional_get(request, response):
+    """Tag 200 GET responses with a weak ETag of the body and answer matching If-None-Match with 304."""
+    status, payload, headers = response
+    if request.method != "GET" or status != 200:
+        return response
+    etag = f'W/"{hashlib.md5(payload).hexdigest()}"'
+    if request.headers.get("if-none-match") == etag:
+        return 304, b"", {"ETag": etag}
+    return status, payload, {**headers, "ETag": etag}
+
+
+class PushHub:
+    """
+    Per-user buffers of update events with sequential ids.
+    SSE streams and long-poll requests both wait for events after their cursor.
+    """
+    def __init__(self, event_interval=0.0):
+        self.event_interval = event_interval
+        self.buffers = {}  # user_id -> deque of event dicts
+        self.next_id = {}  # user_id -> id of the next event
+        self.wakeups = {}  # user_id -> asyncio.Event set on publish
+        self.last_seen = {}  # user_id -> time a push client last connected
+        self.synthetic_due = []  # heap of (due_time, user_id)
+        self.open_streams = 0
+        self.events_published = 0
+
+    def publish(self, user_id, event_type, data):
+        """Append an event to a user's buffer and wake that user's waiting clients."""
+        user_id = str(user_id)
+        event_id = self.next_id.get(user_id, 1)
+        self.next_id[user_id] = event_id + 1
+        buffer = self.buffers.setdefault(user_id, deque(maxlen=EVENT_BUFFER_SIZE))
+        buffer.append({"id": event_id, "type": event_type, "data": {**data, "sentAt": time.time() * 1000}})
+        self.events_published += 1
+        wakeup = self.wakeups.pop(user_id, None)
+        if wakeup:
+            wakeup.set()
+
+    def events_after(self, user_id, cursor):
+        return [event for event in self.buffers.get(user_id, ()) if event["id"] > cursor]
+
+    def latest_id(self, user_id):
+        return self.next_id.get(user_id, 1) - 1
+
+    def touch(self, user_id):
+        """Mark a user as connected, scheduling synthetic events for it if enabled."""
+        if self.event_interval > 0 and user_id not in self.last_seen:
+            heapq.heappush(self.synthetic_due, (time.monotonic() + random.expovariate(1 / self.event_interval), user_id))
+        self.last_seen[user_id] = time.monotonic()
+
+    async def wait_for_events(self, user_id, cursor, timeout):
+        """Return events after cursor, waiting up to timeout seconds for one to be published."""
+        events = self.events_after(user_id, cursor)
+        if events:
+            return events
+        wakeup = self.wakeups.setdefault(user_id, asyncio.Event())
+        try:
+            await asyncio.wait_for(wakeup.wait(), timeout)
+        except asyncio.TimeoutError:
+            return []
+        return self.events_after(user_id, cursor)
+
+    async def run_synthetic_events(self):
+        """Publish synthetic message updates to connected users at exponential intervals."""
+        while True:
+            await asyncio.sleep(0.05)
+            now = time.monotonic()
+            while self.synthetic_due and self.synthetic_due[0][0] <= now:
+                _, user_id = heapq.heappop(self.synthetic_due)
+                if now - self.last_seen.get(user_id, 0) > IDLE_SUBSCRIBER_SECONDS:
+                    self.last_seen.pop(user_id, None)
+                    continue
+                self.publish(user_id, "message-update", {"synthetic": True, "userId": user_id})
+                heapq.heappush(self.synthetic_due, (now + random.expovariate(1 / self.event_interval), user_id))
+
+
+class StandInServer:
+    """Minimal asyncio HTTP/1.1 server with keep-alive, a regex route table and in-memory chat state."""
+    def __init__(self, event_interval=0.0, long_poll_timeout=25.0, latency_ms=0.0, latency_dist="fixed",
+                 route_latency=None, error_rate=0.0, job_workers=0, job_ms=0.0):
+        self.hub = PushHub(event_interval)
+        self.long_poll_timeout = long_poll_timeout
+        self.latency_ms = latency_ms
+        self.latency_dist = latency_dist
+        self.route_latency = route_latency or {}  # path prefix -> mean latency in ms
+        self.error_rate = error_rate
+        self.job_workers = job_workers
+        self.job_ms = job_ms
+        self.jobs = asyncio.Queue()  # (job coroutine function, args) drained by job_workers
+
+        self.users = {}  # user_id -> user record
+        self.user_ids = {}  # username -> user_id
+        self.passwords = {}  # user_id -> password
+        self.profiles = {}  # user_id -> expert profile record
+        self.conversations = {}  # conversation_id -> conversation record
+        self.conversations_by_user = {}  # user_id -> {conversation_id: record} as initiator or assigned expert
+        self.waiting = {}  # conversation_id -> record of waiting conversations, in creation order
+        self.messages = {}  # conversation_id -> list of message records
+        self.assignments = {}  # expert user_id -> list of assignment records
+        self.next_ids = {"message": 1, "assignment": 1}
+
+        self.routes = [
+            ("GET", r"/health", self.health, False),
+            ("POST", r"/auth/register", self.register, False),
+            ("POST", r"/auth/login", self.login, False),
+            ("POST", r"/auth/logout", self.logout, False),
+            ("POST", r"/auth/refresh", self.refresh, True),
+            ("GET", r"/auth/me", self.me, True),
+            ("GET", r"/conversations", self.list_conversations, True),
+            ("POST", r"/conversations", self.create_conversation, True),
+            ("GET", r"/conversations/(\d+)", self.show_conversation, True),
+            ("GET", r"/conversations/(\d+)/messages", self.list_messages, True),
+            ("POST", r"/messages", self.create_message, True),
+            ("PUT", r"/messages/(\d+)/read", self.mark_read, True),
+            ("GET", r"/expert/queue", self.expert_queue, True),
+            ("POST", r"/expert/conversations/(\d+)/claim", self.claim, True),
+            ("POST", r"/expert/conversations/(\d+)/unclaim", self.unclaim, True),
+            ("GET", r"/expert/profile", self.show_profile, True),
+            ("PUT", r"/expert/profile", self.update_profile, True),
+            ("GET", r"/expert/assignments/history", self.assignment_history, True),
+            ("GET", r"/api/conversations/updates", self.conversations_updates, True),
+            ("GET", r"/api/messages/updates", self.messages_updates, True),
+            ("GET", r"/api/expert-queue/updates", self.expert_queue_updates, True),
+            ("GET", r"/api/updates/stream", self.stream_updates, False),
+            ("GET", r"/api/updates/long-poll", self.long_poll_updates, False),
+        ]
+        self.compiled_routes = [
+            (method, re.compile(pattern + "$"), handler, authenticated)
+            for method, pattern, handler, authenticated in self.routes
+        ]
+
+    async def handle_connection(self, reader, writer):
+        """Serve requests on one connection until the client closes it."""
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                method, target, _ = request_line.decode("latin-1").split(" ", 2)
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                length = int(headers.get("content-length", 0))
+                body = await reader.readexactly(length) if length else b""
+                request = Request(method, target, headers, body)
+
+                response = await self.dispatch(request, writer)
+                if response is None:
+                    break  # Streaming handler owned the connection
+                status, payload, response_headers = conditional_get(request, response)
+                head = f"HTTP/1.1 {status} {REASONS.get(status, 'OK')}\r\nContent-Length: {len(payload)}\r\n"
+                head += "".join(f"{name}: {value}\r\n" for name, value in response_headers.items())
+                writer.write(head.encode("latin-1") + b"\r\n" + payload)
+                await writer.drain()
+                if headers.get("connection", "").lower() == "close":
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def dispatch(self, request, writer):
+        """Route a request, applying latency and error injection to everything but push streams."""
+        for method, pattern, handler, authenticated in self.compiled_routes:
+            match = pattern.match(request.path)
+            if not match or method != request.method:
+                continue
+            if handler not in (self.stream_updates, self.long_poll_updates):
+                await self.inject_latency(request.path)
+                if self.error_rate and random.random() < self.error_rate:
+                    return json_response(500, {"error": "Injected error"})
+            if authenticated:
+                user = self.authenticate(request)
+                if user is None:
+                    return json_response(401, {"error": "No session found"})
+                return await handler(request, writer, user, *match.groups())
+            return await handler(request, writer, *match.groups())
+        return json_response(404, {"error": "Not found"})
+
+    async def inject_latency(self, path):
+        mean_ms = self.latency_ms
+        for prefix, route_ms in self.route_latency.items():
+            if path.startswith(prefix):
+                mean_ms = route_ms
+        if mean_ms <= 0:
+            return
+        delay_ms = random.expovariate(1 / mean_ms) if self.latency_dist == "exponential" else mean_ms
+        await asyncio.sleep(delay_ms / 1000)
+
+    def authenticate(self, request):
+        """Resolve the Bearer token (standin-<user id>) to a user record."""
+        token = request.headers.get("authorization", "").split(" ")[-1]
+        if not token.startswith("standin-"):
+            return None
+        return self.users.get(token[len("standin-"):])
+
+    # JSON formats, mirroring the helpers in ApplicationController
+
+    def conversation_json(self, conversation, user):
+        messages = self.messages.get(conversation["id"], [])
+        unread = sum(1 for m in messages if m["senderId"] != user["id"] and not m["isRead"])
+        return {**conversation, "unreadCount": unread}
+
+    def auth_response(self, user, status):
+        return json_response(status, {"user": user, "token": f"standin-{user['id']}"})
+
+    # Health and authentication
+
+    async def health(self, request, writer):
+        return json_response(200, {"status": "ok", "timestamp": iso_now()})
+
+    async def register(self, request, writer):
+        params = request.json()
+        username, password = params.get("username"), params.get("password") or ""
+        errors = []
+        if not username:
+            errors.append("Username can't be blank")
+        elif username in self.user_ids:
+            errors.append("Username has already been taken")
+        if len(password) < 6:
+            errors.append("Password is too short (minimum is 6 characters)")
+        if errors:
+            return json_response(422, {"errors": errors})
+        now = iso_now()
+        user_id = str(len(self.users) + 1)
+        user = {"id": int(user_id), "username": username, "created_at": now, "last_active_at": now}
+        self.users[user_id] = user
+        self.user_ids[username] = user_id
+        self.passwords[user_id] = password
+        # Every registered user gets an expert profile, as in AuthController#register
+        self.profiles[user_id] = {
+            "id": user_id, "userId": user_id, "bio": None, "expertFaq": None,
+            "knowledgeBaseLinks": [], "createdAt": now, "updatedAt": now,
+        }
+        return self.auth_response(user, 201)
+
+    async def login(self, request, writer):
+        params = request.json()
+        user_id = self.user_ids.get(params.get("username"))
+        if user_id is None or self.passwords[user_id] != params.get("password"):
+            return json_response(401, {"error": "Invalid username or password"})
+        self.users[user_id]["last_active_at"] = iso_now()
+        return self.auth_response(self.users[user_id], 200)
+
+    async def logout(self, request, writer):
+        return json_response(200, {"message": "Logged out successfully"})
+
+    async def refresh(self, request, writer, user):
+        return self.auth_response(user, 200)
+
+    async def me(self, request, writer, user):
+        return json_response(200, user)
+
+    # Conversations and messages
+
+    def visible_conversation(self, user, conversation_id):
+        """A conversation the user initiated or is assigned to, as in ConversationsController#set_conversation."""
+        conversation = self.conversations.get(conversation_id)
+        user_id = str(user["id"])
+        if conversation and user_id in (conversation["questionerId"], conversation["assignedExpertId"]):
+            return conversation
+        return None
+
+    def user_conversations(self, user):
+        return list(self.conversations_by_user.get(str(user["id"]), {}).values())
+
+    async def list_conversations(self, request, writer, user):
+        conversations = sorted(self.user_conversations(user), key=lambda c: c["updatedAt"], reverse=True)
+        return json_response(200, [self.conversation_json(c, user) for c in conversations])
+
+    async def create_conversation(self, request, writer, user):
+        title = request.json().get("title")
+        if not title:
+            return json_response(422, {"errors": ["Title can't be blank"]})
+        now = iso_now()
+        conversation_id = str(len(self.conversations) + 1)
+        conversation = {
+            "id": conversation_id, "title": title, "status": "waiting",
+            "questionerId": str(user["id"]), "questionerUsername": user["username"],
+            "assignedExpertId": None, "assignedExpertUsername": None,
+            "createdAt": now, "updatedAt": now, "lastMessageAt": None,
+        }
+        self.conversations[conversation_id] = conversation
+        self.conversations_by_user.setdefault(str(user["id"]), {})[conversation_id] = conversation
+        self.waiting[conversation_id] = conversation
+        self.messages[conversation_id] = []
+        self.hub.publish(user["id"], "conversation-update", {"conversationId": conversation_id})
+        return json_response(201, self.conversation_json(conversation, user))
+
+    async def show_conversation(self, request, writer, user, conversation_id):
+        conversation = self.visible_conversation(user, conversation_id)
+        if not conversation:
+            return json_response(404, {"error": "Conversation not found"})
+        return json_response(200, self.conversation_json(conversation, user))
+
+    async def list_messages(self, request, writer, user, conversation_id):
+        if not self.visible_conversation(user, conversation_id):
+            return json_response(404, {"error": "Conversation not found"})
+        return json_response(200, self.messages[conversation_id])
+
+    async def create_message(self, request, writer, user):
+        params = request.json()
+        conversation = self.conversations.get(str(params.get("conversationId")))
+        if not conversation:
+            return json_response(404, {"error": "Conversation not found"})
+        user_id = str(user["id"])
+        if user_id not in (conversation["questionerId"], conversation["assignedExpertId"]):
+            return json_response(403, {"error": "Forbidden"})
+        if not params.get("content"):
+            return json_response(422, {"errors": ["Content can't be blank"]})
+        message = self.add_message(conversation, user, params["content"])
+        if self.job_workers:
+            self.enqueue_message_jobs(conversation, message)
+        return json_response(201, message)
+
+    def add_message(self, conversation, sender, content):
+        now = iso_now()
+        sender_id = str(sender["id"])
+        message = {
+            "id": str(self.next_ids["message"]), "conversationId": conversation["id"],
+            "senderId": sender_id, "senderUsername": sender["username"],
+            "senderRole": "initiator" if sender_id == conversation["questionerId"] else "expert",
+            "content": content, "timestamp": now, "isRead": False,
+        }
+        self.next_ids["message"] += 1
+        self.messages[conversation["id"]].append(message)
+        conversation["lastMessageAt"] = now
+        conversation["updatedAt"] = now
+        for participant in (conversation["questionerId"], conversation["assignedExpertId"]):
+            if participant:
+                self.hub.publish(participant, "message-update", {"messageId": message["id"]})
+        return message
+
+    async def mark_read(self, request, writer, user, message_id):
+        for conversation in self.user_conversations(user):
+            for message in self.messages[conversation["id"]]:
+                if message["id"] == message_id:
+                    if message["senderId"] == str(user["id"]):
+                        return json_response(403, {"error": "Cannot mark your own messages as read"})
+                    message["isRead"] = True
+                    return json_response(200, {"success": True})
+        return json_response(404, {"error": "Message not found"})
+
+    # Expert operations
+
+    def queue_json(self, user, waiting, assigned):
+        return {
+            "waitingConversations": [self.conversation_json(c, user) for c in waiting],
+            "assignedConversations": [self.conversation_json(c, user) for c in assigned],
+        }
+
+    async def expert_queue(self, request, writer, user):
+        return json_response(200, self.queue_json(user, *self.queue_lists(user)))
+
+    def queue_lists(self, expert, since=""):
+        """Waiting conversations (oldest first) and the expert's active ones (most recently updated first)."""
+        expert_id = str(expert["id"])
+        waiting = [c for c in self.waiting.values() if c["updatedAt"] >= since]
+        assigned = sorted(
+            (c for c in self.user_conversations(expert)
+             if c["assignedExpertId"] == expert_id and c["status"] == "active" and c["updatedAt"] >= since),
+            key=lambda c: c["updatedAt"], reverse=True,
+        )
+        return waiting, assigned
+
+    async def claim(self, request, writer, user, conversation_id):
+        conversation = self.conversations.get(conversation_id)
+        if not conversation:
+            return json_response(404, {"error": "Conversation not found"})
+        if conversation["assignedExpertId"]:
+            return json_response(422, {"error": "Conversation is already assigned to an expert"})
+        self.assign_expert(conversation, user)
+        return json_response(200, {"success": True})
+
+    def assign_expert(self, conversation, expert):
+        now = iso_now()
+        expert_id = str(expert["id"])
+        conversation.update(
+            assignedExpertId=expert_id, assignedExpertUsername=expert["username"], status="active", updatedAt=now
+        )
+        self.waiting.pop(conversation["id"], None)
+        self.conversations_by_user.setdefault(expert_id, {})[conversation["id"]] = conversation
+        self.assignments.setdefault(expert_id, []).append({
+            "id": str(self.next_ids["assignment"]), "conversationId": conversation["id"], "expertId": expert_id,
+            "status": "active", "assignedAt": now, "resolvedAt": None, "rating": None,
+        })
+        self.next_ids["assignment"] += 1
+        for participant in (conversation["questionerId"], conversation["assignedExpertId"]):
+            self.hub.publish(participant, "conversation-update", {"conversationId": conversation["id"]})
+
+    async def unclaim(self, request, writer, user, conversation_id):
+        conversation = self.conversations.get(conversation_id)
+        if not conversation:
+            return json_response(404, {"error": "Conversation not found"})
+        if conversation["assignedExpertId"] != str(user["id"]):
+            return json_response(403, {"error": "You are not assigned to this conversation"})
+        conversation.update(assignedExpertId=None, assignedExpertUsername=None, status="waiting", updatedAt=iso_now())
+        self.conversations_by_user[str(user["id"])].pop(conversation_id, None)
+        self.waiting[conversation_id] = conversation
+        for assignment in self.assignments.get(str(user["id"]), []):
+            if assignment["conversationId"] == conversation_id and assignment["status"] == "active":
+                assignment.update(status="resolved", resolvedAt=iso_now())
+        return json_response(200, {"success": True})
+
+    async def show_profile(self, request, writer, user):
+        return json_response(200, self.profiles[str(user["id"])])
+
+    async def update_profile(self, request, writer, user):
+        params = request.json()
+        profile = self.profiles[str(user["id"])]
+        for param, field in (("bio", "bio"), ("expert_faq", "expertFaq"), ("knowledge_base_links", "knowledgeBaseLinks")):
+            if param in params:
+                profile[field] = params[param]
+        profile["updatedAt"] = iso_now()
+        return json_response(200, profile)
+
+    async def assignment_history(self, request, writer, user):
+        history = sorted(self.assignments.get(str(user["id"]), []), key=lambda a: a["assignedAt"], reverse=True)
+        return json_response(200, history)
+
+    # Background jobs
+
+    def enqueue_message_jobs(self, conversation, message):
+        """Enqueue the jobs a new message triggers in Message's callbacks and MessagesController#create."""
+        count = len(self.messages[conversation["id"]])
+        if message["senderRole"] == "initiator" and count == 1 and not conversation["assignedExpertId"]:
+            self.jobs.put_nowait((self.assign_expert_job, conversation))
+        if count == 1 or count % 3 == 0:
+            self.jobs.put_nowait((self.summary_job, conversation))
+        self.jobs.put_nowait((self.auto_respond_job, conversation, message))
+
+    async def llm_call(self):
+        if self.job_ms > 0:
+            await asyncio.sleep(random.expovariate(1 / self.job_ms) / 1000)
+
+    async def assign_expert_job(self, conversation):
+        if conversation["assignedExpertId"]:
+            return
+        experts = [
+            self.users[user_id] for user_id, profile in self.profiles.items()
+            if profile["bio"] and user_id != conversation["questionerId"]
+        ]
+        if not experts:
+            return
+        await self.llm_call()
+        if not conversation["assignedExpertId"]:
+            self.assign_expert(conversation, random.choice(experts))
+
+    async def summary_job(self, conversation):
+        await self.llm_call()
+
+    async def auto_respond_job(self, conversation, message):
+        """Reply as the assigned expert to the first message, if an expert with a bio was assigned in time."""
+        expert_id = conversation["assignedExpertId"]
+        if not expert_id or not self.profiles[expert_id]["bio"] or self.messages[conversation["id"]][0] is not message:
+            return
+        await self.llm_call()
+        self.add_message(conversation, self.users[expert_id], "Automatic answer based on the expert's FAQ.")
+
+    async def run_jobs(self):
+        """Drain the job queue with job_workers concurrent workers; a failing job is logged and skipped."""
+        async def work():
+            while True:
+                job, *args = await self.jobs.get()
+                try:
+                    await job(*args)
+                except Exception:
+                    # Raising out of the gather would stop every worker and the server with them
+                    print(f"Job {job.__name__} failed:", file=sys.stderr, flush=True)
+                    traceback.print_exc()
+
+        await asyncio.gather(*(work() for _ in range(self.job_workers)))
+
+    # Polling feeds (inclusive since, like UpdatesController)
+
+    def lookup_user(self, request, param):
+        return self.users.get(request.query.get(param, ""))
+
+    async def conversations_updates(self, request, writer, user):
+        target = self.lookup_user(request, "userId")
+        if not target:
+            return json_response(404, {"error": "User not found"})
+        since = request.query.get("since", "")
+        conversations = [c for c in self.user_conversations(target) if c["updatedAt"] >= since]
+        conversations.sort(key=lambda c: c["updatedAt"], reverse=True)
+        return json_response(200, [self.conversation_json(c, target) for c in conversations])
+
+    async def messages_updates(self, request, writer, user):
+        target = self.lookup_user(request, "userId")
+        if not target:
+            return json_response(404, {"error": "User not found"})
+        since = request.query.get("since", "")
+        messages = [
+            m for c in self.user_conversations(target) for m in self.messages[c["id"]] if m["timestamp"] >= since
+        ]
+        messages.sort(key=lambda m: m["timestamp"], reverse=True)
+        return json_response(200, messages)
+
+    async def expert_queue_updates(self, request, writer, user):
+        expert = self.lookup_user(request, "expertId")
+        if not expert:
+            return json_response(404, {"error": "Expert not found"})
+        since = request.query.get("since", "")
+        return json_response(200, self.queue_json(expert, *self.queue_lists(expert, since)))
+
+    # Push endpoints
+
+    async def stream_updates(self, request, writer):
+        """Server-Sent Events stream of one user's updates. Takes over the connection."""
+        user_id = request.query.get("userId", "")
+        cursor = int(request.headers.get("last-event-id") or self.hub.latest_id(user_id))
+        writer.write(
+            b"HTTP/1.1 200 OK\r\nContent-Type: text/event-stream\r\nCache-Control: no-cache\r\n"
+            b"Connection: keep-alive\r\n\r\n"
+        )
+        await writer.drain()
+        self.hub.open_streams += 1
+        try:
+            while True:
+                self.hub.touch(user_id)
+                events = await self.hub.wait_for_events(user_id, cursor, SSE_HEARTBEAT_SECONDS)
+                if not events:
+                    writer.write(b": heartbeat\n\n")
+                for event in events:
+                    writer.write(f"id: {event['id']}\nevent: {event['type']}\ndata: {json.dumps(event['data'])}\n\n".encode())
+                    cursor = event["id"]
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            self.hub.open_streams -= 1
+        return None
+
+    async def long_poll_updates(self, request, writer):
+        """Updates after the given cursor, held open until one arrives or the long-poll timeout."""
+        user_id = request.query.get("userId", "")
+        cursor = int(request.query.get("cursor") or self.hub.latest_id(user_id))
+        self.hub.touch(user_id)
+        events = await self.hub.wait_for_events(user_id, cursor, self.long_poll_timeout)
+        return json_response(200, events)
+
+
+def parse_route_latency(values):
+    """Parse repeated PATH=MS options into a {path prefix: ms} dict."""
+    route_latency = {}
+    for value in values or []:
+        path, _, ms = value.partition("=")
+        route_latency[path] = float(ms)
+    return route_latency
+
+
+async def serve(args):
+    server = StandInServer(
+        event_interval=args.event_interval,
+        long_poll_timeout=args.long_poll_timeout,
+        latency_ms=args.latency_ms,
+        latency_dist=args.latency_dist,
+        route_latency=parse_route_latency(args.route_latency),
+        error_rate=args.error_rate,
+        job_workers=args.job_workers,
+        job_ms=args.job_ms,
+    )
+    listener = await asyncio.start_server(server.handle_connection, args.bind, args.port, backlog=4096)
+    print(f"Stand-in server listening on http://{args.bind}:{args.port}", flush=True)
+    async with listener:
+        await asyncio.gather(listener.serve_forever(), server.hub.run_synthetic_events(), server.run_jobs())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--bind", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=3000)
+    parser.add_argument("--event-interval", type=float, default=0.0,
+                        help="Mean seconds between synthetic push updates per connected user (0 disables)")
+    parser.add_argument("--long-poll-timeout", type=float, default=25.0,
+                        help="Seconds a long-poll request is held open without updates")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Mean latency added to every response")
+    parser.add_argument("--latency-dist", choices=LATENCY_DISTRIBUTIONS, default="fixed",
+                        help="Distribution of the added latency")
+    parser.add_argument("--route-latency", action="append", metavar="PATH=MS",
+                        help="Mean latency for paths starting with PATH, overriding --latency-ms (repeatable)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered with 500")
+    parser.add_argument("--job-workers", type=int, default=0,
+                        help="Workers running the jobs a new message enqueues (0: no background jobs)")
+    parser.add_argument("--job-ms", type=float, default=2000.0, help="Mean duration of a job that calls the LLM")
+    args = parser.parse_args()
+    try:
+        asyncio.run(serve(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
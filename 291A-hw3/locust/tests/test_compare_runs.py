@@ -0,0 +1,100 @@
+import math
+import random
+
+import numpy as np
+import pytest
+
+from compare_runs import EXACT_PERMUTATIONS, PERMUTATION_RESAMPLES, bootstrap_percentiles, mann_whitney, permutation_test
+from latency_histogram import LatencyHistogram
+
+
+def histogram_of(values):
+    histogram = LatencyHistogram()
+    for value in values:
+        histogram.record(value)
+    return histogram
+
+
+def reference_mann_whitney(baseline, candidate):
+    """Two-sided tie-corrected normal approximation, from midranks of the raw samples."""
+    pooled = sorted(baseline + candidate)
+    ranks = {}
+    for value in set(pooled):
+        first = pooled.index(value) + 1
+        last = len(pooled) - pooled[::-1].index(value)
+        ranks[value] = (first + last) / 2
+    n1, n2 = len(baseline), len(candidate)
+    n = n1 + n2
+    u = sum(ranks[value] for value in candidate) - n2 * (n2 + 1) / 2
+    ties = sum(pooled.count(value) ** 3 - pooled.count(value) for value in set(pooled))
+    variance = n1 * n2 / 12 * ((n + 1) - ties / (n * (n - 1)))
+    return math.erfc(abs(u - n1 * n2 / 2) / math.sqrt(variance) / math.sqrt(2))
+
+
+def test_mann_whitney_matches_midranks_with_ties():
+    # Below 2048 us every value has its own bucket, so equal values are exactly the ties
+    baseline = [100, 100, 200, 200, 200, 300, 400, 400, 500, 700]
+    candidate = [200, 300, 300, 400, 500, 500, 500, 600, 700, 700, 800]
+    p = mann_whitney(histogram_of(baseline), histogram_of(candidate))
+    assert p == pytest.approx(reference_mann_whitney(baseline, candidate), rel=1e-12)
+    assert 0.01 < p < 0.2
+
+
+def test_mann_whitney_of_identical_samples_is_not_significant():
+    samples = [100, 200, 200, 300, 300, 300]
+    assert mann_whitney(histogram_of(samples), histogram_of(samples)) == pytest.approx(1.0)
+
+
+def test_mann_whitney_of_a_single_tied_value_or_an_empty_side_is_one():
+    assert mann_whitney(histogram_of([500] * 5), histogram_of([500] * 7)) == 1.0
+    assert mann_whitney(LatencyHistogram(), histogram_of([100, 200])) == 1.0
+
+
+def test_mann_whitney_detects_a_shift():
+    rng = random.Random(3)
+    baseline = histogram_of(rng.gauss(20_000, 2_000) for _ in range(2000))
+    candidate = histogram_of(rng.gauss(21_000, 2_000) for _ in range(2000))
+    assert mann_whitney(baseline, candidate) < 1e-6
+
+
+def test_exact_permutation_p_value():
+    # 20 relabellings of 3 vs 3; only the observed one and its mirror are as extreme
+    assert math.comb(6, 3) <= EXACT_PERMUTATIONS
+    assert permutation_test([1.0, 2.0, 3.0], [4.0, 5.0, 6.0], np.random.default_rng(0)) == pytest.approx(2 / 20)
+    # Equal means: every relabelling is at least as extreme
+    assert permutation_test([1.0, 3.0], [2.0, 2.0], np.random.default_rng(0)) == pytest.approx(1.0)
+
+
+def test_monte_carlo_permutation_p_value():
+    baseline = [100.0 + i for i in range(15)]
+    separated = [200.0 + i for i in range(15)]
+    assert math.comb(30, 15) > EXACT_PERMUTATIONS
+    p = permutation_test(baseline, separated, np.random.default_rng(1))
+    assert p == pytest.approx(1 / (PERMUTATION_RESAMPLES + 1))
+    interleaved = [100.5 + i for i in range(15)]
+    p = permutation_test(baseline, interleaved, np.random.default_rng(1))
+    assert 0.5 < p <= 1.0
+    assert p == permutation_test(baseline, interleaved, np.random.default_rng(1))
+
+
+def test_bootstrap_percentiles_of_a_known_distribution():
+    # 20 interval blocks of 1000 samples drawn uniformly from 1-10 ms
+    rng = random.Random(5)
+    repetition = [
+        {"GET /a": histogram_of(rng.uniform(1000, 10_000) for _ in range(1000))} for _ in range(20)
+    ]
+    result = bootstrap_percentiles([repetition], "GET /a", [50, 90], 400, np.random.default_rng(2))
+    assert result.shape == (400, 2)
+    for column, expected_ms in ((0, 5.5), (1, 9.1)):
+        low, high = np.percentile(result[:, column], [2.5, 97.5])
+        assert low <= expected_ms <= high
+        assert high - low < 0.3
+
+
+def test_bootstrap_resamples_requests_when_there_are_few_blocks():
+    repetitions = [[{"GET /a": histogram_of([1000] * 50 + [2000] * 50)}] for _ in range(2)]
+    result = bootstrap_percentiles(repetitions, "GET /a", [25, 75], 200, np.random.default_rng(4))
+    assert set(result[:, 0]) == {1.0}
+    assert set(result[:, 1]) == {2.0}
+    medians = bootstrap_percentiles(repetitions, "GET /a", [50], 200, np.random.default_rng(4))[:, 0]
+    assert set(medians) == {1.0, 2.0}
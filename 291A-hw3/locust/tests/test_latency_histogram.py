@@ -0,0 +1,115 @@
+import json
+import random
+
+import pytest
+
+from latency_histogram import (
+    HIGHEST_TRACKABLE_US, SUB_BUCKET_COUNT, LatencyHistogram, LatencyStats, aggregate, merge_histogram_logs,
+)
+
+
+def histogram_of(values):
+    histogram = LatencyHistogram()
+    for value in values:
+        histogram.record(value)
+    return histogram
+
+
+def test_values_below_the_first_doubling_have_their_own_bucket():
+    for value in range(SUB_BUCKET_COUNT):
+        assert LatencyHistogram.value_for(LatencyHistogram.index_for(value)) == value
+
+
+@pytest.mark.parametrize("value", [2048, 2049, 4095, 4096, 12345, 999_999, 30_000_000, HIGHEST_TRACKABLE_US])
+def test_bucket_bounds_keep_three_significant_digits(value):
+    index = LatencyHistogram.index_for(value)
+    upper = LatencyHistogram.value_for(index)
+    lower = LatencyHistogram.value_for(index - 1) + 1
+    assert lower <= value <= upper
+    assert (upper - lower + 1) / value <= 1 / 1024
+
+
+def test_bucket_indexes_are_contiguous_across_doublings():
+    indexes = [LatencyHistogram.index_for(value) for value in range(0, 70_000)]
+    assert indexes == sorted(indexes)
+    assert set(indexes) == set(range(indexes[-1] + 1))
+
+
+def test_out_of_range_values_are_clamped():
+    assert LatencyHistogram.index_for(-5) == LatencyHistogram.index_for(0)
+    assert LatencyHistogram.index_for(10 * HIGHEST_TRACKABLE_US) == LatencyHistogram.index_for(HIGHEST_TRACKABLE_US)
+
+
+def test_percentiles_of_a_uniform_range():
+    histogram = histogram_of(range(1, 100_001))
+    for percentile in (50, 95, 99, 99.9, 100):
+        expected = percentile / 100 * 100_000
+        assert histogram.value_at_percentile(percentile) == pytest.approx(expected, rel=1 / 1024)
+    assert histogram.value_at_percentile(0) == 1
+
+
+def test_percentiles_of_an_empty_histogram_are_zero():
+    assert LatencyHistogram().value_at_percentile(99) == 0
+    assert LatencyHistogram().mean() == 0.0
+
+
+def test_encode_decode_round_trip():
+    rng = random.Random(7)
+    histogram = histogram_of(rng.lognormvariate(9, 1.5) for _ in range(5000))
+    decoded = LatencyHistogram.decode(histogram.encode())
+    assert decoded.counts == histogram.counts
+    assert decoded.total == histogram.total == 5000
+    assert LatencyHistogram.decode(LatencyHistogram().encode()).total == 0
+
+
+def test_merged_histograms_equal_one_histogram_of_all_samples():
+    rng = random.Random(11)
+    samples = [rng.expovariate(1 / 20_000) for _ in range(6000)]
+    parts = [histogram_of(samples[i::3]) for i in range(3)]
+    merged = LatencyHistogram()
+    for part in parts:
+        merged.merge(LatencyHistogram.decode(part.encode()))
+    combined = histogram_of(samples)
+    assert merged.counts == combined.counts
+    assert merged.total == combined.total
+    assert aggregate({str(i): part for i, part in enumerate(parts)}).counts == combined.counts
+
+
+def test_subtract_leaves_only_the_samples_recorded_since_the_copy():
+    histogram = histogram_of([100, 200, 300])
+    before = histogram.copy()
+    histogram.record(200)
+    histogram.record(5000)
+    interval = histogram.subtract(before)
+    assert interval.counts == histogram_of([200, 5000]).counts
+    assert interval.total == 2
+
+
+def test_latency_stats_interval_snapshots_merge_to_the_whole_run():
+    stats = LatencyStats()
+    stats.record("GET /a", 1.5)
+    first = stats.interval_snapshot()
+    stats.record("GET /a", 2.5)
+    stats.record("GET /b", 10.0)
+    second = stats.interval_snapshot()
+    assert stats.interval_snapshot() == {}
+    merged = LatencyStats.merge([first, second])
+    whole = LatencyStats.merge([stats.snapshot()])
+    assert {name: histogram.counts for name, histogram in merged.items()} == {
+        name: histogram.counts for name, histogram in whole.items()
+    }
+    assert merged["GET /a"].total == 2
+
+
+def test_merge_histogram_logs_adds_up_every_interval_of_every_log(tmp_path):
+    paths = []
+    for worker, values in enumerate([[1000, 2000], [3000]]):
+        path = tmp_path / f"histograms.worker-{worker}.jsonl"
+        lines = [
+            json.dumps({"time": 1.0 + i, "source": f"worker-{worker}", "histograms": {"GET /a": histogram_of([value]).encode()}})
+            for i, value in enumerate(values)
+        ]
+        path.write_text("\n".join(lines) + "\n\n")
+        paths.append(str(path))
+    merged = merge_histogram_logs(paths)
+    assert merged["GET /a"].counts == histogram_of([1000, 2000, 3000]).counts
@@ -0,0 +1,45 @@
+import math
+import random
+
+import pytest
+
+from run_matrix import T_QUANTILES_95, confidence_interval
+
+
+def test_a_single_run_has_no_interval():
+    assert confidence_interval([42.0]) == (42.0, 0.0)
+
+
+def test_two_runs_use_the_t_quantile_of_one_degree_of_freedom():
+    mean, half_width = confidence_interval([10.0, 12.0])
+    assert mean == 11.0
+    # stdev sqrt(2) over sqrt(2) runs
+    assert half_width == pytest.approx(12.706)
+
+
+def test_half_width_of_five_runs():
+    mean, half_width = confidence_interval([1.0, 2.0, 3.0, 4.0, 5.0])
+    assert mean == 3.0
+    assert half_width == pytest.approx(2.776 * math.sqrt(2.5) / math.sqrt(5))
+
+
+def test_beyond_the_t_table_the_normal_quantile_is_used():
+    values = [float(v % 7) for v in range(len(T_QUANTILES_95) + 10)]
+    mean, half_width = confidence_interval(values)
+    n = len(values)
+    stdev = math.sqrt(sum((v - mean) ** 2 for v in values) / (n - 1))
+    assert half_width == pytest.approx(1.96 * stdev / math.sqrt(n))
+
+
+def test_identical_runs_have_a_zero_width_interval():
+    assert confidence_interval([7.5, 7.5, 7.5]) == (7.5, 0.0)
+
+
+def test_intervals_cover_the_true_mean_about_95_percent_of_the_time():
+    rng = random.Random(13)
+    trials = 4000
+    covered = 0
+    for _ in range(trials):
+        mean, half_width = confidence_interval([rng.gauss(100, 15) for _ in range(5)])
+        covered += abs(mean - 100) <= half_width
+    assert 0.935 < covered / trials < 0.965
@@ -0,0 +1,79 @@
+from updates import NO_CURSOR, UPDATE_CURSOR_FIELDS, UPDATE_FEEDS, advance_cursor
+
+FIELD = "timestamp"
+
+
+def row(row_id, timestamp):
+    return {"id": row_id, FIELD: timestamp}
+
+
+def feed_since(rows, since):
+    """The backend's feed: every row at or after since (inclusive, one-second timestamps)."""
+    return [r for r in rows if not since or r[FIELD] >= since]
+
+
+def test_every_feed_has_a_cursor_field():
+    assert set(UPDATE_CURSOR_FIELDS) == set(UPDATE_FEEDS)
+
+
+def test_first_poll_keeps_every_row_and_remembers_the_newest_second():
+    rows = [row(1, "2025-12-12T06:39:40Z"), row(2, "2025-12-12T06:39:41Z"), row(3, "2025-12-12T06:39:41Z")]
+    fresh, cursor = advance_cursor(rows, FIELD, NO_CURSOR)
+    assert fresh == rows
+    assert cursor == ("2025-12-12T06:39:41Z", frozenset({2, 3}))
+
+
+def test_rows_repeated_at_the_cursor_second_are_dropped():
+    cursor = ("2025-12-12T06:39:41Z", frozenset({2, 3}))
+    rows = [row(2, "2025-12-12T06:39:41Z"), row(3, "2025-12-12T06:39:41Z")]
+    fresh, advanced = advance_cursor(rows, FIELD, cursor)
+    assert fresh == []
+    assert advanced == cursor
+
+
+def test_a_new_row_in_the_same_second_is_kept_and_joins_the_cursor():
+    cursor = ("2025-12-12T06:39:41Z", frozenset({2}))
+    rows = [row(2, "2025-12-12T06:39:41Z"), row(4, "2025-12-12T06:39:41Z")]
+    fresh, advanced = advance_cursor(rows, FIELD, cursor)
+    assert fresh == [row(4, "2025-12-12T06:39:41Z")]
+    assert advanced == ("2025-12-12T06:39:41Z", frozenset({2, 4}))
+
+
+def test_a_newer_second_replaces_the_remembered_ids():
+    cursor = ("2025-12-12T06:39:41Z", frozenset({2, 3}))
+    rows = [row(3, "2025-12-12T06:39:41Z"), row(5, "2025-12-12T06:39:42Z")]
+    fresh, advanced = advance_cursor(rows, FIELD, cursor)
+    assert fresh == [row(5, "2025-12-12T06:39:42Z")]
+    assert advanced == ("2025-12-12T06:39:42Z", frozenset({5}))
+
+
+def test_rows_without_the_field_do_not_move_the_cursor():
+    cursor = ("2025-12-12T06:39:41Z", frozenset({2}))
+    fresh, advanced = advance_cursor([{"id": 9}], FIELD, cursor)
+    assert fresh == [{"id": 9}]
+    assert advanced == cursor
+    assert advance_cursor([{"id": 9}], FIELD, NO_CURSOR) == ([{"id": 9}], NO_CURSOR)
+
+
+def test_repeated_polls_deliver_each_row_exactly_once():
+    # Rows arrive a few at a time, several within one second, while the client keeps polling
+    arrivals = [
+        [row(1, "2025-12-12T06:39:40Z")],
+        [row(2, "2025-12-12T06:39:40Z"), row(3, "2025-12-12T06:39:41Z")],
+        [],
+        [row(4, "2025-12-12T06:39:41Z")],
+        [row(5, "2025-12-12T06:39:43Z"), row(6, "2025-12-12T06:39:43Z")],
+        [],
+    ]
+    server_rows = []
+    cursor = NO_CURSOR
+    delivered = []
+    repeated = 0
+    for new_rows in arrivals:
+        server_rows.extend(new_rows)
+        rows = feed_since(server_rows, cursor[0])
+        fresh, cursor = advance_cursor(rows, FIELD, cursor)
+        repeated += len(rows) - len(fresh)
+        delivered.extend(r["id"] for r in fresh)
+    assert delivered == [1, 2, 3, 4, 5, 6]
+    assert repeated == 0 + 1 + 1 + 1 + 2 + 2  # The rows at the cursor second come back on every poll
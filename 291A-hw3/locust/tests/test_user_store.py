@@ -0,0 +1,93 @@
+import random
+from collections import Counter
+
+import pytest
+
+from user_store import UserNameGenerator, UserStore
+
+# 99.9th percentile of the chi-square distribution with 19 degrees of freedom
+CHI_SQUARE_19_P999 = 43.82
+
+
+def chi_square(counts, expected):
+    return sum((count - expected) ** 2 / expected for count in counts)
+
+
+def partition_names(max_users, partition_count, names_per_partition):
+    names = []
+    for index in range(partition_count):
+        generator = UserNameGenerator(max_users)
+        generator.assign_partition(seed=17, prime_number=7, partition_index=index, partition_count=partition_count)
+        names.append({generator.generate_username() for _ in range(names_per_partition)})
+    return names
+
+
+def test_coprime_numbers_leave_out_divisors_of_max_users():
+    primes = UserNameGenerator.coprime_numbers(1000)
+    assert 2 not in primes and 5 not in primes
+    assert 3 in primes and 7 in primes
+
+
+@pytest.mark.parametrize("partition_count", [1, 4, 7, 16])
+def test_partitions_produce_disjoint_names(partition_count):
+    max_users = 1000
+    slice_size = max_users // partition_count
+    names = partition_names(max_users, partition_count, slice_size)
+    assert all(len(partition) == slice_size for partition in names)
+    assert len(set().union(*names)) == slice_size * partition_count
+
+
+def test_four_partitions_cover_every_name_once():
+    names = partition_names(1000, 4, 250)
+    assert set().union(*names) == {f"user_{i}" for i in range(1000)}
+
+
+def test_a_partition_wraps_around_within_its_own_slice():
+    generator = UserNameGenerator(1000)
+    generator.assign_partition(seed=17, prime_number=7, partition_index=2, partition_count=4)
+    first = [generator.generate_username() for _ in range(250)]
+    second = [generator.generate_username() for _ in range(250)]
+    assert first == second
+    others = set().union(*(names for index, names in enumerate(partition_names(1000, 4, 250)) if index != 2))
+    assert not others & set(first)
+
+
+def store_users(store, start, count):
+    for user_id in range(start, start + count):
+        store.store_user(f"user_{user_id}", f"token_{user_id}", user_id)
+
+
+def test_random_users_stay_uniform_after_appends():
+    random.seed(21)
+    store = UserStore()
+    store_users(store, 0, 10)
+    for _ in range(1000):
+        store.get_random_user()
+    store_users(store, 10, 10)
+    samples = 40000
+    counts = Counter(store.get_random_user()["user_id"] for _ in range(samples))
+    assert set(counts) == set(range(20))
+    assert chi_square(counts.values(), samples / 20) < CHI_SQUARE_19_P999
+
+
+def test_relogin_refreshes_the_token_without_adding_a_slot():
+    store = UserStore()
+    store_users(store, 0, 3)
+    store.store_user("user_1", "fresh", 1)
+    assert len(store) == 3
+    assert store.user_slots[1]["auth_token"] == "fresh"
+
+
+def test_random_conversations_stay_uniform_after_appends():
+    random.seed(22)
+    store = UserStore()
+    store.store_user("user_1", "token", 1)
+    for conversation_id in range(10):
+        store.add_conversation(1, conversation_id)
+    store.add_conversation(1, 3)  # Duplicates must not weigh a conversation twice
+    for conversation_id in range(10, 20):
+        store.add_conversation(1, conversation_id)
+    samples = 40000
+    counts = Counter(store.get_random_conversation(1) for _ in range(samples))
+    assert set(counts) == set(range(20))
+    assert chi_square(counts.values(), samples / 20) < CHI_SQUARE_19_P999
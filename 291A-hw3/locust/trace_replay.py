@@ -0,0 +1,193 @@
+"""
+Streaming readers for recorded request traces, replayed by the locustfile (--replay-trace).
+
+Two formats are understood, both read one line at a time so multi-GB traces replay
+at constant memory:
+
+JSONL, one request per line:
+    {"timestamp": 1765521579.25, "method": "POST", "path": "/messages",
+     "body": {"conversationId": "25", "content": "Hi"}, "user": "42"}
+    timestamp is epoch seconds or an ISO 8601 string; body and user are optional.
+
+Rails logs (log/development.log, log/production.log):
+    Started POST "/messages" for 127.0.0.1 at 2025-12-12 06:39:40 +0000
+      Parameters: {"conversationId" => "25", "content" => "Hi"}
+      User Load (0.1ms)  SELECT `users`.* FROM `users` WHERE `users`.`id` = 49 LIMIT 1
+    The user is the first users.id the request loads (the authenticated user), and
+    timestamps have the log's one second resolution.
+
+ReplayStats records how far the replayed requests fall behind the trace's schedule.
+
+Convert a Rails log into a JSONL trace:
+    python trace_replay.py log/production.log > trace.jsonl
+"""
+
+import argparse
+import json
+import logging
+import re
+import sys
+import threading
+from collections import namedtuple
+from datetime import datetime
+
+from latency_histogram import LatencyHistogram
+
+TraceRequest = namedtuple("TraceRequest", ["timestamp", "method", "path", "body", "user"])
+
+ANSI_ESCAPE = re.compile(r"\x1b\[[0-9;]*m")
+STARTED = re.compile(r'^Started (\w+) "([^"]+)" for \S+ at (.+)$')
+PARAMETERS = re.compile(r"^\s+Parameters: (\{.*\})\s*$")
+USER_LOAD = re.compile(r"User Load .*`users`\.`id` = (\d+)")
+# Parameters Rails adds from routing rather than from the request body
+ROUTING_PARAMETERS = {"controller", "action", "id", "format"}
+# Values of --replay-format / calibrate_profile.py --format; auto picks by file extension
+TRACE_FORMATS = ["auto", "jsonl", "rails"]
+
+
+def parse_timestamp(value):
+    """Epoch seconds from a number or an ISO 8601 / Rails log timestamp."""
+    if isinstance(value, (int, float)):
+        return float(value)
+    value = value.strip()
+    try:
+        return datetime.strptime(value, "%Y-%m-%d %H:%M:%S %z").timestamp()
+    except ValueError:
+        return datetime.fromisoformat(value.replace("Z", "+00:00")).timestamp()
+
+
+def parse_ruby_hash(text):
+    """Best-effort conversion of a logged Ruby params hash to a dict; None if it is not plain JSON-like data."""
+    converted = re.sub(r"\s*=>\s*", ": ", text)
+    converted = re.sub(r"\bnil\b", "null", converted)
+    try:
+        params = json.loads(converted)
+    except ValueError:
+        return None
+    return {key: value for key, value in params.items() if key not in ROUTING_PARAMETERS} or None
+
+
+def read_jsonl_trace(path):
+    """Yield TraceRequests from a JSONL trace, one line at a time."""
+    with open(path) as f:
+        for line in f:
+            if not line.strip():
+                continue
+            entry = json.loads(line)
+            user = entry.get("user")
+            yield TraceRequest(
+                parse_timestamp(entry["timestamp"]),
+                entry["method"].upper(),
+                entry["path"],
+                entry.get("body"),
+                str(user) if user is not None else None,
+            )
+
+
+def read_rails_log(path):
+    """Yield TraceRequests from a Rails log, one request at a time as its next request starts."""
+    current = None
+    with open(path, errors="replace") as f:
+        for line in f:
+            line = ANSI_ESCAPE.sub("", line.rstrip("\n"))
+            started = STARTED.match(line)
+            if started:
+                if current:
+                    yield TraceRequest(**current)
+                method, target, timestamp = started.groups()
+                current = {
+                    "timestamp": parse_timestamp(timestamp),
+                    "method": method,
+                    "path": target,
+                    "body": None,
+                    "user": None,
+                }
+                continue
+            if current is None:
+                continue
+            parameters = PARAMETERS.match(line)
+            if parameters and current["body"] is None and current["method"] not in ("GET", "DELETE"):
+                # GET parameters are the query string, which is already part of the path
+                current["body"] = parse_ruby_hash(parameters.group(1))
+                continue
+            user_load = USER_LOAD.search(line)
+            if user_load and current["user"] is None:
+                current["user"] = user_load.group(1)
+    if current:
+        yield TraceRequest(**current)
+
+
+def read_trace(path, trace_format="auto"):
+    """Stream a trace in the given format; 'auto' treats *.log files as Rails logs and anything else as JSONL."""
+    if trace_format == "rails" or (trace_format == "auto" and path.endswith(".log")):
+        return read_rails_log(path)
+    return read_jsonl_trace(path)
+
+
+class ReplayStats:
+    """Lag of replayed requests behind their scheduled time, overall and per minute of trace time."""
+    def __init__(self):
+        self.lag = LatencyHistogram()
+        self.windows = {}  # trace minute -> {"requests", "late", "max_lag_ms"}
+        self.lock = threading.Lock()
+
+    def record(self, trace_offset, lag_ms, late_ms):
+        with self.lock:
+            self.lag.record(lag_ms * 1000)
+            window = self.windows.setdefault(str(int(trace_offset // 60)), {"requests": 0, "late": 0, "max_lag_ms": 0.0})
+            window["requests"] += 1
+            window["late"] += lag_ms > late_ms
+            window["max_lag_ms"] = max(window["max_lag_ms"], lag_ms)
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                "lag": self.lag.encode(),
+                "windows": {minute: dict(window) for minute, window in self.windows.items()},
+            }
+
+    @staticmethod
+    def merge(snapshots):
+        """Merge snapshots (one per worker in distributed runs); window maxima take the max."""
+        lag = LatencyHistogram()
+        windows = {}
+        for snapshot in snapshots:
+            lag.merge(LatencyHistogram.decode(snapshot["lag"]))
+            for minute, window in snapshot["windows"].items():
+                target = windows.setdefault(int(minute), {"requests": 0, "late": 0, "max_lag_ms": 0.0})
+                target["requests"] += window["requests"]
+                target["late"] += window["late"]
+                target["max_lag_ms"] = max(target["max_lag_ms"], window["max_lag_ms"])
+        return lag, windows
+
+    @classmethod
+    def log_summary(cls, snapshots):
+        """Log the lag distribution and the trace minutes where the replay fell behind."""
+        lag, windows = cls.merge(snapshots)
+        if not lag.total:
+            return
+        behind = sorted((minute for minute, window in windows.items() if window["late"]), key=int)
+        logging.info(
+            f"Replay: {lag.total} requests, lag behind schedule p50 {lag.value_at_percentile(50) / 1000:.0f}ms, "
+            f"p95 {lag.value_at_percentile(95) / 1000:.0f}ms, p99 {lag.value_at_percentile(99) / 1000:.0f}ms; "
+            f"late requests in {len(behind)} of {len(windows)} trace minutes"
+        )
+        for minute in behind:
+            window = windows[minute]
+            logging.info(
+                f"  trace minute {minute}: {window['requests']} requests, "
+                f"{window['late'] / window['requests']:.1%} late, {window['max_lag_ms']:.0f}ms max lag"
+            )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("log", help="Rails log file to convert")
+    args = parser.parse_args()
+
+    for request in read_rails_log(args.log):
+        sys.stdout.write(json.dumps(request._asdict()) + "\n")
+
+
+if __name__ == "__main__":
+    main()
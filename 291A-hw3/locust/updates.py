@@ -0,0 +1,136 @@
+"""
+The update feeds idle clients poll, the cursor bookkeeping of --polling cursor, and the
+counters of those polls and of the push connections (--idle-transport sse/long-poll)
+they are compared with.
+
+The feeds filter on since inclusively and their timestamps have one-second resolution, so
+a cursor poll gets the rows at its cursor's timestamp again until the cursor moves on.
+A cursor therefore keeps the ids of the rows at its timestamp, and advance_cursor drops
+those rows as repeats.
+"""
+
+import logging
+import threading
+
+from latency_histogram import LatencyHistogram, LatencyStats
+
+# Polling feeds: feed -> (path, user id parameter)
+UPDATE_FEEDS = {
+    "conversations": ("/api/conversations/updates", "userId"),
+    "messages": ("/api/messages/updates", "userId"),
+    "expert_queue": ("/api/expert-queue/updates", "expertId"),
+}
+
+# Server timestamp that the cursor polling mode tracks for each feed
+UPDATE_CURSOR_FIELDS = {
+    "conversations": "updatedAt",
+    "messages": "timestamp",
+    "expert_queue": "updatedAt",
+}
+
+NO_CURSOR = ("", frozenset())  # (newest server timestamp seen, ids of the rows at it) before any rows
+
+
+def advance_cursor(rows, field, cursor):
+    """
+    Drop the rows of one feed response that the cursor has already seen, and advance it to
+    the newest timestamp in field. Returns the new rows and the advanced cursor.
+    """
+    timestamp, seen = cursor
+    fresh = [row for row in rows if not (row.get(field) == timestamp and row.get("id") in seen)]
+    # ISO 8601 UTC timestamps from the backend order lexicographically
+    newest = max((row[field] for row in rows if row.get(field)), default="")
+    at_newest = frozenset(row.get("id") for row in rows if row.get(field) == newest)
+    if newest > timestamp:
+        cursor = (newest, at_newest)
+    elif newest == timestamp:
+        cursor = (timestamp, seen | at_newest)
+    return fresh, cursor
+
+
+class TotalsStats:
+    """Base of the harness stats kept as a dict of summable counters per key (mode, transport, endpoint)."""
+    def __init__(self):
+        self.totals = {}  # key -> {counter: value}
+        self.lock = threading.Lock()
+
+    def snapshot(self):
+        with self.lock:
+            return {key: dict(totals) for key, totals in self.totals.items()}
+
+    @staticmethod
+    def merge(snapshots):
+        """Sum snapshots (one per worker in distributed runs) key by key."""
+        merged = {}
+        for snapshot in snapshots:
+            for key, totals in snapshot.items():
+                target = merged.setdefault(key, {})
+                for counter, value in totals.items():
+                    target[counter] = target.get(counter, 0) + value
+        return merged
+
+
+class PollStats(TotalsStats):
+    """Per polling mode totals of IdleUser polls: number of polls, payload bytes, new and repeated rows."""
+    def record(self, mode, results, repeated=0):
+        """Record one poll, given the (new rows, payload_bytes) of each feed and the repeated rows it dropped."""
+        with self.lock:
+            totals = self.totals.setdefault(mode, {"polls": 0, "bytes": 0, "rows": 0, "repeated": 0})
+            totals["polls"] += 1
+            totals["bytes"] += sum(payload_bytes for _, payload_bytes in results)
+            totals["rows"] += sum(len(rows) for rows, _ in results if rows)
+            totals["repeated"] += repeated
+
+    @classmethod
+    def log_summary(cls, snapshots):
+        """Log per-poll averages."""
+        for mode, totals in sorted(cls.merge(snapshots).items()):
+            polls = totals["polls"] or 1
+            logging.info(
+                f"IdleUser {mode} polling: {totals['polls']} polls, "
+                f"{totals['bytes'] / polls:.0f} bytes/poll, {totals['rows'] / polls:.1f} new rows/poll"
+                + (f", {totals['repeated'] / polls:.1f} repeated rows/poll dropped" if totals.get("repeated") else "")
+            )
+
+
+class PushStats(TotalsStats):
+    """Per push transport totals of PushUser connections and delivered events, with a delivery latency histogram."""
+    def __init__(self):
+        super().__init__()
+        self.latency = LatencyStats()  # transport -> HDR histogram of delivery latencies
+
+    def connection_opened(self, transport):
+        with self.lock:
+            totals = self.totals.setdefault(transport, self.empty_totals())
+            totals["connects"] += 1
+            totals["open"] += 1
+            totals["max_open"] = max(totals["max_open"], totals["open"])
+
+    def connection_closed(self, transport):
+        with self.lock:
+            self.totals[transport]["open"] -= 1
+
+    def event_delivered(self, transport, latency_ms):
+        with self.lock:
+            totals = self.totals.setdefault(transport, self.empty_totals())
+            totals["events"] += 1
+        self.latency.record(transport, latency_ms)
+
+    @staticmethod
+    def empty_totals():
+        return {"connects": 0, "open": 0, "max_open": 0, "events": 0}
+
+    def snapshot(self):
+        return {"totals": super().snapshot(), "latency": self.latency.snapshot()}
+
+    @classmethod
+    def log_summary(cls, snapshots):
+        """Log held connections and delivery latency percentiles; max_open is summed across workers."""
+        latency = LatencyStats.merge(snapshot["latency"] for snapshot in snapshots)
+        for transport, totals in sorted(cls.merge(snapshot["totals"] for snapshot in snapshots).items()):
+            histogram = latency.get(transport, LatencyHistogram())
+            p50, p95, p99 = (histogram.value_at_percentile(p) / 1000 for p in (50, 95, 99))
+            logging.info(
+                f"PushUser {transport}: {totals['connects']} connects, {totals['max_open']} max concurrent, "
+                f"{totals['events']} events, delivery latency p50 {p50:.1f} ms, p95 {p95:.1f} ms, p99 {p99:.1f} ms"
+            )
@@ -0,0 +1,61 @@
+"""
+Compact on-disk fixture of pre-registered users and their JWTs.
+
+Layout (little-endian):
+    header: magic b"USRFIX1\0", uint32 record count, float64 creation time (unix seconds)
+    record: int64 user_id, uint16 username length, uint16 token length, username bytes, token bytes
+
+Written by seed_users.py and memory-mapped by the locustfile (--user-fixture) so
+personas can start from a warm UserStore instead of registering accounts.
+"""
+
+import mmap
+import struct
+import time
+
+MAGIC = b"USRFIX1\0"
+HEADER = struct.Struct("<8sId")
+RECORD = struct.Struct("<qHH")
+
+# Tokens issued by JwtService expire after 15 minutes
+JWT_TTL_SECONDS = 15 * 60
+
+
+def write_user_fixture(path, users, created_at=None):
+    """Write (username, auth_token, user_id) tuples to a fixture file."""
+    users = list(users)
+    with open(path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, len(users), created_at or time.time()))
+        for username, auth_token, user_id in users:
+            username_bytes = username.encode()
+            token_bytes = auth_token.encode()
+            f.write(RECORD.pack(user_id, len(username_bytes), len(token_bytes)))
+            f.write(username_bytes)
+            f.write(token_bytes)
+    return len(users)
+
+
+def read_fixture_header(path):
+    """Return (record_count, created_at) without reading the records."""
+    with open(path, "rb") as f:
+        magic, count, created_at = HEADER.unpack(f.read(HEADER.size))
+    if magic != MAGIC:
+        raise ValueError(f"{path} is not a user fixture")
+    return count, created_at
+
+
+def read_user_fixture(path):
+    """Yield (username, auth_token, user_id) tuples from a memory-mapped fixture file."""
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        magic, count, _ = HEADER.unpack_from(data, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a user fixture")
+        offset = HEADER.size
+        for _ in range(count):
+            user_id, username_len, token_len = RECORD.unpack_from(data, offset)
+            offset += RECORD.size
+            username = data[offset:offset + username_len].decode()
+            offset += username_len
+            auth_token = data[offset:offset + token_len].decode()
+            offset += token_len
+            yield username, auth_token, user_id
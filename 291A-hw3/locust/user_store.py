@@ -0,0 +1,181 @@
+"""
+Identities of the simulated users: the username sequence each process registers from,
+and the store of registered users and their conversations that personas sample from.
+
+Usernames step through 0..max_users-1 by a prime coprime with max_users from a random
+seed, so they do not collide until max_users names are used. In distributed runs every
+worker takes one disjoint slice of that sequence (assign_partition) from the seed and
+prime the master picked.
+"""
+
+import logging
+import math
+import random
+import threading
+import time
+
+from seed_conversations import read_conversation_fixture
+from user_fixture import JWT_TTL_SECONDS, read_fixture_header, read_user_fixture
+
+
+class UserNameGenerator:
+    """
+    Generates unique usernames using prime number stepping to avoid collisions.
+    Only primes coprime with max_users are used, so the first max_users names are all distinct.
+    """
+    PRIME_NUMBERS = [2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37, 41, 43, 47, 53, 59, 61, 67, 71, 73, 79, 83, 89, 97]
+
+    def __init__(self, max_users, seed=None, prime_number=None):
+        self.seed = seed or random.randint(0, max_users)
+        self.prime_number = prime_number or random.choice(self.coprime_numbers(max_users))
+        self.current_index = -1
+        self.max_users = max_users
+        self.slice_start = 0
+        self.slice_size = max_users
+        self.lock = threading.Lock()
+
+    @classmethod
+    def coprime_numbers(cls, max_users):
+        """Primes whose stepping visits every index below max_users before repeating."""
+        return [p for p in cls.PRIME_NUMBERS if math.gcd(p, max_users) == 1]
+
+    def assign_partition(self, seed, prime_number, partition_index, partition_count):
+        """
+        Restrict this generator to one of partition_count disjoint slices of the username sequence.
+        Generators sharing seed and prime_number but holding different slices never produce the same name.
+        """
+        with self.lock:
+            self.seed = seed
+            self.prime_number = prime_number
+            self.slice_size = self.max_users // partition_count
+            self.slice_start = partition_index * self.slice_size
+            self.current_index = -1
+
+    def generate_username(self):
+        with self.lock:
+            self.current_index += 1
+            position = self.slice_start + self.current_index % self.slice_size
+            return f"user_{(self.seed + position * self.prime_number) % self.max_users}"
+
+
+class UserStore:
+    """
+    Thread-safe storage for registered users and their tokens.
+
+    Users live in an append-only slot list, so sampling is a single randrange and
+    needs no lock: slots are never removed and list appends are atomic. Each user's
+    conversations are kept as a set (O(1) dedup) paired with a list (O(1) sampling).
+    Only writes take a lock.
+    """
+    def __init__(self):
+        self.user_slots = []  # append-only list of user records
+        self.slot_by_username = {}  # username -> index into user_slots
+        self.username_lock = threading.Lock()
+        # Track conversations per user for proper access control
+        self.user_conversations = {}  # user_id -> (set of conversation_ids, list of conversation_ids)
+        self.all_conversations = []  # append-only (user_id, conversation_id) of every stored conversation
+        self.conversations_lock = threading.Lock()
+        self.conversation_sizes = {}  # conversation_id -> message count last seen, for size-bucketed latencies
+
+    def __len__(self):
+        return len(self.user_slots)
+
+    def get_user_for_key(self, key):
+        """The user in slot key % len(store): the same key maps to the same user while the store does not grow."""
+        slots = self.user_slots
+        if not slots:
+            return None
+        return slots[key % len(slots)]
+
+    def get_random_user(self):
+        slots = self.user_slots
+        if not slots:
+            return None
+        return slots[random.randrange(len(slots))]
+
+    def store_user(self, username, auth_token, user_id):
+        user = {
+            "username": username,
+            "auth_token": auth_token,
+            "user_id": user_id
+        }
+        with self.username_lock:
+            slot = self.slot_by_username.get(username)
+            if slot is None:
+                self.slot_by_username[username] = len(self.user_slots)
+                self.user_slots.append(user)
+            else:
+                # Re-login of a known user: refresh the token in place
+                self.user_slots[slot] = user
+        with self.conversations_lock:
+            if user_id not in self.user_conversations:
+                self.user_conversations[user_id] = (set(), [])
+        return user
+
+    def add_conversation(self, user_id, conversation_id):
+        """Add a conversation to a specific user's list."""
+        conversations = self.user_conversations.get(user_id)
+        if conversations is not None and conversation_id in conversations[0]:
+            return
+        with self.conversations_lock:
+            if user_id not in self.user_conversations:
+                self.user_conversations[user_id] = (set(), [])
+            seen, ordered = self.user_conversations[user_id]
+            if conversation_id not in seen:
+                seen.add(conversation_id)
+                ordered.append(conversation_id)
+                self.all_conversations.append((user_id, conversation_id))
+
+    def get_random_conversation(self, user_id):
+        """Get a random conversation that this user has access to."""
+        conversations = self.user_conversations.get(user_id)
+        if not conversations or not conversations[1]:
+            return None
+        ordered = conversations[1]
+        return ordered[random.randrange(len(ordered))]
+
+    def get_random_other_conversation(self, user_id, attempts=5):
+        """A random stored conversation owned by someone other than user_id, or None."""
+        conversations = self.all_conversations
+        for _ in range(attempts if conversations else 0):
+            owner_id, conversation_id = conversations[random.randrange(len(conversations))]
+            if owner_id != user_id:
+                return conversation_id
+        return None
+
+    def get_conversation_size(self, conversation_id):
+        return self.conversation_sizes.get(conversation_id)
+
+    def set_conversation_size(self, conversation_id, size):
+        self.conversation_sizes[conversation_id] = size
+
+    def get_history_size(self, user_id):
+        """Total known message count of a user's conversations, or None if none is known."""
+        conversations = self.user_conversations.get(user_id)
+        sizes = [self.conversation_sizes.get(c) for c in conversations[1]] if conversations else []
+        known = [size for size in sizes if size is not None]
+        return sum(known) if known else None
+
+    def load_fixture(self, path):
+        """Load pre-registered users from a user fixture written by seed_users.py."""
+        count, created_at = read_fixture_header(path)
+        age = time.time() - created_at
+        if age > JWT_TTL_SECONDS:
+            logging.warning(
+                f"User fixture {path} is {age / 60:.0f} minutes old; its JWTs have expired. Re-run seed_users.py."
+            )
+        for username, auth_token, user_id in read_user_fixture(path):
+            self.store_user(username, auth_token, user_id)
+        logging.info(f"Loaded {count} users from fixture {path}")
+        return count
+
+    def load_conversation_fixture(self, path):
+        """Add the conversations of a fixture written by seed_conversations.py to their owners."""
+        count = messages = 0
+        for conversation_id, user_id, message_count in read_conversation_fixture(path):
+            self.add_conversation(user_id, conversation_id)
+            self.set_conversation_size(conversation_id, message_count)
+            count += 1
+            messages += message_count
+        logging.info(f"Loaded {count} conversations with {messages} messages from fixture {path}")
+        return count
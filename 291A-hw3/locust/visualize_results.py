@@ -1,7 +1,7 @@
 """
 Load test results visualization for different scaling configurations.
 
-Generates 4 graphs comparing performance metrics across user personas (p1-p4 and combined).
+Generates one graph per configuration comparing performance metrics across variants.
 Each graph shows:
 - Max requests per second (green) - higher is better
 - Response time 50th percentile in ms (orange) - inverted (lower is better)
@@ -9,11 +9,53 @@ Each graph shows:
 - Number of users (blue) - higher is better
 
 Metrics are normalized to different y-axis scales for better comparison.
+
+Without arguments the hand-transcribed results below are charted. With --run, the
+numbers are derived from locust --csv output instead, one run per configuration
+and variant:
+
+    python visualize_results.py \
+        --run "Single instance" baseline results/single_baseline \
+        --run "Single instance" combined results/single_combined
+
+Each PREFIX is the value passed to locust --csv (a path to the _stats.csv or
+_stats_history.csv file also works). Files are streamed row by row, so multi-hour
+histories with many endpoints never need to fit in memory.
+
+From the Aggregated rows of {PREFIX}_stats_history.csv:
+- max RPS is the highest Requests/s seen during the run
+- the breaking point is the first row where p95 exceeds --p95-limit or the failure
+  ratio exceeds --failure-limit; when neither is crossed it is the row with the
+  highest RPS
+- p50, p95 and users are read from the breaking point row
+When only {PREFIX}_stats.csv exists, the whole-run Aggregated row is used and the
+number of users is reported as 0. Runs whose {PREFIX}_generator.json (written by the
+locustfile's self-monitoring) says the load generator was the bottleneck are flagged,
+since their latencies include client-side queuing.
+
+--store DB charts the runs of a run_matrix.py result store instead: each configuration
+and variant is the mean of its successful repetitions (of --matrix, when the store holds
+several, and of --shape, when the matrix ran several), and the report of run_matrix.py
+gives their confidence intervals.
+
+--histograms CONFIG VARIANT PATTERN merges the HDR histogram logs matching PATTERN
+(locustfile --histogram-log, e.g. "results/single_baseline/histograms*.jsonl" for all
+workers of a run). Repeating it for the same configuration and variant merges several
+runs. The exact merged p50 and p95 then replace the CSV figures of that run, and p99
+and p99.9 are printed alongside.
 """
 
+import argparse
+import glob
+import os
+
 import matplotlib.pyplot as plt
 import numpy as np
 
+from latency_histogram import LatencyHistogram, aggregate, merge_histogram_logs
+from locust_results import csv_prefix, generator_bound, read_stats, read_stats_history
+from run_matrix import open_store, store_matrix, summarize
+
 # Data structure: [max_rps, p50_ms, p95_ms, num_users]
 data = {
     "Single instance (1x m7g.med, 1x db.m5.large)": {
@@ -46,15 +88,6 @@ data = {
     }
 }
 
-# Verify data integrity
-print("Data Verification:")
-print("=" * 80)
-for config_name, config_data in data.items():
-    print(f"\n{config_name}:")
-    for optimization, values in config_data.items():
-        rps, p50, p95, users = values
-        print(f"  {optimization:22s}: RPS={rps:6.1f}, P50={p50:4.0f}ms, P95={p95:4.0f}ms, Users={users:3.0f}")
-print("\n" + "=" * 80)
 
 # Metrics configuration
 metrics = [
@@ -64,22 +97,109 @@ metrics = [
     {"name": "Number of Users", "color": "blue", "idx": 3, "invert": False}
 ]
 
-personas = ["baseline", "cache-expert-bios", "cache-expert-queue", "conversation-indexes", "combined"]
-x_pos = np.arange(len(personas))
 bar_width = 0.2
-target_height = 50  # Target height for p1 values (50% of graph)
+target_height = 50  # Target height for baseline values (50% of graph)
+
+
+def load_runs(runs, p95_limit, failure_limit, flagged):
+    """
+    Build the {config: {variant: [max_rps, p50_ms, p95_ms, num_users]}} structure from locust CSV runs.
+    (config, variant) pairs of generator-bound runs are added to flagged.
+    """
+    results = {}
+    for config_name, variant, path in runs:
+        prefix = csv_prefix(path)
+        history_path = f"{prefix}_stats_history.csv"
+        if os.path.exists(history_path):
+            values = read_stats_history(history_path, p95_limit, failure_limit)
+        elif os.path.exists(f"{prefix}_stats.csv"):
+            values = read_stats(f"{prefix}_stats.csv")
+        else:
+            raise SystemExit(f"No locust stats found for prefix {prefix}")
+        results.setdefault(config_name, {})[variant] = values
+        reasons = generator_bound(prefix)
+        if reasons:
+            flagged.add((config_name, variant))
+            print(f"WARNING: {config_name} / {variant} was generator-bound ({'; '.join(reasons)})")
+    return results
+
 
-# Create each configuration graph as separate figure
-for config_idx, (config_name, config_data) in enumerate(data.items()):
-    # Create individual figure for this configuration
+def load_store(path, matrix_name, shape, flagged):
+    """
+    Build the {config: {variant: [max_rps, p50_ms, p95_ms, num_users]}} structure from the
+    means of one matrix's successful repetitions in a run_matrix.py store. Cells with a
+    generator-bound run are added to flagged.
+    """
+    store = open_store(path)
+    results = {}
+    for (_, config_name, variant, cell_shape), cell in summarize(store, store_matrix(store, matrix_name)).items():
+        if (shape and cell_shape != shape) or not cell["runs"]:
+            continue
+        results.setdefault(config_name, {})[variant] = [
+            cell[metric][0] if cell[metric] else 0 for metric in ("max_rps", "p50_ms", "p95_ms", "users")
+        ]
+        if cell["generator_bound"]:
+            flagged.add((config_name, variant))
+    return results
+
+
+def load_histograms(histogram_runs):
+    """Merge histogram logs into {(config, variant): LatencyHistogram} of all requests together."""
+    merged = {}
+    for config_name, variant, pattern in histogram_runs:
+        paths = sorted(glob.glob(pattern))
+        if not paths:
+            raise SystemExit(f"No histogram logs match {pattern}")
+        merged.setdefault((config_name, variant), LatencyHistogram()).merge(aggregate(merge_histogram_logs(paths)))
+    return merged
+
+
+def apply_histograms(results, histograms):
+    """Replace p50/p95 with the exact merged histogram percentiles, adding runs that only have histograms."""
+    for (config_name, variant), histogram in histograms.items():
+        values = results.setdefault(config_name, {}).setdefault(variant, [0.0, 0, 0, 0])
+        values[1] = histogram.value_at_percentile(50) / 1000
+        values[2] = histogram.value_at_percentile(95) / 1000
+
+
+def print_tail_latency(histograms):
+    """Print exact merged tail percentiles of every run that has histogram logs."""
+    print("\nTail latency from HDR histograms (ms):")
+    print("=" * 80)
+    print(f"  {'Configuration / variant':44s} {'Requests':>9s} {'P50':>7s} {'P95':>7s} {'P99':>7s} {'P99.9':>7s}")
+    for (config_name, variant), histogram in histograms.items():
+        p50, p95, p99, p999 = (histogram.value_at_percentile(p) / 1000 for p in (50, 95, 99, 99.9))
+        label = f"{config_name} / {variant}"
+        print(f"  {label[:44]:44s} {histogram.total:9d} {p50:7.1f} {p95:7.1f} {p99:7.1f} {p999:7.1f}")
+    print("=" * 80)
+
+
+def print_data(data, flagged=()):
+    """Print every configuration's values so they can be checked against the source."""
+    print("Data Verification:")
+    print("=" * 80)
+    for config_name, config_data in data.items():
+        print(f"\n{config_name}:")
+        for optimization, values in config_data.items():
+            rps, p50, p95, users = values
+            note = "  <- generator-bound" if (config_name, optimization) in flagged else ""
+            print(f"  {optimization:22s}: RPS={rps:6.1f}, P50={p50:4.0f}ms, P95={p95:4.0f}ms, Users={users:3.0f}{note}")
+    print("\n" + "=" * 80)
+
+
+def plot_configuration(config_idx, config_name, config_data, personas, output_dir, flagged=()):
+    """Draw and save the normalized bar chart for one configuration."""
+    x_pos = np.arange(len(personas))
     fig, ax = plt.subplots(1, 1, figsize=(12, 8))
-    
+    missing = [0, 0, 0, 0]
+    baseline = config_data.get("baseline") or next(iter(config_data.values()))
+
     # Calculate standardization factors based on baseline values
     # Each metric's baseline value should reach target_height
     standardization_factors = []
     for metric in metrics:
-        baseline_value = config_data["baseline"][metric["idx"]]
-        
+        baseline_value = baseline[metric["idx"]]
+
         # For inverted metrics, use reciprocal (1/value)
         # Lower response time = higher bar
         if metric["invert"]:
@@ -87,29 +207,29 @@ for config_idx, (config_name, config_data) in enumerate(data.items()):
             factor = target_height / baseline_inverted if baseline_inverted > 0 else 1
         else:
             factor = target_height / baseline_value if baseline_value > 0 else 1
-        
+
         standardization_factors.append(factor)
-    
+
     # Extract data for each metric
     for metric_idx, metric in enumerate(metrics):
-        values = [config_data[persona][metric["idx"]] for persona in personas]
+        values = [config_data.get(persona, missing)[metric["idx"]] for persona in personas]
         original_values = values.copy()
-        
+
         # Invert response times (lower is better)
         # Use reciprocal: 1/value so lower values produce higher bars
         if metric["invert"]:
             values = [1.0 / v if v > 0 else 0 for v in values]
-        
-        # Apply standardization based on p1
+
+        # Apply standardization based on the baseline
         values = [v * standardization_factors[metric_idx] for v in values]
-        
+
         # Position bars with offset
         offset = (metric_idx - 1.5) * bar_width
-        bars = ax.bar(x_pos + offset, values, bar_width, 
+        bars = ax.bar(x_pos + offset, values, bar_width,
                      label=metric["name"], color=metric["color"], alpha=0.8)
-        
+
         # Add value labels on bars
-        for bar, original_val in zip(bars, original_values):
+        for bar, original_val in zip(bars, original_values, strict=True):
             height = bar.get_height()
             if height > 0:
                 # Show original value (not inverted or scaled)
@@ -117,53 +237,97 @@ for config_idx, (config_name, config_data) in enumerate(data.items()):
                 ax.text(bar.get_x() + bar.get_width()/2., height,
                        label_text,
                        ha='center', va='bottom', fontsize=9, rotation=0)
-    
+
     # Customize subplot
-    ax.set_title(config_name + '\n(All metrics standardized: baseline = 50% height, response times inverted)', 
+    ax.set_title(config_name + '\n(All metrics standardized: baseline = 50% height, response times inverted)',
                 fontsize=15, fontweight='bold', pad=20)
     ax.set_xticks(x_pos)
-    ax.set_xticklabels(personas, fontsize=12)
+    labels = [f"{persona}\n(generator-bound)" if (config_name, persona) in flagged else persona for persona in personas]
+    ax.set_xticklabels(labels, fontsize=12)
     ax.legend(loc='upper left', fontsize=11)
     ax.grid(True, alpha=0.3, axis='y')
     ax.set_axisbelow(True)
     # Remove y-axis labels and ticks as values are standardized differently
     ax.set_yticklabels([])
     ax.tick_params(axis='y', which='both', left=False)
-    
+
     # Adjust layout
     plt.tight_layout()
-    
+
     # Save individual figure with descriptive filename
     safe_name = config_name.replace('(', '').replace(')', '').replace(' ', '_').replace(',', '')
-    output_path = f'load_test_{config_idx+1}_{safe_name}.png'
+    output_path = os.path.join(output_dir, f'load_test_{config_idx+1}_{safe_name}.png')
     plt.savefig(output_path, dpi=300, bbox_inches='tight')
     print(f"Graph {config_idx+1} saved as: {output_path}")
-    
+
     # Close figure to free memory
     plt.close(fig)
 
-# Print summary statistics
-print("\nSummary Statistics:")
-print("=" * 80)
-for config_name, config_data in data.items():
-    print(f"\n{config_name}:")
-    
-    # Calculate averages across personas
-    avg_rps = np.mean([v[0] for v in config_data.values()])
-    avg_p50 = np.mean([v[1] for v in config_data.values()])
-    avg_p95 = np.mean([v[2] for v in config_data.values()])
-    avg_users = np.mean([v[3] for v in config_data.values()])
-    
-    print(f"  Average RPS: {avg_rps:.1f}")
-    print(f"  Average P50: {avg_p50:.0f}ms")
-    print(f"  Average P95: {avg_p95:.0f}ms")
-    print(f"  Average Users: {avg_users:.0f}")
-    
-    # Best performing persona
-    best_rps_persona = max(config_data.items(), key=lambda x: x[1][0])
-    print(f"  Best RPS: {best_rps_persona[0]} ({best_rps_persona[1][0]:.1f})")
-    
-    best_p50_persona = min(config_data.items(), key=lambda x: x[1][1])
-    print(f"  Best P50: {best_p50_persona[0]} ({best_p50_persona[1][1]:.0f}ms)")
-
-print("\n" + "=" * 80)
+
+def print_summary(data):
+    """Print averages and the best variant of each configuration."""
+    print("\nSummary Statistics:")
+    print("=" * 80)
+    for config_name, config_data in data.items():
+        print(f"\n{config_name}:")
+
+        # Calculate averages across personas
+        avg_rps = np.mean([v[0] for v in config_data.values()])
+        avg_p50 = np.mean([v[1] for v in config_data.values()])
+        avg_p95 = np.mean([v[2] for v in config_data.values()])
+        avg_users = np.mean([v[3] for v in config_data.values()])
+
+        print(f"  Average RPS: {avg_rps:.1f}")
+        print(f"  Average P50: {avg_p50:.0f}ms")
+        print(f"  Average P95: {avg_p95:.0f}ms")
+        print(f"  Average Users: {avg_users:.0f}")
+
+        # Best performing persona
+        best_rps_persona = max(config_data.items(), key=lambda x: x[1][0])
+        print(f"  Best RPS: {best_rps_persona[0]} ({best_rps_persona[1][0]:.1f})")
+
+        best_p50_persona = min(config_data.items(), key=lambda x: x[1][1])
+        print(f"  Best P50: {best_p50_persona[0]} ({best_p50_persona[1][1]:.0f}ms)")
+
+    print("\n" + "=" * 80)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--run", nargs=3, action="append", metavar=("CONFIG", "VARIANT", "PREFIX"),
+                        help="Locust --csv prefix of one run, repeatable")
+    parser.add_argument("--histograms", nargs=3, action="append", metavar=("CONFIG", "VARIANT", "PATTERN"),
+                        help="Glob of HDR histogram logs of one run, repeatable")
+    parser.add_argument("--store", help="run_matrix.py result store to chart the repetition means of")
+    parser.add_argument("--matrix", help="With --store, the matrix whose runs are charted (needed if it holds several)")
+    parser.add_argument("--shape", help="With --store, the load shape whose runs are charted")
+    parser.add_argument("--p95-limit", type=float, default=1000, help="p95 (ms) above which the backend counts as broken")
+    parser.add_argument("--failure-limit", type=float, default=0.05, help="Failure ratio above which the backend counts as broken")
+    parser.add_argument("--output-dir", default=".", help="Directory for the generated graphs")
+    args = parser.parse_args()
+
+    flagged = set()
+    if args.run:
+        results = load_runs(args.run, args.p95_limit, args.failure_limit, flagged)
+    elif args.store:
+        results = load_store(args.store, args.matrix, args.shape, flagged)
+    else:
+        results = data
+    histograms = load_histograms(args.histograms) if args.histograms else {}
+    if histograms:
+        results = results if args.run or args.store else {}
+        apply_histograms(results, histograms)
+    print_data(results, flagged)
+    if histograms:
+        print_tail_latency(histograms)
+
+    # Variants in order of first appearance, so every graph lines them up the same way
+    personas = list(dict.fromkeys(variant for config_data in results.values() for variant in config_data))
+    for config_idx, (config_name, config_data) in enumerate(results.items()):
+        plot_configuration(config_idx, config_name, config_data, personas, args.output_dir, flagged)
+
+    print_summary(results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""
+Workflow traces of the personas' chained tasks: every request of one task run becomes a
+span of the same trace, and TraceStats breaks each workflow's duration down by step,
+including the client code between requests. A trace serializes to one JSONL line of
+--trace-file:
+
+    {"trace_id": "eec02da22ca7505f", "workflow": "respond_to_conversations", "user_id": 2,
+     "start": 1765521579.2, "duration_ms": 5.4,
+     "spans": [{"name": "GET /expert/queue", "start_ms": 0.1, "duration_ms": 5.2, "failed": false}]}
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+
+from latency_histogram import LatencyHistogram
+
+
+class WorkflowTrace:
+    """The requests of one workflow task run, as spans with offsets from the start of the trace."""
+    def __init__(self, workflow, user_id=None):
+        self.trace_id = os.urandom(8).hex()
+        self.workflow = workflow
+        self.user_id = user_id
+        self.started = time.time()
+        self.duration_ms = 0.0
+        self.spans = []
+
+    def add_span(self, name, response_time_ms, failed):
+        """Add a request that has just completed; it started response_time_ms ago."""
+        end_ms = (time.time() - self.started) * 1000
+        self.spans.append({
+            "name": name,
+            "start_ms": round(max(0.0, end_ms - response_time_ms), 3),
+            "duration_ms": round(response_time_ms, 3),
+            "failed": failed,
+        })
+
+    def finish(self):
+        self.duration_ms = (time.time() - self.started) * 1000
+
+    def to_json(self):
+        return json.dumps({
+            "trace_id": self.trace_id,
+            "workflow": self.workflow,
+            "user_id": self.user_id,
+            "start": self.started,
+            "duration_ms": round(self.duration_ms, 3),
+            "spans": self.spans,
+        })
+
+
+class TraceStats:
+    """Per workflow trace durations (HDR histograms) and the time each step contributed."""
+    CLIENT_STEP = "(client code between requests)"
+
+    def __init__(self):
+        self.workflows = {}  # workflow -> {"duration": LatencyHistogram, "steps": {step: {"count", "ms"}}}
+        self.lock = threading.Lock()
+
+    def record(self, trace):
+        with self.lock:
+            totals = self.workflows.setdefault(trace.workflow, {"duration": LatencyHistogram(), "steps": {}})
+            totals["duration"].record(trace.duration_ms * 1000)
+            steps = totals["steps"]
+            for span in trace.spans:
+                step = steps.setdefault(span["name"], {"count": 0, "ms": 0.0})
+                step["count"] += 1
+                step["ms"] += span["duration_ms"]
+            client = steps.setdefault(self.CLIENT_STEP, {"count": 0, "ms": 0.0})
+            client["count"] += 1
+            client["ms"] += max(0.0, trace.duration_ms - sum(span["duration_ms"] for span in trace.spans))
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                workflow: {
+                    "duration": totals["duration"].encode(),
+                    "steps": {step: dict(values) for step, values in totals["steps"].items()},
+                }
+                for workflow, totals in self.workflows.items()
+            }
+
+    @staticmethod
+    def merge(snapshots):
+        """Merge snapshots (one per worker in distributed runs) workflow by workflow."""
+        merged = {}
+        for snapshot in snapshots:
+            for workflow, totals in snapshot.items():
+                target = merged.setdefault(workflow, {"duration": LatencyHistogram(), "steps": {}})
+                target["duration"].merge(LatencyHistogram.decode(totals["duration"]))
+                for step, values in totals["steps"].items():
+                    step_totals = target["steps"].setdefault(step, {"count": 0, "ms": 0.0})
+                    step_totals["count"] += values["count"]
+                    step_totals["ms"] += values["ms"]
+        return merged
+
+    @classmethod
+    def log_summary(cls, snapshots):
+        """Log each workflow's duration percentiles and its steps ordered by share of workflow time."""
+        for workflow, totals in sorted(cls.merge(snapshots).items()):
+            duration = totals["duration"]
+            total_ms = sum(values["ms"] for values in totals["steps"].values()) or 1
+            logging.info(
+                f"Workflow {workflow}: {duration.total} traces, p50 {duration.value_at_percentile(50) / 1000:.1f}ms, "
+                f"p95 {duration.value_at_percentile(95) / 1000:.1f}ms"
+            )
+            for step, values in sorted(totals["steps"].items(), key=lambda item: -item[1]["ms"]):
+                logging.info(
+                    f"  {step}: {values['ms'] / total_ms:5.1%} of workflow time, "
+                    f"{values['count'] / (duration.total or 1):.2f} per trace, "
+                    f"{values['ms'] / (values['count'] or 1):.1f}ms mean"
+                )
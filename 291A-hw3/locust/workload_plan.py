@@ -0,0 +1,67 @@
+"""
+Seeded, precomputed workload decisions for one simulated user (--workload-seed).
+
+Every kind of decision (question, message, task, think time, ...) is its own stream:
+NumPy draws a batch of values for it at once from a generator seeded by the run seed,
+the user's key and the stream name, and the persona then takes one value per call
+from a plain list cursor. Batching keeps the per-decision cost at a list index, and
+because each stream has its own generator, how often one stream is used never shifts
+the values of another: the same seed gives every user the same sequence of choices.
+"""
+
+import random
+import zlib
+
+import numpy as np
+
+BATCH_SIZE = 1024
+
+
+class PlannedStream:
+    """Values drawn BATCH_SIZE at a time by draw(rng, size) and handed out one by one."""
+    __slots__ = ("rng", "draw", "values", "cursor")
+
+    def __init__(self, rng, draw):
+        self.rng = rng
+        self.draw = draw
+        self.values = []
+        self.cursor = 0
+
+    def next(self):
+        if self.cursor >= len(self.values):
+            self.values = self.draw(self.rng, BATCH_SIZE).tolist()
+            self.cursor = 0
+        value = self.values[self.cursor]
+        self.cursor += 1
+        return value
+
+
+class WorkloadPlan:
+    """The decision streams of one simulated user, identified by key (a tuple of ints) within the run seed."""
+    def __init__(self, seed, key):
+        self.seed = seed
+        self.key = tuple(key)
+        self.streams = {}
+        # For the remaining, response-dependent choices (e.g. which returned conversation to open)
+        self.random = random.Random(int(self.seed_sequence("random").generate_state(1)[0]))
+
+    def seed_sequence(self, name):
+        return np.random.SeedSequence(self.seed, spawn_key=self.key + (zlib.crc32(name.encode()),))
+
+    def stream(self, name, draw):
+        stream = self.streams.get(name)
+        if stream is None:
+            stream = self.streams[name] = PlannedStream(np.random.default_rng(self.seed_sequence(name)), draw)
+        return stream
+
+    def index(self, name, probabilities):
+        """Next index drawn with the given probabilities (a sequence summing to 1)."""
+        return self.stream(name, lambda rng, size: rng.choice(len(probabilities), size=size, p=probabilities)).next()
+
+    def integer(self, name, count):
+        """Next integer drawn uniformly from [0, count)."""
+        return self.stream(name, lambda rng, size: rng.integers(0, count, size=size)).next()
+
+    def uniform(self, name, low, high):
+        """Next float drawn uniformly from [low, high)."""
+        return self.stream(name, lambda rng, size: rng.uniform(low, high, size=size)).next()